@@ -25,6 +25,7 @@ import app.models.config          # noqa: F401
 import app.models.modificaciones  # noqa: F401
 import app.models.conceptos       # noqa: F401
 import app.models.sifse           # noqa: F401
+import app.models.ejecucion_mensual  # noqa: F401
 
 # Alembic Config
 config = context.config
@@ -0,0 +1,62 @@
+"""Tabla ejecucion_mensual: acumulado por tenant, documento, rubro y mes
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+Crea la tabla y la pobla desde los documentos existentes (CDP, RP,
+obligación, pago, recaudo y reconocimiento no anulados). A partir de aquí
+la mantienen los servicios de escritura; para verificarla o reconstruirla
+usar `python reconstruir_ejecucion_mensual.py`.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+# documento -> (tabla, estado anulado)
+DOCUMENTOS = {
+    "CDP": ("cdp", "ANULADO"),
+    "RP": ("rp", "ANULADO"),
+    "OBLIGACION": ("obligacion", "ANULADA"),
+    "PAGO": ("pago", "ANULADO"),
+    "RECAUDO": ("recaudo", "ANULADO"),
+    "RECONOCIMIENTO": ("reconocimiento", "ANULADO"),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ejecucion_mensual",
+        sa.Column("tenant_id", sa.String(36), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("documento", sa.String(20), nullable=False),
+        sa.Column("codigo_rubro", sa.String(50), nullable=False),
+        sa.Column("anio", sa.Integer, nullable=False),
+        sa.Column("mes", sa.Integer, nullable=False),
+        sa.Column("valor", sa.Float, nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("tenant_id", "documento", "codigo_rubro", "anio", "mes"),
+    )
+    op.create_index("ix_ejecucion_mensual_tenant", "ejecucion_mensual", ["tenant_id"])
+
+    conn = op.get_bind()
+    for documento, (tabla, anulado) in DOCUMENTOS.items():
+        conn.execute(
+            text(
+                "INSERT INTO ejecucion_mensual (tenant_id, documento, codigo_rubro, anio, mes, valor) "
+                f"SELECT tenant_id, :documento, codigo_rubro, "
+                "CAST(SUBSTR(fecha, 1, 4) AS INTEGER), CAST(SUBSTR(fecha, 6, 2) AS INTEGER), SUM(valor) "
+                f"FROM {tabla} WHERE estado != :anulado AND tenant_id IS NOT NULL "
+                "GROUP BY tenant_id, codigo_rubro, "
+                "CAST(SUBSTR(fecha, 1, 4) AS INTEGER), CAST(SUBSTR(fecha, 6, 2) AS INTEGER)"
+            ),
+            {"documento": documento, "anulado": anulado},
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ejecucion_mensual_tenant", table_name="ejecucion_mensual")
+    op.drop_table("ejecucion_mensual")
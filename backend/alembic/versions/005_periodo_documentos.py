@@ -0,0 +1,50 @@
+"""Columna periodo (AAAAMM) en las tablas de documentos
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+Agrega `periodo` a los documentos, la calcula desde `fecha` para los
+registros existentes y crea el índice (tenant_id, periodo). Los informes
+filtran por mes con rangos sobre esta columna en lugar de
+substr(fecha, 6, 2).
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+revision = "005"
+down_revision = "004"
+branch_labels = None
+depends_on = None
+
+# tabla -> prefijo del índice
+TABLAS = {
+    "cdp": "cdp",
+    "rp": "rp",
+    "obligacion": "obligacion",
+    "pago": "pago",
+    "recaudo": "recaudo",
+    "reconocimiento": "reconocimiento",
+    "modificaciones_presupuestales": "modificaciones",
+}
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    for tabla, prefijo in TABLAS.items():
+        op.add_column(tabla, sa.Column("periodo", sa.Integer, nullable=True))
+        conn.execute(
+            text(
+                f"UPDATE {tabla} SET periodo = "
+                "CAST(SUBSTR(fecha, 1, 4) AS INTEGER) * 100 + CAST(SUBSTR(fecha, 6, 2) AS INTEGER) "
+                "WHERE fecha IS NOT NULL AND LENGTH(fecha) >= 7"
+            )
+        )
+        op.create_index(f"ix_{prefijo}_tenant_periodo", tabla, ["tenant_id", "periodo"])
+
+
+def downgrade() -> None:
+    for tabla, prefijo in reversed(list(TABLAS.items())):
+        op.drop_index(f"ix_{prefijo}_tenant_periodo", table_name=tabla)
+        op.drop_column(tabla, "periodo")
@@ -0,0 +1,45 @@
+"""Índices compuestos por rubro, documento padre y tercero
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+Las consultas de saldos e informes filtran por tenant + rubro + estado
+(+ periodo), por el documento padre de la cadena (cdp_numero, rp_numero,
+obligacion_numero) o por nit_tercero. En PostgreSQL los índices incluyen
+`valor` para resolver las sumas sin leer la tabla.
+Para revisar los planes: `python asesor_indices.py`.
+"""
+from alembic import op
+
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas, incluir valor)
+INDICES = [
+    ("ix_cdp_tenant_rubro", "cdp", ["tenant_id", "codigo_rubro", "estado", "periodo"], True),
+    ("ix_rp_tenant_rubro", "rp", ["tenant_id", "codigo_rubro", "estado", "periodo"], True),
+    ("ix_rp_tenant_cdp", "rp", ["tenant_id", "cdp_numero", "estado"], True),
+    ("ix_rp_tenant_nit", "rp", ["tenant_id", "nit_tercero", "periodo"], False),
+    ("ix_obligacion_tenant_rubro", "obligacion", ["tenant_id", "codigo_rubro", "estado", "periodo"], True),
+    ("ix_obligacion_tenant_rp", "obligacion", ["tenant_id", "rp_numero", "estado"], True),
+    ("ix_obligacion_tenant_nit", "obligacion", ["tenant_id", "nit_tercero", "periodo"], False),
+    ("ix_pago_tenant_rubro", "pago", ["tenant_id", "codigo_rubro", "estado", "periodo"], True),
+    ("ix_pago_tenant_obligacion", "pago", ["tenant_id", "obligacion_numero", "estado"], True),
+    ("ix_pago_tenant_nit", "pago", ["tenant_id", "nit_tercero", "periodo"], False),
+    ("ix_recaudo_tenant_rubro", "recaudo", ["tenant_id", "codigo_rubro", "estado", "periodo"], True),
+    ("ix_reconocimiento_tenant_rubro", "reconocimiento", ["tenant_id", "codigo_rubro", "estado", "periodo"], True),
+]
+
+
+def upgrade() -> None:
+    for nombre, tabla, columnas, incluir_valor in INDICES:
+        extra = {"postgresql_include": ["valor"]} if incluir_valor else {}
+        op.create_index(nombre, tabla, columnas, **extra)
+
+
+def downgrade() -> None:
+    for nombre, tabla, _, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
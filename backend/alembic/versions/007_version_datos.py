@@ -0,0 +1,29 @@
+"""Tabla version_datos: contador de cambios por tenant
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+Cada transacción que modifica datos de un tenant incrementa su versión
+(services.version_datos). Los informes cacheados se guardan con la versión
+vigente y dejan de usarse en cuanto cambia. Los tenants sin fila parten de 0.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "version_datos",
+        sa.Column("tenant_id", sa.String(36), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("version", sa.Integer, nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("version_datos")
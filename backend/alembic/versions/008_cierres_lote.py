@@ -0,0 +1,49 @@
+"""Tablas cierres_lote y cierres_lote_tenants: cierre de mes por lote
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+Un administrador lanza el cierre de mes de varios tenants; el progreso y los
+tiempos de cada tenant quedan en cierres_lote_tenants para consultarlos y para
+reanudar el lote si el proceso se reinicia (services.cierre_lote).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cierres_lote",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("estado", sa.String(20), nullable=False, server_default="PENDIENTE"),
+        sa.Column("concurrencia", sa.Integer, nullable=False, server_default="4"),
+        sa.Column("solicitado_por", sa.String(200), nullable=False, server_default=""),
+        sa.Column("fecha_creacion", sa.String(30), nullable=False),
+        sa.Column("inicio", sa.String(30)),
+        sa.Column("fin", sa.String(30)),
+    )
+    op.create_table(
+        "cierres_lote_tenants",
+        sa.Column("lote_id", sa.Integer, sa.ForeignKey("cierres_lote.id"), nullable=False),
+        sa.Column("tenant_id", sa.String(36), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("mes", sa.Integer, nullable=False),
+        sa.Column("estado", sa.String(20), nullable=False, server_default="PENDIENTE"),
+        sa.Column("inicio", sa.String(30)),
+        sa.Column("fin", sa.String(30)),
+        sa.Column("duracion_ms", sa.Integer),
+        sa.Column("error", sa.String(500)),
+        sa.PrimaryKeyConstraint("lote_id", "tenant_id"),
+    )
+    op.create_index("ix_cierres_lote_tenants_estado", "cierres_lote_tenants", ["lote_id", "estado"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cierres_lote_tenants_estado", table_name="cierres_lote_tenants")
+    op.drop_table("cierres_lote_tenants")
+    op.drop_table("cierres_lote")
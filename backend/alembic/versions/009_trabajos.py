@@ -0,0 +1,49 @@
+"""Tabla trabajos: cola de trabajos en segundo plano
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+Informes SIA, importaciones, copias de seguridad y consolidación pueden
+ejecutarse como trabajos (/api/jobs). El estado, los tiempos, el archivo
+subido y el archivo generado se guardan aquí para sobrevivir a reinicios
+(services.trabajos).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "trabajos",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("tenant_id", sa.String(36), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("tipo", sa.String(40), nullable=False),
+        sa.Column("parametros", sa.Text, nullable=False, server_default="{}"),
+        sa.Column("estado", sa.String(20), nullable=False, server_default="PENDIENTE"),
+        sa.Column("solicitado_por", sa.String(200), nullable=False, server_default=""),
+        sa.Column("fecha_creacion", sa.String(30), nullable=False),
+        sa.Column("inicio", sa.String(30)),
+        sa.Column("fin", sa.String(30)),
+        sa.Column("duracion_ms", sa.Integer),
+        sa.Column("error", sa.Text),
+        sa.Column("resultado", sa.Text),
+        sa.Column("artefacto_nombre", sa.String(200)),
+        sa.Column("artefacto_tipo", sa.String(100)),
+        sa.Column("artefacto_tamano", sa.Integer),
+        sa.Column("entrada", sa.LargeBinary),
+        sa.Column("artefacto", sa.LargeBinary),
+    )
+    op.create_index("ix_trabajos_tenant", "trabajos", ["tenant_id", "fecha_creacion"])
+    op.create_index("ix_trabajos_estado", "trabajos", ["estado"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_trabajos_estado", table_name="trabajos")
+    op.drop_index("ix_trabajos_tenant", table_name="trabajos")
+    op.drop_table("trabajos")
@@ -0,0 +1,27 @@
+"""Trabajos: proceso propietario y latido
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+Al reiniciar, services.trabajos solo retoma los trabajos EN_CURSO cuyo
+propietario dejó de renovar el latido; los de otros procesos vivos siguen
+su curso.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("trabajos", sa.Column("propietario", sa.String(36)))
+    op.add_column("trabajos", sa.Column("latido", sa.String(30)))
+
+
+def downgrade() -> None:
+    op.drop_column("trabajos", "latido")
+    op.drop_column("trabajos", "propietario")
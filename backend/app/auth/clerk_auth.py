@@ -1,8 +1,23 @@
 """
 Verificación de JWTs emitidos por Clerk.
 En desarrollo (ENVIRONMENT=development) este módulo no se usa.
+
+Las claves públicas (JWKS) las administra `ClavesJWKS`:
+
+- una sola descarga a la vez: las peticiones que llegan mientras hay una en
+  curso esperan esa misma descarga;
+- se renuevan en segundo plano cuando faltan CLERK_JWKS_MARGEN segundos para
+  que venzan; mientras tanto se siguen usando las actuales;
+- si la descarga falla se conservan las claves anteriores (hasta
+  `max_obsoleto`) y se reintenta después de `intervalo_minimo` segundos;
+- un `kid` desconocido (Clerk rotó las claves) fuerza una descarga, como
+  máximo una cada `intervalo_minimo` segundos, para que tokens con `kid`
+  inventados no generen una descarga por petición.
 """
 
+import asyncio
+import base64
+import logging
 import time
 from typing import Any
 
@@ -11,18 +26,15 @@ import jwt
 
 from app.config import get_settings
 
-# Cache simple en memoria para las claves públicas de Clerk
-_clerk_keys_cache: dict[str, Any] = {"keys": None, "fetched_at": 0.0}
-_CACHE_TTL = 600  # 10 minutos
-
+logger = logging.getLogger(__name__)
 
-async def _get_clerk_public_keys() -> list[dict]:
-    """Obtiene las claves JWKS de Clerk, con caché de 10 min."""
-    now = time.time()
-    if _clerk_keys_cache["keys"] is not None and (now - _clerk_keys_cache["fetched_at"]) < _CACHE_TTL:
-        return _clerk_keys_cache["keys"]
 
+def _url_jwks() -> str:
+    """URL del JWKS: CLERK_JWKS_URL o la derivada de la publishable key."""
     settings = get_settings()
+    if settings.CLERK_JWKS_URL:
+        return settings.CLERK_JWKS_URL
+
     # Extraer el dominio de Clerk de la publishable key
     # Format: pk_test_xxx o pk_live_xxx
     pub_key = settings.CLERK_PUBLISHABLE_KEY
@@ -31,7 +43,6 @@ async def _get_clerk_public_keys() -> list[dict]:
     # Format: pk_test_{base64-encoded-instance-id}
     # El dominio es: {instance-id}.clerk.accounts.dev para test
     # o {instance-id}.clerk.accounts.com para production
-    import base64
 
     # Extraer la parte después del prefijo pk_test_ o pk_live_
     if pub_key.startswith("pk_test_"):
@@ -51,17 +62,128 @@ async def _get_clerk_public_keys() -> list[dict]:
         # Si falla la decodificación, usar el dominio completo directamente
         # ya que algunas publishable keys contienen el dominio sin codificar
         clerk_domain = f"{instance_part}.{env_suffix}"
-    
-    url = f"https://{clerk_domain}/.well-known/jwks.json"
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        data = resp.json()
 
-    keys = data.get("keys", [])
-    _clerk_keys_cache["keys"] = keys
-    _clerk_keys_cache["fetched_at"] = now
-    return keys
+    return f"https://{clerk_domain}/.well-known/jwks.json"
+
+
+def _recuperar_error(tarea: asyncio.Task) -> None:
+    # El error ya quedó registrado en _descargar; se lee para que asyncio no
+    # avise "exception was never retrieved" en los refrescos de fondo
+    if not tarea.cancelled():
+        tarea.exception()
+
+
+class ClavesJWKS:
+    """Claves públicas de un JWKS, indexadas por `kid`."""
+
+    def __init__(
+        self,
+        url: str | None = None,
+        ttl: float = 600,
+        margen: float = 120,
+        intervalo_minimo: float = 30,
+        max_obsoleto: float = 24 * 3600,
+        timeout: float = 10.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._url = url
+        self.ttl = ttl
+        self.margen = margen
+        self.intervalo_minimo = intervalo_minimo
+        self.max_obsoleto = max_obsoleto
+        self.timeout = timeout
+        self._transport = transport  # p.ej. httpx.MockTransport en pruebas
+        # kid -> clave pública ya construida (from_jwk es costoso)
+        self._claves: dict[str, Any] = {}
+        self._obtenido: float | None = None       # monotonic de la última descarga exitosa
+        self._ultimo_intento = float("-inf")      # monotonic de la última descarga (exitosa o no)
+        self._en_vuelo: asyncio.Task | None = None
+        self.descargas = 0
+        self.ultimo_error: str | None = None
+
+    @property
+    def url(self) -> str:
+        return self._url or _url_jwks()
+
+    async def _descargar(self) -> None:
+        self._ultimo_intento = time.monotonic()
+        self.descargas += 1
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self._transport) as client:
+                resp = await client.get(self.url)
+                resp.raise_for_status()
+                keys = resp.json().get("keys", [])
+            claves = {
+                k["kid"]: jwt.algorithms.RSAAlgorithm.from_jwk(k)
+                for k in keys if k.get("kid") and k.get("kty") == "RSA"
+            }
+            if not claves:
+                raise ValueError("el JWKS no contiene claves RSA")
+        except Exception as e:
+            self.ultimo_error = f"{type(e).__name__}: {e}"
+            logger.warning("No se pudo actualizar el JWKS de Clerk: %s", self.ultimo_error)
+            raise
+        self._claves = claves
+        self._obtenido = time.monotonic()
+        self.ultimo_error = None
+
+    def _descarga_en_curso(self) -> asyncio.Task | None:
+        tarea = self._en_vuelo
+        if tarea is None or tarea.done() or tarea.get_loop() is not asyncio.get_running_loop():
+            return None
+        return tarea
+
+    def refrescar(self) -> asyncio.Task:
+        """Inicia una descarga, o retorna la que ya está en curso."""
+        tarea = self._descarga_en_curso()
+        if tarea is None:
+            tarea = self._en_vuelo = asyncio.create_task(self._descargar())
+            tarea.add_done_callback(_recuperar_error)
+        return tarea
+
+    async def _esperar(self, tarea: asyncio.Task) -> bool:
+        # shield: si se cancela la petición que espera, la descarga compartida sigue
+        try:
+            await asyncio.shield(tarea)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+
+    async def clave(self, kid: str | None):
+        """Clave pública del `kid`, o None si no existe."""
+        ahora = time.monotonic()
+        edad = None if self._obtenido is None else ahora - self._obtenido
+        puede_intentar = ahora - self._ultimo_intento >= self.intervalo_minimo
+
+        if edad is None or edad >= self.max_obsoleto:
+            # Sin claves utilizables: hay que esperar la descarga
+            if not await self._esperar(self.refrescar()):
+                raise ValueError(f"No se pudieron obtener las claves públicas de Clerk ({self.ultimo_error})")
+        elif edad >= self.ttl - self.margen and puede_intentar:
+            self.refrescar()  # en segundo plano; esta petición usa las claves actuales
+
+        clave = self._claves.get(kid)
+        if clave is None:
+            tarea = self._descarga_en_curso()
+            if tarea is None and puede_intentar:
+                tarea = self.refrescar()
+            if tarea is not None:
+                await self._esperar(tarea)
+                clave = self._claves.get(kid)
+        return clave
+
+
+_claves_clerk: ClavesJWKS | None = None
+
+
+def claves_clerk() -> ClavesJWKS:
+    global _claves_clerk
+    if _claves_clerk is None:
+        settings = get_settings()
+        _claves_clerk = ClavesJWKS(ttl=settings.CLERK_JWKS_TTL, margen=settings.CLERK_JWKS_MARGEN)
+    return _claves_clerk
 
 
 async def verify_clerk_token(token: str) -> dict:
@@ -69,20 +191,14 @@ async def verify_clerk_token(token: str) -> dict:
     Verifica un JWT de Clerk y retorna el payload.
     Lanza ValueError si el token es inválido.
     """
-    keys = await _get_clerk_public_keys()
-
     # Obtener el header del token para encontrar el kid
-    unverified_header = jwt.get_unverified_header(token)
+    try:
+        unverified_header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as e:
+        raise ValueError(f"Token de Clerk inválido: {e}")
     kid = unverified_header.get("kid")
 
-    # Encontrar la clave pública correspondiente
-    public_key = None
-    for key in keys:
-        if key.get("kid") == kid:
-            # Convertir JWK a PEM
-            public_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
-            break
-
+    public_key = await claves_clerk().clave(kid)
     if public_key is None:
         raise ValueError(f"No se encontró la clave pública con kid: {kid}")
 
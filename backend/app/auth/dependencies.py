@@ -8,6 +8,9 @@ En desarrollo (ENVIRONMENT=development):
 En producción (ENVIRONMENT=production):
   - Se verifica el JWT de Clerk en el header Authorization: Bearer <token>.
   - El usuario debe existir en la tabla users (el admin lo crea previamente).
+
+En ambos casos el usuario resuelto se guarda en app.auth.principales por
+unos segundos, para no repetir la verificación y la consulta en cada petición.
 """
 
 import uuid
@@ -15,6 +18,7 @@ from datetime import date
 
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.clerk_auth import verify_clerk_token
@@ -36,12 +40,18 @@ async def get_current_user(
     """
     # Import local para evitar circular imports
     from app.models.tenant import Tenant, User
+    from app.auth import principales
 
     settings = get_settings()
 
     if settings.ENVIRONMENT == "development":
         email = request.headers.get("X-Dev-Email", "admin@localhost")
-        return await _get_or_create_dev_user(db, email)
+        clave = principales.clave_dev(email)
+        user = principales.obtener(clave)
+        if user is None:
+            user = await _get_or_create_dev_user(db, email)
+            principales.guardar(clave, user)
+        return user
 
     # Producción: verificar Clerk JWT
     auth_header = request.headers.get("Authorization", "")
@@ -49,6 +59,12 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Token de autenticación requerido")
 
     token = auth_header.removeprefix("Bearer ")
+    # Mismo token en una petición reciente: ya verificado y con el usuario cargado
+    clave = principales.clave_token(token)
+    user = principales.obtener(clave)
+    if user is not None:
+        return user
+
     try:
         payload = await verify_clerk_token(token)
     except ValueError as e:
@@ -69,7 +85,7 @@ async def get_current_user(
         # Por ahora, si no encontramos email, rechazamos
         raise HTTPException(status_code=401, detail="El token no contiene email válido")
 
-    stmt = select(User).where(User.email == email, User.activo == True)
+    stmt = select(User).options(joinedload(User.tenant)).where(User.email == email, User.activo == True)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
     if user is None:
@@ -77,6 +93,7 @@ async def get_current_user(
             status_code=401,
             detail="Usuario no autorizado. Contacte al administrador de su institución.",
         )
+    principales.guardar(clave, user, payload.get("exp"))
     return user
 
 
@@ -85,7 +102,7 @@ async def _get_or_create_dev_user(db: AsyncSession, email: str):
     from app.models.tenant import Tenant, User
 
     # Buscar usuario existente
-    stmt = select(User).where(User.email == email)
+    stmt = select(User).options(joinedload(User.tenant)).where(User.email == email)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
     if user:
@@ -119,7 +136,7 @@ async def _get_or_create_dev_user(db: AsyncSession, email: str):
     )
     db.add(user)
     await db.commit()
-    await db.refresh(user)
+    await db.refresh(user, ["tenant"])
     return user
 
 
@@ -141,3 +158,18 @@ async def require_admin(user=Depends(get_current_user)):
             detail="Se requiere rol ADMIN para esta operación.",
         )
     return user
+
+
+def es_operador(user) -> bool:
+    """True si el usuario es operador de la plataforma (OPERADORES_PLATAFORMA)."""
+    return user.rol == "ADMIN" and user.email.lower() in get_settings().operadores_plataforma_set
+
+
+async def require_operador(user=Depends(get_current_user)):
+    """Requiere un operador de la plataforma (actúa sobre todos los tenants)."""
+    if not es_operador(user):
+        raise HTTPException(
+            status_code=403,
+            detail="Se requiere un operador de la plataforma para esta operación.",
+        )
+    return user
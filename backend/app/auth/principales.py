@@ -0,0 +1,84 @@
+"""
+Caché de usuarios autenticados (principal: usuario + institución + rol).
+
+Una página del frontend hace varias llamadas seguidas con el mismo token;
+con este caché solo la primera verifica el JWT y consulta la tabla users.
+
+- La clave es el SHA-256 del token (o del email en desarrollo), nunca el
+  token mismo.
+- Cada entrada vence a los PRINCIPALES_TTL segundos o cuando vence el token,
+  lo que ocurra primero; el caché es un LRU de PRINCIPALES_MAX entradas.
+- Al editar o desactivar un usuario, routes/admin.py llama a
+  `invalidar_usuario`. Es por proceso: con varios workers, los demás
+  notan el cambio al vencer el TTL.
+- Cada petición recibe su propia copia del usuario (sin sesión), así que
+  modificarla no afecta a otras peticiones.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+from app.config import get_settings
+from app.models.tenant import Tenant, User
+
+_CAMPOS_USUARIO = ("id", "tenant_id", "email", "nombre", "cargo", "rol", "activo", "fecha_creacion")
+_CAMPOS_TENANT = ("id", "nombre", "nit", "codigo_dane", "vigencia_actual", "estado", "fecha_creacion")
+
+# clave -> (vence (monotonic), campos del usuario, campos del tenant)
+_entradas: OrderedDict[str, tuple[float, dict, dict]] = OrderedDict()
+
+
+def clave_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def clave_dev(email: str) -> str:
+    return "dev:" + hashlib.sha256(email.encode()).hexdigest()
+
+
+def _copia(campos_usuario: dict, campos_tenant: dict) -> User:
+    user = User(**campos_usuario)
+    user.tenant = Tenant(**campos_tenant)
+    return user
+
+
+def obtener(clave: str) -> User | None:
+    entrada = _entradas.get(clave)
+    if entrada is None:
+        return None
+    vence, campos_usuario, campos_tenant = entrada
+    if vence < time.monotonic():
+        del _entradas[clave]
+        return None
+    _entradas.move_to_end(clave)
+    return _copia(campos_usuario, campos_tenant)
+
+
+def guardar(clave: str, user: User, expira_token: float | None = None) -> None:
+    """Guarda el usuario (con su tenant ya cargado). `expira_token` es el `exp`
+    del JWT (epoch en segundos)."""
+    settings = get_settings()
+    ttl = settings.PRINCIPALES_TTL
+    if expira_token is not None:
+        ttl = min(ttl, expira_token - time.time())
+    if ttl <= 0:
+        return
+    _entradas[clave] = (
+        time.monotonic() + ttl,
+        {c: getattr(user, c) for c in _CAMPOS_USUARIO},
+        {c: getattr(user.tenant, c) for c in _CAMPOS_TENANT},
+    )
+    _entradas.move_to_end(clave)
+    while len(_entradas) > settings.PRINCIPALES_MAX:
+        _entradas.popitem(last=False)
+
+
+def invalidar_usuario(user_id: int) -> None:
+    """Descarta todas las entradas del usuario (todos sus tokens)."""
+    for clave in [c for c, (_, campos, _t) in _entradas.items() if campos["id"] == user_id]:
+        del _entradas[clave]
+
+
+def limpiar() -> None:
+    _entradas.clear()
@@ -11,6 +11,17 @@ class Settings(BaseSettings):
     # Clerk Authentication (reemplaza Cloudflare Access)
     CLERK_SECRET_KEY: str = ""
     CLERK_PUBLISHABLE_KEY: str = ""
+    CLERK_JWKS_URL: str = ""           # vacío = derivada de CLERK_PUBLISHABLE_KEY
+    CLERK_JWKS_TTL: int = 600          # segundos de vigencia de las claves descargadas
+    CLERK_JWKS_MARGEN: int = 120       # se renuevan en segundo plano este tiempo antes
+
+    # Operadores de la plataforma: emails (separados por coma) de usuarios ADMIN
+    # que pueden actuar sobre todos los tenants (cierre por lote, estadísticas)
+    OPERADORES_PLATAFORMA: str = ""
+
+    # Caché de usuarios autenticados (app.auth.principales)
+    PRINCIPALES_TTL: int = 60          # segundos (nunca más allá del exp del token)
+    PRINCIPALES_MAX: int = 1024        # entradas del LRU
 
     # Cloudflare Access (legacy - mantener para compatibilidad)
     CF_TEAM_DOMAIN: str = ""   # e.g. "mi-equipo.cloudflareaccess.com" (solo producción)
@@ -19,6 +30,22 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-2.0-flash"
 
+    # Caché de informes: vacío = LRU en memoria; redis://host:6379/0 = compartido entre workers
+    CACHE_INFORMES_URL: str = ""
+    CACHE_INFORMES_TTL: int = 300      # segundos
+    CACHE_INFORMES_MAX: int = 256      # entradas del LRU en memoria
+    CACHE_PAQUETE_SIA_TTL: int = 7 * 24 * 3600  # segundos; la versión de datos ya invalida
+    CACHE_PAQUETE_SIA_MAX: int = 32    # paquetes en memoria (LRU aparte de los informes)
+
+    # Cierre de mes por lote: tenants que se cierran a la vez
+    CIERRE_LOTE_CONCURRENCIA: int = 4
+
+    # Trabajos en segundo plano (/api/jobs)
+    TRABAJOS_MAX_GLOBAL: int = 4       # trabajos a la vez en el proceso
+    TRABAJOS_MAX_TENANT: int = 2       # trabajos a la vez por tenant
+    TRABAJOS_RETENCION_DIAS: int = 7   # se borran los terminados hace más días
+    TRABAJOS_LATIDO_SEGUNDOS: int = 30  # renovación del latido de los trabajos en curso
+
     @property
     def async_database_url(self) -> str:
         """Convierte la URL de PostgreSQL de Render al formato async requerido."""
@@ -33,6 +60,10 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> list[str]:
         return [o.strip() for o in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def operadores_plataforma_set(self) -> set[str]:
+        return {e.strip().lower() for e in self.OPERADORES_PLATAFORMA.split(",") if e.strip()}
+
     class Config:
         env_file = ".env"
 
@@ -1,3 +1,4 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from app.config import get_settings
@@ -21,9 +22,39 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "begin")
+    def _sqlite_begin(conn):
+        # En SQLite una transacción que lee y luego escribe pide el bloqueo de
+        # escritura a mitad de camino; si otra lo tiene, falla con "database is
+        # locked" en vez de esperar. Las sesiones de escritura lo toman al empezar.
+        if conn.get_execution_options().get("escritura"):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def dialect_insert(db: AsyncSession, model):
+    """INSERT del dialecto de la sesión, con soporte de ON CONFLICT (SQLite o PostgreSQL)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+
+async def get_db_escritura():
+    """Sesión para peticiones que registran documentos: en SQLite abre la
+    transacción con BEGIN IMMEDIATE; en PostgreSQL es igual a get_db."""
+    async with AsyncSessionLocal() as session:
+        try:
+            await session.connection(execution_options={"escritura": True})
+            yield session
+        finally:
+            await session.close()
@@ -10,6 +10,7 @@ from app.config import get_settings
 from app.database import engine, Base, AsyncSessionLocal
 from app.services.config import init_config_defaults
 from app.services.sifse import poblar_catalogos
+from app.services import cierre_lote, trabajos as trabajos_svc
 
 from app.routes import (
     auth,
@@ -34,6 +35,7 @@ from app.routes import (
     consolidacion,
     backup,
     comprobantes,
+    trabajos,
     # ia,  # FASE 5 - Gemini IA (comentado temporalmente)
 )
 
@@ -84,6 +86,11 @@ async def lifespan(app: FastAPI):
         await init_config_defaults(db, DEFAULT_TENANT_ID)
         await poblar_catalogos(db)
 
+    # Retomar cierres por lote interrumpidos por un reinicio
+    await cierre_lote.reanudar_pendientes()
+    # Encolar los trabajos en segundo plano pendientes
+    await trabajos_svc.reanudar_pendientes()
+
     yield
 
     # Shutdown
@@ -131,6 +138,7 @@ app.include_router(importacion.router)
 app.include_router(consolidacion.router)
 app.include_router(backup.router)
 app.include_router(comprobantes.router)
+app.include_router(trabajos.router)
 # app.include_router(ia.router)  # FASE 5 - Gemini IA (comentado temporalmente)
 
 
@@ -6,6 +6,10 @@ from app.models.rp import RP
 from app.models.obligacion import Obligacion
 from app.models.pago import Pago
 from app.models.recaudo import Recaudo
+from app.models.ejecucion_mensual import EjecucionMensual
+from app.models.version_datos import VersionDatos
+from app.models.cierre_lote import CierreLote, CierreLoteTenant
+from app.models.trabajo import Trabajo
 from app.models.modificaciones import ModificacionPresupuestal, DetalleModificacion
 from app.models.pac import PAC, ConsolidacionMensual, ConsolidacionMensualIngresos
 from app.models.conceptos import Concepto
@@ -21,6 +25,10 @@ __all__ = [
     "Tercero",
     "CDP", "RP", "Obligacion", "Pago",
     "Recaudo",
+    "EjecucionMensual",
+    "VersionDatos",
+    "CierreLote", "CierreLoteTenant",
+    "Trabajo",
     "ModificacionPresupuestal", "DetalleModificacion",
     "PAC", "ConsolidacionMensual", "ConsolidacionMensualIngresos",
     "Concepto",
@@ -28,3 +36,7 @@ __all__ = [
     "CatalogoSifseFuente", "CatalogoSifseItem",
     "MapeoSifseIngreso", "MapeoSifseGasto",
 ]
+
+# Registra el listener que incrementa version_datos en cada flush, para que
+# toda escritura (API, scripts, importaciones) invalide los informes cacheados.
+import app.services.version_datos  # noqa: E402,F401
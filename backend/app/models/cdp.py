@@ -1,6 +1,7 @@
 from sqlalchemy import ForeignKey, Index, Integer, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.periodo import periodo_column
 
 
 class CDP(Base):
@@ -9,6 +10,7 @@ class CDP(Base):
     tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
     numero: Mapped[int] = mapped_column(Integer, primary_key=True)
     fecha: Mapped[str] = mapped_column(String(10))
+    periodo: Mapped[int | None] = periodo_column()
     codigo_rubro: Mapped[str] = mapped_column(String(50), ForeignKey("rubros_gastos.codigo"))
     objeto: Mapped[str] = mapped_column(String(1000))
     valor: Mapped[float] = mapped_column(Float)
@@ -16,7 +18,11 @@ class CDP(Base):
     fuente_sifse: Mapped[int] = mapped_column(Integer, default=0)
     item_sifse: Mapped[int] = mapped_column(Integer, default=0)
 
-    rubro = relationship("RubroGasto", back_populates="cdps", lazy="selectin")
-    rps = relationship("RP", back_populates="cdp", lazy="selectin")
+    rubro = relationship("RubroGasto", back_populates="cdps", lazy="raise_on_sql")
+    rps = relationship("RP", back_populates="cdp", lazy="raise_on_sql")
 
-    __table_args__ = (Index("ix_cdp_tenant", "tenant_id"),)
+    __table_args__ = (
+        Index("ix_cdp_tenant", "tenant_id"),
+        Index("ix_cdp_tenant_periodo", "tenant_id", "periodo"),
+        Index("ix_cdp_tenant_rubro", "tenant_id", "codigo_rubro", "estado", "periodo", postgresql_include=["valor"]),
+    )
@@ -0,0 +1,39 @@
+from sqlalchemy import ForeignKey, Index, Integer, PrimaryKeyConstraint, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class CierreLote(Base):
+    """Cierre de mes de varios tenants lanzado por un administrador. Lo ejecuta
+    services.cierre_lote en segundo plano y se reanuda si el proceso se reinicia."""
+
+    __tablename__ = "cierres_lote"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    estado: Mapped[str] = mapped_column(String(20), default="PENDIENTE")  # PENDIENTE | EN_CURSO | COMPLETADO | CON_ERRORES
+    concurrencia: Mapped[int] = mapped_column(Integer, default=4)
+    solicitado_por: Mapped[str] = mapped_column(String(200), default="")
+    fecha_creacion: Mapped[str] = mapped_column(String(30))
+    inicio: Mapped[str | None] = mapped_column(String(30), default=None)
+    fin: Mapped[str | None] = mapped_column(String(30), default=None)
+
+
+class CierreLoteTenant(Base):
+    """Progreso de un tenant dentro de un cierre por lote: el mes que debe
+    cerrar (leído al crear el lote), su estado y los tiempos."""
+
+    __tablename__ = "cierres_lote_tenants"
+
+    lote_id: Mapped[int] = mapped_column(Integer, ForeignKey("cierres_lote.id"))
+    tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"))
+    mes: Mapped[int] = mapped_column(Integer)
+    estado: Mapped[str] = mapped_column(String(20), default="PENDIENTE")  # PENDIENTE | EN_CURSO | COMPLETADO | ERROR
+    inicio: Mapped[str | None] = mapped_column(String(30), default=None)
+    fin: Mapped[str | None] = mapped_column(String(30), default=None)
+    duracion_ms: Mapped[int | None] = mapped_column(Integer, default=None)
+    error: Mapped[str | None] = mapped_column(String(500), default=None)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("lote_id", "tenant_id"),
+        Index("ix_cierres_lote_tenants_estado", "lote_id", "estado"),
+    )
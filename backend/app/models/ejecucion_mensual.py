@@ -0,0 +1,23 @@
+from sqlalchemy import ForeignKey, Index, Integer, Float, PrimaryKeyConstraint, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class EjecucionMensual(Base):
+    """Acumulado por tenant, documento, rubro y mes (CDP, RP, obligación, pago,
+    recaudo y reconocimiento no anulados). Lo mantienen los servicios de escritura
+    y se puede reconstruir con services.ejecucion_mensual.reconstruir."""
+
+    __tablename__ = "ejecucion_mensual"
+
+    tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
+    documento: Mapped[str] = mapped_column(String(20))
+    codigo_rubro: Mapped[str] = mapped_column(String(50))
+    anio: Mapped[int] = mapped_column(Integer)
+    mes: Mapped[int] = mapped_column(Integer)
+    valor: Mapped[float] = mapped_column(Float, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("tenant_id", "documento", "codigo_rubro", "anio", "mes"),
+        Index("ix_ejecucion_mensual_tenant", "tenant_id"),
+    )
@@ -1,6 +1,7 @@
 from sqlalchemy import ForeignKey, Index, Integer, Float, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.periodo import periodo_column
 
 
 class ModificacionPresupuestal(Base):
@@ -9,15 +10,19 @@ class ModificacionPresupuestal(Base):
     tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     fecha: Mapped[str] = mapped_column(String(10))
+    periodo: Mapped[int | None] = periodo_column()
     tipo: Mapped[str] = mapped_column(String(30))
     numero_acto: Mapped[str] = mapped_column(String(100), default="")
     descripcion: Mapped[str] = mapped_column(Text, default="")
     valor: Mapped[float] = mapped_column(Float)
     estado: Mapped[str] = mapped_column(String(20), default="ACTIVO")
 
-    detalles = relationship("DetalleModificacion", back_populates="modificacion", lazy="selectin")
+    detalles = relationship("DetalleModificacion", back_populates="modificacion", lazy="raise_on_sql")
 
-    __table_args__ = (Index("ix_modificaciones_tenant", "tenant_id"),)
+    __table_args__ = (
+        Index("ix_modificaciones_tenant", "tenant_id"),
+        Index("ix_modificaciones_tenant_periodo", "tenant_id", "periodo"),
+    )
 
 
 class DetalleModificacion(Base):
@@ -31,6 +36,6 @@ class DetalleModificacion(Base):
     campo_afectado: Mapped[str] = mapped_column(String(30))
     valor: Mapped[float] = mapped_column(Float)
 
-    modificacion = relationship("ModificacionPresupuestal", back_populates="detalles")
+    modificacion = relationship("ModificacionPresupuestal", back_populates="detalles", lazy="raise_on_sql")
 
     __table_args__ = (Index("ix_detalle_modificacion_tenant", "tenant_id"),)
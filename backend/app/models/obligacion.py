@@ -1,6 +1,7 @@
 from sqlalchemy import ForeignKey, Index, Integer, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.periodo import periodo_column
 
 
 class Obligacion(Base):
@@ -9,6 +10,7 @@ class Obligacion(Base):
     tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
     numero: Mapped[int] = mapped_column(Integer, primary_key=True)
     fecha: Mapped[str] = mapped_column(String(10))
+    periodo: Mapped[int | None] = periodo_column()
     rp_numero: Mapped[int] = mapped_column(Integer, ForeignKey("rp.numero"))
     codigo_rubro: Mapped[str] = mapped_column(String(50), ForeignKey("rubros_gastos.codigo"))
     nit_tercero: Mapped[str] = mapped_column(String(20), ForeignKey("terceros.nit"))
@@ -18,8 +20,14 @@ class Obligacion(Base):
     fuente_sifse: Mapped[int] = mapped_column(Integer, default=0)
     item_sifse: Mapped[int] = mapped_column(Integer, default=0)
 
-    rp = relationship("RP", back_populates="obligaciones", lazy="selectin")
-    tercero = relationship("Tercero", lazy="selectin")
-    pagos = relationship("Pago", back_populates="obligacion", lazy="selectin")
+    rp = relationship("RP", back_populates="obligaciones", lazy="raise_on_sql")
+    tercero = relationship("Tercero", lazy="raise_on_sql")
+    pagos = relationship("Pago", back_populates="obligacion", lazy="raise_on_sql")
 
-    __table_args__ = (Index("ix_obligacion_tenant", "tenant_id"),)
+    __table_args__ = (
+        Index("ix_obligacion_tenant", "tenant_id"),
+        Index("ix_obligacion_tenant_periodo", "tenant_id", "periodo"),
+        Index("ix_obligacion_tenant_rubro", "tenant_id", "codigo_rubro", "estado", "periodo", postgresql_include=["valor"]),
+        Index("ix_obligacion_tenant_rp", "tenant_id", "rp_numero", "estado", postgresql_include=["valor"]),
+        Index("ix_obligacion_tenant_nit", "tenant_id", "nit_tercero", "periodo"),
+    )
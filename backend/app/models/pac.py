@@ -17,7 +17,7 @@ class PAC(Base):
         Index("ix_pac_tenant", "tenant_id"),
     )
 
-    rubro_gasto = relationship("RubroGasto", back_populates="pacs")
+    rubro_gasto = relationship("RubroGasto", back_populates="pacs", lazy="raise_on_sql")
 
 
 class ConsolidacionMensual(Base):
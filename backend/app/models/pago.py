@@ -1,6 +1,7 @@
 from sqlalchemy import ForeignKey, Index, Integer, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.periodo import periodo_column
 
 
 class Pago(Base):
@@ -9,6 +10,7 @@ class Pago(Base):
     tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
     numero: Mapped[int] = mapped_column(Integer, primary_key=True)
     fecha: Mapped[str] = mapped_column(String(10))
+    periodo: Mapped[int | None] = periodo_column()
     obligacion_numero: Mapped[int] = mapped_column(Integer, ForeignKey("obligacion.numero"))
     codigo_rubro: Mapped[str] = mapped_column(String(50), ForeignKey("rubros_gastos.codigo"))
     nit_tercero: Mapped[str] = mapped_column(String(20), ForeignKey("terceros.nit"))
@@ -21,8 +23,14 @@ class Pago(Base):
     item_sifse: Mapped[int] = mapped_column(Integer, default=0)
     cuenta_bancaria_id: Mapped[int] = mapped_column(Integer, ForeignKey("cuentas_bancarias.id"), default=0)
 
-    obligacion = relationship("Obligacion", back_populates="pagos", lazy="selectin")
-    tercero = relationship("Tercero", lazy="selectin")
-    cuenta_bancaria = relationship("CuentaBancaria", lazy="selectin")
+    obligacion = relationship("Obligacion", back_populates="pagos", lazy="raise_on_sql")
+    tercero = relationship("Tercero", lazy="raise_on_sql")
+    cuenta_bancaria = relationship("CuentaBancaria", lazy="raise_on_sql")
 
-    __table_args__ = (Index("ix_pago_tenant", "tenant_id"),)
+    __table_args__ = (
+        Index("ix_pago_tenant", "tenant_id"),
+        Index("ix_pago_tenant_periodo", "tenant_id", "periodo"),
+        Index("ix_pago_tenant_rubro", "tenant_id", "codigo_rubro", "estado", "periodo", postgresql_include=["valor"]),
+        Index("ix_pago_tenant_obligacion", "tenant_id", "obligacion_numero", "estado", postgresql_include=["valor"]),
+        Index("ix_pago_tenant_nit", "tenant_id", "nit_tercero", "periodo"),
+    )
@@ -0,0 +1,36 @@
+"""
+Columna `periodo` (AAAAMM) de los documentos presupuestales.
+
+`fecha` se guarda como texto 'YYYY-MM-DD'; filtrar por mes con
+substr(fecha, 6, 2) impide usar índices e ignora el año. `periodo` se
+calcula al insertar a partir de `fecha` (que no se modifica después) y los
+filtros por mes se expresan como rangos sobre ella.
+"""
+
+from sqlalchemy import Integer
+from sqlalchemy.orm import mapped_column
+
+
+def periodo_de_fecha(fecha: str | None) -> int | None:
+    """'2026-03-15' -> 202603. None si la fecha está vacía o no es válida."""
+    if not fecha or len(fecha) < 7:
+        return None
+    try:
+        return int(fecha[:4]) * 100 + int(fecha[5:7])
+    except ValueError:
+        return None
+
+
+def rango_periodo(anio: int, mes_desde: int, mes_hasta: int | None = None) -> tuple[int, int]:
+    """Límites (inclusive) de `periodo` para los meses mes_desde..mes_hasta de `anio`."""
+    if mes_hasta is None:
+        mes_hasta = mes_desde
+    return anio * 100 + mes_desde, anio * 100 + mes_hasta
+
+
+def _periodo_default(context) -> int | None:
+    return periodo_de_fecha(context.get_current_parameters().get("fecha"))
+
+
+def periodo_column():
+    return mapped_column(Integer, default=_periodo_default, nullable=True)
@@ -1,6 +1,7 @@
 from sqlalchemy import ForeignKey, Index, Integer, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.periodo import periodo_column
 
 
 class Recaudo(Base):
@@ -9,6 +10,7 @@ class Recaudo(Base):
     tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
     numero: Mapped[int] = mapped_column(Integer, primary_key=True)
     fecha: Mapped[str] = mapped_column(String(10))
+    periodo: Mapped[int | None] = periodo_column()
     codigo_rubro: Mapped[str] = mapped_column(String(50), ForeignKey("rubros_ingresos.codigo"))
     valor: Mapped[float] = mapped_column(Float)
     concepto: Mapped[str] = mapped_column(String(500), default="")
@@ -16,7 +18,11 @@ class Recaudo(Base):
     estado: Mapped[str] = mapped_column(String(20), default="ACTIVO")
     cuenta_bancaria_id: Mapped[int] = mapped_column(Integer, ForeignKey("cuentas_bancarias.id"), default=0)
 
-    rubro = relationship("RubroIngreso", back_populates="recaudos", lazy="selectin")
-    cuenta_bancaria = relationship("CuentaBancaria", lazy="selectin")
+    rubro = relationship("RubroIngreso", back_populates="recaudos", lazy="raise_on_sql")
+    cuenta_bancaria = relationship("CuentaBancaria", lazy="raise_on_sql")
 
-    __table_args__ = (Index("ix_recaudo_tenant", "tenant_id"),)
+    __table_args__ = (
+        Index("ix_recaudo_tenant", "tenant_id"),
+        Index("ix_recaudo_tenant_periodo", "tenant_id", "periodo"),
+        Index("ix_recaudo_tenant_rubro", "tenant_id", "codigo_rubro", "estado", "periodo", postgresql_include=["valor"]),
+    )
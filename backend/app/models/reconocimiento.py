@@ -1,6 +1,7 @@
 from sqlalchemy import ForeignKey, Index, Integer, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.periodo import periodo_column
 
 
 class Reconocimiento(Base):
@@ -9,6 +10,7 @@ class Reconocimiento(Base):
     tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
     numero: Mapped[int] = mapped_column(Integer, primary_key=True)
     fecha: Mapped[str] = mapped_column(String(10))
+    periodo: Mapped[int | None] = periodo_column()
     codigo_rubro: Mapped[str] = mapped_column(String(50), ForeignKey("rubros_ingresos.codigo"))
     tercero_nit: Mapped[str] = mapped_column(String(20), default="")
     valor: Mapped[float] = mapped_column(Float)
@@ -16,12 +18,16 @@ class Reconocimiento(Base):
     no_documento: Mapped[str] = mapped_column(String(50), default="")
     estado: Mapped[str] = mapped_column(String(20), default="ACTIVO")
 
-    rubro = relationship("RubroIngreso", lazy="selectin")
+    rubro = relationship("RubroIngreso", lazy="raise_on_sql")
     tercero = relationship(
         "Tercero",
         foreign_keys=[tercero_nit],
         primaryjoin="Reconocimiento.tercero_nit == Tercero.nit",
-        lazy="selectin",
+        lazy="raise_on_sql",
     )
 
-    __table_args__ = (Index("ix_reconocimiento_tenant", "tenant_id"),)
+    __table_args__ = (
+        Index("ix_reconocimiento_tenant", "tenant_id"),
+        Index("ix_reconocimiento_tenant_periodo", "tenant_id", "periodo"),
+        Index("ix_reconocimiento_tenant_rubro", "tenant_id", "codigo_rubro", "estado", "periodo", postgresql_include=["valor"]),
+    )
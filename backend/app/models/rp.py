@@ -1,6 +1,7 @@
 from sqlalchemy import ForeignKey, Index, Integer, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.periodo import periodo_column
 
 
 class RP(Base):
@@ -9,6 +10,7 @@ class RP(Base):
     tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
     numero: Mapped[int] = mapped_column(Integer, primary_key=True)
     fecha: Mapped[str] = mapped_column(String(10))
+    periodo: Mapped[int | None] = periodo_column()
     cdp_numero: Mapped[int] = mapped_column(Integer, ForeignKey("cdp.numero"))
     codigo_rubro: Mapped[str] = mapped_column(String(50), ForeignKey("rubros_gastos.codigo"))
     nit_tercero: Mapped[str] = mapped_column(String(20), ForeignKey("terceros.nit"))
@@ -18,8 +20,14 @@ class RP(Base):
     fuente_sifse: Mapped[int] = mapped_column(Integer, default=0)
     item_sifse: Mapped[int] = mapped_column(Integer, default=0)
 
-    cdp = relationship("CDP", back_populates="rps", lazy="selectin")
-    tercero = relationship("Tercero", lazy="selectin")
-    obligaciones = relationship("Obligacion", back_populates="rp", lazy="selectin")
+    cdp = relationship("CDP", back_populates="rps", lazy="raise_on_sql")
+    tercero = relationship("Tercero", lazy="raise_on_sql")
+    obligaciones = relationship("Obligacion", back_populates="rp", lazy="raise_on_sql")
 
-    __table_args__ = (Index("ix_rp_tenant", "tenant_id"),)
+    __table_args__ = (
+        Index("ix_rp_tenant", "tenant_id"),
+        Index("ix_rp_tenant_periodo", "tenant_id", "periodo"),
+        Index("ix_rp_tenant_rubro", "tenant_id", "codigo_rubro", "estado", "periodo", postgresql_include=["valor"]),
+        Index("ix_rp_tenant_cdp", "tenant_id", "cdp_numero", "estado", postgresql_include=["valor"]),
+        Index("ix_rp_tenant_nit", "tenant_id", "nit_tercero", "periodo"),
+    )
@@ -17,8 +17,8 @@ class RubroGasto(Base):
     contracreditos: Mapped[float] = mapped_column(Float, default=0)
     apropiacion_definitiva: Mapped[float] = mapped_column(Float, default=0)
 
-    cdps = relationship("CDP", back_populates="rubro", lazy="selectin")
-    pacs = relationship("PAC", back_populates="rubro_gasto", lazy="selectin")
+    cdps = relationship("CDP", back_populates="rubro", lazy="raise_on_sql")
+    pacs = relationship("PAC", back_populates="rubro_gasto", lazy="raise_on_sql")
 
     __table_args__ = (Index("ix_rubros_gastos_tenant", "tenant_id"),)
 
@@ -35,6 +35,6 @@ class RubroIngreso(Base):
     reducciones: Mapped[float] = mapped_column(Float, default=0)
     presupuesto_definitivo: Mapped[float] = mapped_column(Float, default=0)
 
-    recaudos = relationship("Recaudo", back_populates="rubro", lazy="selectin")
+    recaudos = relationship("Recaudo", back_populates="rubro", lazy="raise_on_sql")
 
     __table_args__ = (Index("ix_rubros_ingresos_tenant", "tenant_id"),)
@@ -20,7 +20,7 @@ class Tenant(Base):
     estado: Mapped[str] = mapped_column(String(20), default="ACTIVO")  # ACTIVO | SUSPENDIDO
     fecha_creacion: Mapped[str] = mapped_column(String(20))
 
-    usuarios = relationship("User", back_populates="tenant", lazy="select")
+    usuarios = relationship("User", back_populates="tenant", lazy="raise_on_sql")
 
 
 class User(Base):
@@ -39,6 +39,6 @@ class User(Base):
     activo: Mapped[bool] = mapped_column(Boolean, default=True)
     fecha_creacion: Mapped[str] = mapped_column(String(20))
 
-    tenant: Mapped[Tenant] = relationship("Tenant", back_populates="usuarios", lazy="selectin")
+    tenant: Mapped[Tenant] = relationship("Tenant", back_populates="usuarios", lazy="raise_on_sql")
 
     __table_args__ = (Index("ix_users_tenant", "tenant_id"),)
@@ -0,0 +1,41 @@
+import uuid
+from sqlalchemy import ForeignKey, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class Trabajo(Base):
+    """Trabajo en segundo plano de un tenant (informes pesados, importaciones,
+    copias de seguridad, consolidación). Lo ejecuta services.trabajos; el
+    estado vive en la base para sobrevivir a reinicios.
+
+    `entrada` (archivo subido) y `artefacto` (archivo generado) no se cargan
+    con la fila: se leen con una consulta explícita de la columna.
+    """
+
+    __tablename__ = "trabajos"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False)
+    tipo: Mapped[str] = mapped_column(String(40))
+    parametros: Mapped[str] = mapped_column(Text, default="{}")  # JSON
+    estado: Mapped[str] = mapped_column(String(20), default="PENDIENTE")  # PENDIENTE | EN_CURSO | COMPLETADO | ERROR | CANCELADO
+    solicitado_por: Mapped[str] = mapped_column(String(200), default="")
+    fecha_creacion: Mapped[str] = mapped_column(String(30))
+    inicio: Mapped[str | None] = mapped_column(String(30), default=None)
+    fin: Mapped[str | None] = mapped_column(String(30), default=None)
+    propietario: Mapped[str | None] = mapped_column(String(36), default=None)  # proceso que lo ejecuta
+    latido: Mapped[str | None] = mapped_column(String(30), default=None)  # lo renueva el propietario
+    duracion_ms: Mapped[int | None] = mapped_column(Integer, default=None)
+    error: Mapped[str | None] = mapped_column(Text, default=None)
+    resultado: Mapped[str | None] = mapped_column(Text, default=None)  # JSON
+    artefacto_nombre: Mapped[str | None] = mapped_column(String(200), default=None)
+    artefacto_tipo: Mapped[str | None] = mapped_column(String(100), default=None)
+    artefacto_tamano: Mapped[int | None] = mapped_column(Integer, default=None)
+    entrada: Mapped[bytes | None] = mapped_column(LargeBinary, default=None, deferred=True, deferred_raiseload=True)
+    artefacto: Mapped[bytes | None] = mapped_column(LargeBinary, default=None, deferred=True, deferred_raiseload=True)
+
+    __table_args__ = (
+        Index("ix_trabajos_tenant", "tenant_id", "fecha_creacion"),
+        Index("ix_trabajos_estado", "estado"),
+    )
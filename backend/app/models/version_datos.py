@@ -0,0 +1,14 @@
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class VersionDatos(Base):
+    """Contador por tenant que aumenta con cada transacción que modifica sus
+    datos. Lo mantiene services.version_datos y lo usan los cachés de informes
+    para saber si un resultado guardado sigue vigente."""
+
+    __tablename__ = "version_datos"
+
+    tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
@@ -7,12 +7,15 @@ from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import principales
 from app.auth.dependencies import require_admin
 from app.database import get_db
 from app.models.tenant import Tenant, User
 from app.schemas.auth import TenantCreate, TenantInfo, UserCreate, UserResponse, UserUpdate
+from app.services import cache_informes
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -66,7 +69,7 @@ async def listar_usuarios(
     db: AsyncSession = Depends(get_db),
 ):
     """Lista todos los usuarios de la misma institución."""
-    stmt = select(User).where(User.tenant_id == admin.tenant_id).order_by(User.nombre)
+    stmt = select(User).options(joinedload(User.tenant)).where(User.tenant_id == admin.tenant_id).order_by(User.nombre)
     result = await db.execute(stmt)
     return list(result.scalars().all())
 
@@ -98,7 +101,7 @@ async def crear_usuario(
     )
     db.add(user)
     await db.commit()
-    await db.refresh(user)
+    await db.refresh(user, ["tenant"])
     return user
 
 
@@ -127,7 +130,8 @@ async def editar_usuario(
         user.activo = data.activo
 
     await db.commit()
-    await db.refresh(user)
+    principales.invalidar_usuario(user.id)
+    await db.refresh(user, ["tenant"])
     return user
 
 
@@ -148,3 +152,12 @@ async def eliminar_usuario(
 
     user.activo = False
     await db.commit()
+    principales.invalidar_usuario(user.id)
+
+
+# ─── Caché de informes ────────────────────────────────────────────────────────
+
+@router.get("/cache-informes")
+async def metricas_cache_informes(admin=Depends(require_admin)):
+    """Aciertos y fallos del caché de informes por informe (del proceso que responde)."""
+    return cache_informes.metricas()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_db_escritura
 from app.services import cdp as svc
+from app.services import registro_masivo as masivo
 from app.schemas.cdp import CDPCreate, CDPUpdate, CDPResponse
+from app.schemas.registro_masivo import ResultadoLote
 from app.auth.dependencies import get_current_user, require_escritura, require_admin
 from app.models.tenant import User
 
@@ -11,7 +13,8 @@ router = APIRouter(prefix="/api/cdp", tags=["CDP"])
 
 @router.get("", response_model=list[CDPResponse])
 async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    cdps = await svc.get_cdps(db, user.tenant_id, estado=estado)
+    cdps = await svc.get_cdps(db, user.tenant_id, estado=estado, perfil="lista")
+    saldos = await svc.saldos_cdps(db, user.tenant_id, cdps)
     result = []
     for c in cdps:
         data = CDPResponse(
@@ -19,7 +22,7 @@ async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db),
             cuenta=c.rubro.cuenta if c.rubro else None,
             objeto=c.objeto, valor=c.valor, estado=c.estado,
             fuente_sifse=c.fuente_sifse, item_sifse=c.item_sifse,
-            saldo=await svc.saldo_cdp(db, user.tenant_id, c.numero),
+            saldo=saldos[c.numero],
         )
         result.append(data)
     return result
@@ -27,7 +30,7 @@ async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db),
 
 @router.get("/{numero}", response_model=CDPResponse)
 async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    c = await svc.get_cdp(db, user.tenant_id, numero)
+    c = await svc.get_cdp(db, user.tenant_id, numero, perfil="detalle")
     if not c:
         raise HTTPException(404, "CDP no encontrado")
     return CDPResponse(
@@ -40,9 +43,10 @@ async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User =
 
 
 @router.post("", response_model=CDPResponse, status_code=201)
-async def registrar(data: CDPCreate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def registrar(data: CDPCreate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         cdp = await svc.registrar(db, user.tenant_id, data.codigo_rubro, data.objeto, data.valor, data.fuente_sifse, data.item_sifse)
+        await db.commit()
         return CDPResponse(
             numero=cdp.numero, fecha=cdp.fecha, codigo_rubro=cdp.codigo_rubro,
             objeto=cdp.objeto, valor=cdp.valor, estado=cdp.estado,
@@ -53,10 +57,29 @@ async def registrar(data: CDPCreate, db: AsyncSession = Depends(get_db), user: U
         raise HTTPException(400, str(e))
 
 
+@router.post("/lote", response_model=ResultadoLote)
+async def registrar_lote(
+    data: list[CDPCreate],
+    atomico: bool = Query(False, description="Si algún elemento falla, no registra ninguno"),
+    db: AsyncSession = Depends(get_db_escritura),
+    user: User = Depends(require_escritura),
+):
+    """Registra varios CDP en una sola transacción, con el resultado de cada elemento."""
+    try:
+        resultado = await masivo.registrar_cdps(db, user.tenant_id, data, atomico)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if atomico and resultado["errores"]:
+        raise HTTPException(400, resultado)
+    await db.commit()
+    return resultado
+
+
 @router.put("/{numero}", response_model=CDPResponse)
-async def editar(numero: int, data: CDPUpdate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def editar(numero: int, data: CDPUpdate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         cdp = await svc.editar(db, user.tenant_id, numero, data.valor, data.objeto, data.fuente_sifse, data.item_sifse)
+        await db.commit()
         return CDPResponse(
             numero=cdp.numero, fecha=cdp.fecha, codigo_rubro=cdp.codigo_rubro,
             objeto=cdp.objeto, valor=cdp.valor, estado=cdp.estado,
@@ -68,9 +91,10 @@ async def editar(numero: int, data: CDPUpdate, db: AsyncSession = Depends(get_db
 
 
 @router.put("/{numero}/anular")
-async def anular(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def anular(numero: int, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         await svc.anular(db, user.tenant_id, numero)
+        await db.commit()
         return {"message": f"CDP {numero} anulado"}
     except ValueError as e:
         raise HTTPException(400, str(e))
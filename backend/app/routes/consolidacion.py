@@ -1,26 +1,83 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_db_escritura
 from app.services import consolidacion as svc
-from app.auth.dependencies import get_current_user, require_escritura, require_admin
+from app.services import cierre_lote
+from app.schemas.consolidacion import CierreLoteCreate
+from app.auth.dependencies import get_current_user, require_escritura, require_admin, es_operador
 from app.models.tenant import User
 
 router = APIRouter(prefix="/api/consolidacion", tags=["Consolidacion"])
 
 
+@router.get("/simulacion")
+async def simulacion(db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+    """Cambios que haría la consolidación del mes actual, sin guardarlos."""
+    return await svc.simular_consolidacion(db, user.tenant_id)
+
+
 @router.post("/consolidar-mes")
-async def consolidar_mes(db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+async def consolidar_mes(dry_run: bool = False, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_admin)):
+    if dry_run:
+        simulacion = await svc.simular_consolidacion(db, user.tenant_id)
+        return {"mes": simulacion["mes"], "dry_run": True, "cambios": simulacion["gastos"]}
     mes, count = await svc.consolidar_mes(db, user.tenant_id)
     return {"mes": mes, "rubros_consolidados": count}
 
 
 @router.post("/consolidar-ingresos")
-async def consolidar_ingresos(db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+async def consolidar_ingresos(dry_run: bool = False, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_admin)):
+    if dry_run:
+        simulacion = await svc.simular_consolidacion(db, user.tenant_id)
+        return {"mes": simulacion["mes"], "dry_run": True, "cambios": simulacion["ingresos"]}
     mes, count = await svc.consolidar_mes_ingresos(db, user.tenant_id)
     return {"mes": mes, "rubros_consolidados": count}
 
 
 @router.post("/cierre-mes")
-async def cierre_mes(db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+async def cierre_mes(dry_run: bool = False, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_admin)):
+    if dry_run:
+        return {**await svc.simular_consolidacion(db, user.tenant_id), "dry_run": True}
     mes = await svc.cierre_mes(db, user.tenant_id)
     return {"mes_cerrado": mes}
+
+
+# ─── Cierre por lote (varios tenants) ─────────────────────────────────────────
+
+def _alcance(user: User) -> str | None:
+    """Tenant al que se limitan los lotes visibles (None = todos, para operadores)."""
+    return None if es_operador(user) else user.tenant_id
+
+
+@router.post("/cierre-lote", status_code=202)
+async def crear_cierre_lote(data: CierreLoteCreate, db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+    """Cierra el mes de varios tenants en segundo plano (todos los activos si
+    no se indican). El progreso se consulta en /cierre-lote/{id}.
+
+    Un operador de la plataforma elige los tenants; un ADMIN de institución
+    solo puede cerrar el suyo.
+    """
+    tenant_ids = data.tenant_ids
+    if not es_operador(user):
+        if tenant_ids is not None and set(tenant_ids) != {user.tenant_id}:
+            raise HTTPException(403, "Solo un operador de la plataforma puede cerrar el mes de otros tenants.")
+        tenant_ids = [user.tenant_id]
+    try:
+        lote = await cierre_lote.crear_lote(db, tenant_ids, user.email, data.concurrencia)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    cierre_lote.iniciar(lote.id)
+    return await cierre_lote.estado_lote(db, lote.id, _alcance(user))
+
+
+@router.get("/cierre-lote")
+async def listar_cierres_lote(db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+    return await cierre_lote.listar_lotes(db, tenant_id=_alcance(user))
+
+
+@router.get("/cierre-lote/{lote_id}")
+async def estado_cierre_lote(lote_id: int, db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+    try:
+        return await cierre_lote.estado_lote(db, lote_id, _alcance(user))
+    except ValueError as e:
+        raise HTTPException(404, str(e))
@@ -10,6 +10,8 @@ from app.auth.dependencies import get_current_user
 from app.config import get_settings
 from app.database import get_db
 from app.services import ia as ia_svc
+from app.services import cache_informes
+from app.services import informes as informes_svc
 
 router = APIRouter(prefix="/api/ia", tags=["IA"])
 
@@ -25,6 +27,14 @@ def _verificar_api_key():
         )
 
 
+async def _resumen(db: AsyncSession, tenant_id: str) -> dict:
+    """Resumen del tablero compartido (y cacheado) con /api/dashboard/resumen."""
+    return await cache_informes.obtener(
+        db, tenant_id, "resumen", None,
+        lambda: informes_svc.get_resumen(db, tenant_id),
+    )
+
+
 # ─── Schemas ─────────────────────────────────────────────────────────────────
 
 class MensajeHistorial(BaseModel):
@@ -53,6 +63,7 @@ async def chat(
             tenant_id=str(user.tenant_id),
             mensaje=req.mensaje,
             historial=[m.model_dump() for m in req.historial],
+            resumen=await _resumen(db, str(user.tenant_id)),
         )
         return {"respuesta": respuesta}
     except ValueError as e:
@@ -68,7 +79,10 @@ async def alertas(
 ):
     """Detecta y retorna alertas presupuestales automáticas."""
     try:
-        resultado = await ia_svc.generar_alertas(db=db, tenant_id=str(user.tenant_id))
+        resultado = await ia_svc.generar_alertas(
+            db=db, tenant_id=str(user.tenant_id),
+            resumen=await _resumen(db, str(user.tenant_id)),
+        )
         return resultado
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al generar alertas: {str(e)}")
@@ -82,7 +96,10 @@ async def resumen(
     """Genera un resumen ejecutivo narrativo con Gemini."""
     _verificar_api_key()
     try:
-        texto = await ia_svc.resumen_ejecutivo(db=db, tenant_id=str(user.tenant_id))
+        texto = await ia_svc.resumen_ejecutivo(
+            db=db, tenant_id=str(user.tenant_id),
+            resumen=await _resumen(db, str(user.tenant_id)),
+        )
         return {"texto": texto}
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
@@ -224,10 +224,8 @@ async def sincronizar_padres(
 ):
     """Recalcula los totales de los rubros agrupadores sumando sus hojas hijas."""
     from app.services import rubros_gastos, rubros_ingresos
-    await rubros_gastos._recalcular_hojas(db, user.tenant_id)
-    await rubros_ingresos._recalcular_hojas(db, user.tenant_id)
-    await rubros_gastos.sincronizar_padres(db, user.tenant_id)
-    await rubros_ingresos.sincronizar_padres(db, user.tenant_id)
+    await rubros_gastos.recalcular_catalogo(db, user.tenant_id)
+    await rubros_ingresos.recalcular_catalogo(db, user.tenant_id)
     return {"ok": True, "mensaje": "Rubros agrupadores sincronizados correctamente"}
 
 
@@ -1,9 +1,15 @@
+import csv
+import io
+import json
+from datetime import date
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.services import informes as svc
 from app.services import config as config_svc
+from app.services import cache_informes, paquete_sia
 from app.auth.dependencies import get_current_user
 from app.models.tenant import User
 
@@ -12,25 +18,66 @@ router = APIRouter(prefix="/api/informes", tags=["Informes"])
 
 @router.get("/ejecucion-gastos")
 async def ejecucion_gastos(mes: int | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    return await svc.informe_ejecucion_gastos(db, user.tenant_id, mes_consulta=mes)
+    return await cache_informes.obtener(
+        db, user.tenant_id, "ejecucion-gastos", {"mes": mes},
+        lambda: svc.informe_ejecucion_gastos(db, user.tenant_id, mes_consulta=mes),
+    )
 
 
 @router.get("/ejecucion-ingresos")
 async def ejecucion_ingresos(mes: int | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    return await svc.informe_ejecucion_ingresos(db, user.tenant_id, mes_consulta=mes)
+    return await cache_informes.obtener(
+        db, user.tenant_id, "ejecucion-ingresos", {"mes": mes},
+        lambda: svc.informe_ejecucion_ingresos(db, user.tenant_id, mes_consulta=mes),
+    )
 
 
 @router.get("/tarjeta/{codigo_rubro}")
-async def tarjeta(codigo_rubro: str, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+async def tarjeta(
+    codigo_rubro: str,
+    desde: date | None = None,
+    hasta: date | None = None,
+    pagina: int | None = Query(None, ge=1),
+    tamano: int = Query(200, ge=1, le=2000),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Tarjeta del rubro; `desde`/`hasta` y `pagina` limitan los movimientos
+    retornados (los saldos acumulados siempre cuentan todo lo anterior)."""
     try:
-        return await svc.generar_tarjeta(db, user.tenant_id, codigo_rubro)
+        return await svc.generar_tarjeta(
+            db, user.tenant_id, codigo_rubro,
+            desde=desde.isoformat() if desde else None,
+            hasta=hasta.isoformat() if hasta else None,
+            pagina=pagina, tamano=tamano,
+        )
     except ValueError as e:
         raise HTTPException(404, str(e))
 
 
 @router.get("/cadena-presupuestal")
-async def cadena(db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    return await svc.informe_cadena_presupuestal(db, user.tenant_id)
+async def cadena(
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Cadena CDP → RP → Obligación → Pago.
+
+    Con `stream=true` responde NDJSON (un CDP con su cadena por línea) para
+    que el cliente pueda renderizar mientras llegan los datos.
+    """
+    if not stream:
+        return await svc.informe_cadena_presupuestal(db, user.tenant_id)
+
+    tenant_id = user.tenant_id
+
+    async def _ndjson():
+        # Sesión propia: la de get_db se cierra antes de terminar el streaming
+        async with AsyncSessionLocal() as db_stream:
+            async for item in svc.iter_cadena_presupuestal(db_stream, tenant_id):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
 
 
 @router.get("/resumen-rubro/{codigo_rubro}")
@@ -41,9 +88,31 @@ async def resumen_rubro(codigo_rubro: str, mes_inicio: int = 1, mes_fin: int = 1
         raise HTTPException(404, str(e))
 
 
+@router.get("/resumen-rubros")
+async def resumen_rubros(
+    codigos: list[str] | None = Query(None, description="Códigos a consultar; sin valor o 'all' = todo el catálogo"),
+    mes_inicio: int = 1,
+    mes_fin: int = 12,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Resumen de varios rubros en una petición, para precargar el árbol completo."""
+    if not codigos or "all" in codigos:
+        codigos = None
+    return await cache_informes.obtener(
+        db, user.tenant_id, "resumen-rubros",
+        {"codigos": codigos, "mes_inicio": mes_inicio, "mes_fin": mes_fin},
+        lambda: svc.resumen_rubros(db, user.tenant_id, codigos, mes_inicio, mes_fin),
+    )
+
+
 @router.get("/equilibrio")
 async def equilibrio(db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    return await svc.verificar_equilibrio(db, user.tenant_id)
+    resumen = await cache_informes.obtener(
+        db, user.tenant_id, "resumen", None,
+        lambda: svc.get_resumen(db, user.tenant_id),
+    )
+    return await svc.verificar_equilibrio(db, user.tenant_id, resumen)
 
 
 # ── SIA Contraloría ──────────────────────────────────────────────────────────
@@ -66,6 +135,15 @@ async def sia_ingresos(
     return await svc.informe_ejecucion_ingresos(db, user.tenant_id, mes_consulta=mes)
 
 
+def _iter_archivo(archivo, tamano: int = 64 * 1024):
+    """Lee un archivo temporal por bloques y lo cierra al terminar."""
+    try:
+        while bloque := archivo.read(tamano):
+            yield bloque
+    finally:
+        archivo.close()
+
+
 @router.get("/sia/excel")
 async def sia_excel(
     mes: int | None = None,
@@ -74,7 +152,7 @@ async def sia_excel(
 ):
     nombre = await config_svc.get_config(db, user.tenant_id, "nombre_institucion") or "INSTITUCIÓN"
     vigencia_str = await config_svc.get_config(db, user.tenant_id, "vigencia") or "2026"
-    data = await svc.generar_sia_excel(
+    archivo = await svc.generar_sia_excel_stream(
         db, user.tenant_id,
         mes_consulta=mes,
         nombre_institucion=nombre,
@@ -82,7 +160,7 @@ async def sia_excel(
     )
     mes_str = f"_mes{mes}" if mes else ""
     return StreamingResponse(
-        iter([data]),
+        _iter_archivo(archivo),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename=SIA_Contraloria{mes_str}.xlsx"},
     )
@@ -173,8 +251,17 @@ async def sia_csv_f13a(
 
 
 @router.get("/cuentas-por-pagar")
-async def cuentas_por_pagar(db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    return await svc.cuentas_por_pagar(db, user.tenant_id)
+async def cuentas_por_pagar(
+    pagina: int | None = Query(None, ge=1),
+    tamano: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Sin `pagina` retorna la lista completa; con `pagina` retorna
+    {items, pagina, tamano, total, saldo_total, antiguedad}."""
+    if pagina is None:
+        return await svc.cuentas_por_pagar(db, user.tenant_id)
+    return await svc.cuentas_por_pagar_paginado(db, user.tenant_id, pagina, tamano)
 
 
 @router.get("/pac-vs-ejecutado")
@@ -200,16 +287,66 @@ async def informe_tercero(
         raise HTTPException(404, str(e))
 
 
+@router.get("/terceros")
+async def informe_terceros(
+    mes_inicio: int = 1,
+    mes_fin: int = 12,
+    formato: str = Query("json", pattern="^(json|ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Todos los terceros con documentos en el período.
+
+    - `json`: totales y cantidades de RP, obligaciones y pagos por tercero.
+    - `ndjson`: el informe de tercero completo, un tercero por línea.
+    - `csv`: una fila por documento (RP, obligación o pago) de cada tercero.
+    """
+    tenant_id = user.tenant_id
+    if formato == "json":
+        return await cache_informes.obtener(
+            db, tenant_id, "terceros", {"mes_inicio": mes_inicio, "mes_fin": mes_fin},
+            lambda: svc.totales_por_tercero(db, tenant_id, mes_inicio, mes_fin),
+        )
+
+    async def _ndjson():
+        # Sesión propia: la de get_db se cierra antes de terminar el streaming
+        async with AsyncSessionLocal() as db_stream:
+            async for item in svc.iter_informe_terceros(db_stream, tenant_id, mes_inicio, mes_fin):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    async def _csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(svc.ENCABEZADOS_TERCEROS_CSV)
+        yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+        async with AsyncSessionLocal() as db_stream:
+            async for item in svc.iter_informe_terceros(db_stream, tenant_id, mes_inicio, mes_fin):
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(svc.filas_csv_tercero(item))
+                yield buffer.getvalue().encode("utf-8")
+
+    if formato == "ndjson":
+        return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+    return StreamingResponse(
+        _csv(),
+        media_type="text/csv; charset=utf-8-sig",
+        headers={"Content-Disposition": f'attachment; filename="terceros_{mes_inicio}_{mes_fin}.csv"'},
+    )
+
+
 @router.get("/sia/csv/todos")
 async def sia_csv_todos(
     mes: int | None = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    data, anio, _ = await svc.generar_sia_zip(db, user.tenant_id, mes_consulta=mes)
+    # Los datos se cargan aquí; el ZIP se genera y envía por partes después
+    # de cerrar la sesión, a medida que termina cada formato.
+    partes, anio, _ = await paquete_sia.preparar_zip(db, user.tenant_id, mes_consulta=mes)
     mes_str = f"_mes{mes}" if mes else ""
     return StreamingResponse(
-        iter([data]),
+        partes,
         media_type="application/zip",
         headers={"Content-Disposition": f'attachment; filename="SIA_Contraloria_{anio}{mes_str}.zip"'},
     )
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_db_escritura
 from app.services import obligacion as svc
+from app.services import registro_masivo as masivo
+from app.services import perfiles_carga
 from app.schemas.obligacion import ObligacionCreate, ObligacionUpdate, ObligacionResponse
+from app.schemas.registro_masivo import ResultadoLote
 from app.auth.dependencies import get_current_user, require_escritura, require_admin
 from app.models.tenant import User
 
@@ -24,17 +27,14 @@ def _build_response(o, saldo=None) -> ObligacionResponse:
 
 @router.get("", response_model=list[ObligacionResponse])
 async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    obligaciones = await svc.get_obligaciones(db, user.tenant_id, estado=estado)
-    result = []
-    for o in obligaciones:
-        saldo = await svc.saldo_obligacion(db, user.tenant_id, o.numero)
-        result.append(_build_response(o, saldo))
-    return result
+    obligaciones = await svc.get_obligaciones(db, user.tenant_id, estado=estado, perfil="lista")
+    saldos = await svc.saldos_obligaciones(db, user.tenant_id, obligaciones)
+    return [_build_response(o, saldos[o.numero]) for o in obligaciones]
 
 
 @router.get("/{numero}", response_model=ObligacionResponse)
 async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    o = await svc.get_obligacion(db, user.tenant_id, numero)
+    o = await svc.get_obligacion(db, user.tenant_id, numero, perfil="detalle")
     if not o:
         raise HTTPException(404, "Obligacion no encontrada")
     saldo = await svc.saldo_obligacion(db, user.tenant_id, numero)
@@ -42,18 +42,40 @@ async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User =
 
 
 @router.post("", response_model=ObligacionResponse, status_code=201)
-async def registrar(data: ObligacionCreate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def registrar(data: ObligacionCreate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         o = await svc.registrar(db, user.tenant_id, data.rp_numero, data.valor, data.factura)
+        await db.commit()
+        o = await perfiles_carga.cargar(db, o)
         return _build_response(o, o.valor)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 
+@router.post("/lote", response_model=ResultadoLote)
+async def registrar_lote(
+    data: list[ObligacionCreate],
+    atomico: bool = Query(False, description="Si algún elemento falla, no registra ninguno"),
+    db: AsyncSession = Depends(get_db_escritura),
+    user: User = Depends(require_escritura),
+):
+    """Registra varias obligaciones en una sola transacción, con el resultado de cada elemento."""
+    try:
+        resultado = await masivo.registrar_obligaciones(db, user.tenant_id, data, atomico)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if atomico and resultado["errores"]:
+        raise HTTPException(400, resultado)
+    await db.commit()
+    return resultado
+
+
 @router.put("/{numero}", response_model=ObligacionResponse)
-async def editar(numero: int, data: ObligacionUpdate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def editar(numero: int, data: ObligacionUpdate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         o = await svc.editar(db, user.tenant_id, numero, data.valor, data.factura, data.fuente_sifse, data.item_sifse)
+        await db.commit()
+        o = await perfiles_carga.cargar(db, o)
         saldo = await svc.saldo_obligacion(db, user.tenant_id, numero)
         return _build_response(o, saldo)
     except ValueError as e:
@@ -61,9 +83,10 @@ async def editar(numero: int, data: ObligacionUpdate, db: AsyncSession = Depends
 
 
 @router.put("/{numero}/anular")
-async def anular(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def anular(numero: int, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         await svc.anular(db, user.tenant_id, numero)
+        await db.commit()
         return {"message": f"Obligacion {numero} anulada"}
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_db_escritura
 from app.services import pago as svc
+from app.services import registro_masivo as masivo
+from app.services import perfiles_carga
 from app.schemas.pago import PagoCreate, PagoUpdate, PagoResponse
+from app.schemas.registro_masivo import ResultadoLote
 from app.auth.dependencies import get_current_user, require_escritura, require_admin
 from app.models.tenant import User
 
@@ -31,32 +34,52 @@ def _build_response(p) -> PagoResponse:
 
 @router.get("", response_model=list[PagoResponse])
 async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    pagos = await svc.get_pagos(db, user.tenant_id, estado=estado)
+    pagos = await svc.get_pagos(db, user.tenant_id, estado=estado, perfil="lista")
     return [_build_response(p) for p in pagos]
 
 
 @router.get("/{numero}", response_model=PagoResponse)
 async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    p = await svc.get_pago(db, user.tenant_id, numero)
+    p = await svc.get_pago(db, user.tenant_id, numero, perfil="detalle")
     if not p:
         raise HTTPException(404, "Pago no encontrado")
     return _build_response(p)
 
 
 @router.post("", response_model=PagoResponse, status_code=201)
-async def registrar(data: PagoCreate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def registrar(data: PagoCreate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         p = await svc.registrar(
             db, user.tenant_id, data.obligacion_numero, data.valor, data.concepto,
             data.medio_pago, data.no_comprobante, data.cuenta_bancaria_id,
         )
+        await db.commit()
+        p = await perfiles_carga.cargar(db, p)
         return _build_response(p)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 
+@router.post("/lote", response_model=ResultadoLote)
+async def registrar_lote(
+    data: list[PagoCreate],
+    atomico: bool = Query(False, description="Si algún elemento falla, no registra ninguno"),
+    db: AsyncSession = Depends(get_db_escritura),
+    user: User = Depends(require_escritura),
+):
+    """Registra varios pagos en una sola transacción, con el resultado de cada elemento."""
+    try:
+        resultado = await masivo.registrar_pagos(db, user.tenant_id, data, atomico)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if atomico and resultado["errores"]:
+        raise HTTPException(400, resultado)
+    await db.commit()
+    return resultado
+
+
 @router.put("/{numero}", response_model=PagoResponse)
-async def editar(numero: int, data: PagoUpdate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def editar(numero: int, data: PagoUpdate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         p = await svc.editar(
             db, user.tenant_id, numero,
@@ -68,15 +91,18 @@ async def editar(numero: int, data: PagoUpdate, db: AsyncSession = Depends(get_d
             fuente_sifse=data.fuente_sifse,
             item_sifse=data.item_sifse,
         )
+        await db.commit()
+        p = await perfiles_carga.cargar(db, p)
         return _build_response(p)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 
 @router.put("/{numero}/anular")
-async def anular(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def anular(numero: int, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         await svc.anular(db, user.tenant_id, numero)
+        await db.commit()
         return {"message": f"Pago {numero} anulado"}
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_db_escritura
 from app.services import reconocimiento as svc
+from app.services import perfiles_carga
 from app.schemas.reconocimiento import (
     ReconocimientoCreate,
     ReconocimientoUpdate,
@@ -31,42 +32,42 @@ def _to_response(r) -> ReconocimientoResponse:
 
 @router.get("", response_model=list[ReconocimientoResponse])
 async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    items = await svc.get_reconocimientos(db, user.tenant_id, estado=estado)
+    items = await svc.get_reconocimientos(db, user.tenant_id, estado=estado, perfil="lista")
     return [_to_response(r) for r in items]
 
 
 @router.get("/{numero}", response_model=ReconocimientoResponse)
 async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    r = await svc.get_reconocimiento(db, user.tenant_id, numero)
+    r = await svc.get_reconocimiento(db, user.tenant_id, numero, perfil="detalle")
     if not r:
         raise HTTPException(404, "Reconocimiento no encontrado")
     return _to_response(r)
 
 
 @router.post("", response_model=ReconocimientoResponse, status_code=201)
-async def registrar(data: ReconocimientoCreate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def registrar(data: ReconocimientoCreate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         r = await svc.registrar(db, user.tenant_id, data)
         await db.commit()
-        await db.refresh(r)
+        r = await perfiles_carga.cargar(db, r)
         return _to_response(r)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 
 @router.put("/{numero}", response_model=ReconocimientoResponse)
-async def editar(numero: int, data: ReconocimientoUpdate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def editar(numero: int, data: ReconocimientoUpdate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         r = await svc.editar(db, user.tenant_id, numero, data)
         await db.commit()
-        await db.refresh(r)
+        r = await perfiles_carga.cargar(db, r)
         return _to_response(r)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 
 @router.put("/{numero}/anular", status_code=200)
-async def anular(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def anular(numero: int, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         await svc.anular(db, user.tenant_id, numero)
         await db.commit()
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_db_escritura
 from app.services import rp as svc
+from app.services import registro_masivo as masivo
+from app.services import perfiles_carga
 from app.schemas.rp import RPCreate, RPUpdate, RPResponse
+from app.schemas.registro_masivo import ResultadoLote
 from app.auth.dependencies import get_current_user, require_escritura, require_admin
 from app.models.tenant import User
 
@@ -24,17 +27,14 @@ def _build_response(r, saldo=None) -> RPResponse:
 
 @router.get("", response_model=list[RPResponse])
 async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    rps = await svc.get_rps(db, user.tenant_id, estado=estado)
-    result = []
-    for r in rps:
-        saldo = await svc.saldo_rp(db, user.tenant_id, r.numero)
-        result.append(_build_response(r, saldo))
-    return result
+    rps = await svc.get_rps(db, user.tenant_id, estado=estado, perfil="lista")
+    saldos = await svc.saldos_rps(db, user.tenant_id, rps)
+    return [_build_response(r, saldos[r.numero]) for r in rps]
 
 
 @router.get("/{numero}", response_model=RPResponse)
 async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    r = await svc.get_rp(db, user.tenant_id, numero)
+    r = await svc.get_rp(db, user.tenant_id, numero, perfil="detalle")
     if not r:
         raise HTTPException(404, "RP no encontrado")
     saldo = await svc.saldo_rp(db, user.tenant_id, numero)
@@ -42,18 +42,40 @@ async def obtener(numero: int, db: AsyncSession = Depends(get_db), user: User =
 
 
 @router.post("", response_model=RPResponse, status_code=201)
-async def registrar(data: RPCreate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def registrar(data: RPCreate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         r = await svc.registrar(db, user.tenant_id, data.cdp_numero, data.nit_tercero, data.valor, data.objeto)
+        await db.commit()
+        r = await perfiles_carga.cargar(db, r)
         return _build_response(r, r.valor)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
 
+@router.post("/lote", response_model=ResultadoLote)
+async def registrar_lote(
+    data: list[RPCreate],
+    atomico: bool = Query(False, description="Si algún elemento falla, no registra ninguno"),
+    db: AsyncSession = Depends(get_db_escritura),
+    user: User = Depends(require_escritura),
+):
+    """Registra varios RP en una sola transacción, con el resultado de cada elemento."""
+    try:
+        resultado = await masivo.registrar_rps(db, user.tenant_id, data, atomico)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if atomico and resultado["errores"]:
+        raise HTTPException(400, resultado)
+    await db.commit()
+    return resultado
+
+
 @router.put("/{numero}", response_model=RPResponse)
-async def editar(numero: int, data: RPUpdate, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def editar(numero: int, data: RPUpdate, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         r = await svc.editar(db, user.tenant_id, numero, data.valor, data.objeto, data.fuente_sifse, data.item_sifse)
+        await db.commit()
+        r = await perfiles_carga.cargar(db, r)
         saldo = await svc.saldo_rp(db, user.tenant_id, numero)
         return _build_response(r, saldo)
     except ValueError as e:
@@ -61,9 +83,10 @@ async def editar(numero: int, data: RPUpdate, db: AsyncSession = Depends(get_db)
 
 
 @router.put("/{numero}/anular")
-async def anular(numero: int, db: AsyncSession = Depends(get_db), user: User = Depends(require_escritura)):
+async def anular(numero: int, db: AsyncSession = Depends(get_db_escritura), user: User = Depends(require_escritura)):
     try:
         await svc.anular(db, user.tenant_id, numero)
+        await db.commit()
         return {"message": f"RP {numero} anulado"}
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -0,0 +1,102 @@
+"""
+Trabajos en segundo plano (/api/jobs).
+
+Para operaciones que pueden superar el tiempo máximo de una petición
+(paquete SIA, Excel SIA, copia de seguridad, importación del catálogo,
+consolidación): se envía el trabajo, se consulta su estado y, al terminar,
+se descarga el archivo generado.
+"""
+import json
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import es_operador, get_current_user, require_admin
+from app.database import get_db
+from app.models.tenant import User
+from app.schemas.trabajos import TrabajoCreate
+from app.services import trabajos as svc
+
+router = APIRouter(prefix="/api/jobs", tags=["Trabajos"])
+
+
+async def _crear(db: AsyncSession, user: User, tipo: str, parametros: dict, entrada: bytes | None) -> dict:
+    try:
+        return await svc.crear(db, user.tenant_id, tipo, parametros, user.email, user.rol, entrada)
+    except PermissionError as e:
+        raise HTTPException(403, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+@router.get("")
+async def listar(estado: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    return await svc.listar(db, user.tenant_id, estado)
+
+
+@router.post("", status_code=202)
+async def crear(data: TrabajoCreate, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    """Encola un trabajo sin archivo de entrada (sia_zip, sia_excel, backup_exportar,
+    consolidar_mes, cierre_mes)."""
+    return await _crear(db, user, data.tipo, data.parametros, None)
+
+
+@router.post("/archivo", status_code=202)
+async def crear_con_archivo(
+    tipo: str = Form(...),
+    parametros: str = Form("{}"),
+    archivo: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Encola un trabajo con archivo de entrada (importar_excel, backup_restaurar)."""
+    try:
+        params = json.loads(parametros)
+    except json.JSONDecodeError as e:
+        raise HTTPException(400, f"parametros no es JSON válido: {e}")
+    if not isinstance(params, dict):
+        raise HTTPException(400, "parametros debe ser un objeto JSON")
+    return await _crear(db, user, tipo, params, await archivo.read())
+
+
+@router.get("/estadisticas")
+async def estadisticas(db: AsyncSession = Depends(get_db), user: User = Depends(require_admin)):
+    """Cantidad y duración de los trabajos por tipo y estado: del propio
+    tenant, o de todos para un operador de la plataforma."""
+    return await svc.estadisticas(db, None if es_operador(user) else user.tenant_id)
+
+
+@router.get("/{trabajo_id}")
+async def obtener(trabajo_id: str, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    try:
+        return await svc.obtener(db, user.tenant_id, trabajo_id)
+    except LookupError as e:
+        raise HTTPException(404, str(e))
+
+
+@router.get("/{trabajo_id}/artefacto")
+async def descargar(trabajo_id: str, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    try:
+        contenido, nombre, media_type = await svc.artefacto(db, user.tenant_id, trabajo_id)
+    except LookupError as e:
+        raise HTTPException(404, str(e))
+    except ValueError as e:
+        raise HTTPException(409, str(e))
+    return Response(
+        content=contenido,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
+
+
+@router.post("/{trabajo_id}/cancelar")
+async def cancelar(trabajo_id: str, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    try:
+        return await svc.cancelar(db, user.tenant_id, trabajo_id, user.rol)
+    except PermissionError as e:
+        raise HTTPException(403, str(e))
+    except LookupError as e:
+        raise HTTPException(404, str(e))
+    except ValueError as e:
+        raise HTTPException(409, str(e))
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+
+class CierreLoteCreate(BaseModel):
+    tenant_ids: list[str] | None = None  # None = todos los ACTIVO (operador) o el propio
+    concurrencia: int | None = Field(None, ge=1, le=32)
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class ResultadoItemLote(BaseModel):
+    indice: int
+    numero: int | None = None
+    error: str | None = None
+
+
+class ResultadoLote(BaseModel):
+    registrados: int
+    errores: int
+    resultados: list[ResultadoItemLote]
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class TrabajoCreate(BaseModel):
+    tipo: str
+    parametros: dict = {}
@@ -0,0 +1,48 @@
+"""
+Motor de agregación por conjuntos para los informes de ejecución.
+
+Los valores se leen de la tabla ejecucion_mensual (acumulado por rubro y mes,
+mantenido por los servicios de escritura) en una sola consulta por tipo de
+documento, agrupando por codigo_rubro y separando dos columnas (anterior al
+período / dentro del período). Los rubros padre se totalizan después en
+memoria con services.arbol_rubros.
+"""
+
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ejecucion_mensual import EjecucionMensual
+
+
+async def sumas_anterior_periodo(
+    db: AsyncSession,
+    tenant_id: str,
+    documento: str,
+    anio: int,
+    mes_desde: int,
+    mes_hasta: int | None = None,
+) -> dict[str, tuple[float, float]]:
+    """Retorna {codigo_rubro: (valor_anterior, valor_periodo)} en una sola consulta.
+
+    `documento` es una clave de services.ejecucion_mensual.DOCUMENTOS
+    ("CDP", "RP", "OBLIGACION", "PAGO", "RECAUDO", "RECONOCIMIENTO").
+
+    Solo se consideran los meses de `anio` (la vigencia):
+    - anterior: documentos con mes < mes_desde
+    - periodo:  documentos con mes_desde <= mes <= mes_hasta
+    """
+    if mes_hasta is None:
+        mes_hasta = mes_desde
+    em = EjecucionMensual
+
+    stmt = (
+        select(
+            em.codigo_rubro,
+            func.coalesce(func.sum(case((em.mes < mes_desde, em.valor), else_=0)), 0),
+            func.coalesce(func.sum(case((em.mes.between(mes_desde, mes_hasta), em.valor), else_=0)), 0),
+        )
+        .where(em.tenant_id == tenant_id, em.documento == documento, em.anio == anio, em.mes <= mes_hasta)
+        .group_by(em.codigo_rubro)
+    )
+    result = await db.execute(stmt)
+    return {codigo: (anterior, periodo) for codigo, anterior, periodo in result.all()}
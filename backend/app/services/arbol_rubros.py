@@ -0,0 +1,120 @@
+"""
+Árbol en memoria del catálogo de rubros (gastos o ingresos) de un tenant.
+
+Se construye una vez por petición a partir de la lista de rubros y permite
+totalizar cualquier vector numérico de las hojas hacia los rubros padre
+(apropiaciones, compromisos, pagos, recaudos...) en O(n), sin consultar
+los descendientes de cada padre con `codigo LIKE 'X.%'`.
+"""
+
+from collections.abc import Iterable, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class ArbolRubros:
+    """Jerarquía de códigos con puntos ("2", "2.1", "2.1.1").
+
+    Un padre es todo rubro con es_hoja == 0; su total es la suma de las hojas
+    (es_hoja == 1) cuyo código empieza por "<padre>.". Las hojas se
+    representan con su propio vector.
+    """
+
+    def __init__(self, rubros: Sequence):
+        self.rubros = list(rubros)
+        self.por_codigo = {r.codigo: r for r in self.rubros}
+        self.hojas = [r for r in self.rubros if r.es_hoja == 1]
+        padres = {r.codigo for r in self.rubros if r.es_hoja != 1}
+
+        # Ancestro padre más cercano de cada rubro (None en la raíz)
+        self.padre: dict[str, str | None] = {}
+        for r in self.rubros:
+            partes = r.codigo.split(".")
+            self.padre[r.codigo] = None
+            for i in range(len(partes) - 1, 0, -1):
+                ancestro = ".".join(partes[:i])
+                if ancestro in padres:
+                    self.padre[r.codigo] = ancestro
+                    break
+
+        # Padres del más profundo al más superficial, para acumular de abajo hacia arriba
+        self._padres_ascendentes = sorted(padres, key=lambda c: c.count("."), reverse=True)
+
+    def acumular(self, valores: dict[str, Sequence[float]]) -> dict[str, tuple]:
+        """Retorna {codigo: vector} para hojas (su propio vector) y padres (suma de sus hojas).
+
+        Los padres sin hojas con valores no aparecen en el resultado.
+        """
+        ancho = len(next(iter(valores.values()), ()))
+        acumulados: dict[str, list] = {}
+        totales: dict[str, tuple] = {}
+
+        for h in self.hojas:
+            vector = valores.get(h.codigo)
+            if vector is None:
+                continue
+            totales[h.codigo] = tuple(vector)
+            padre = self.padre[h.codigo]
+            if padre is not None:
+                destino = acumulados.setdefault(padre, [0] * ancho)
+                for i, v in enumerate(vector):
+                    destino[i] += v
+
+        for codigo in self._padres_ascendentes:
+            vector = acumulados.get(codigo)
+            if vector is None:
+                continue
+            totales[codigo] = tuple(vector)
+            padre = self.padre[codigo]
+            if padre is not None:
+                destino = acumulados.setdefault(padre, [0] * ancho)
+                for i, v in enumerate(vector):
+                    destino[i] += v
+
+        return totales
+
+    def acumular_campos(self, campos: Sequence[str]) -> dict[str, tuple]:
+        """Totaliza atributos de las hojas (p.ej. componentes de la apropiación)."""
+        return self.acumular({h.codigo: tuple(getattr(h, c) for c in campos) for h in self.hojas})
+
+
+def codigos_con_hijos(codigos: Iterable[str]) -> set[str]:
+    """Códigos con descendientes: "c" los tiene si algún código empieza por "c.".
+
+    Se arma con los prefijos de cada código que terminan antes de un punto,
+    en tiempo lineal sobre la longitud de los códigos.
+    """
+    con_hijos: set[str] = set()
+    for codigo in codigos:
+        for i, caracter in enumerate(codigo):
+            if caracter == ".":
+                con_hijos.add(codigo[:i])
+    return con_hijos
+
+
+def marcar_hojas(rubros: Sequence) -> None:
+    """Fija es_hoja en cada rubro según tenga o no descendientes en la lista."""
+    con_hijos = codigos_con_hijos(r.codigo for r in rubros)
+    for r in rubros:
+        es_hoja = 0 if r.codigo in con_hijos else 1
+        if r.es_hoja != es_hoja:
+            r.es_hoja = es_hoja
+
+
+def totalizar_padres(rubros: Sequence, campos: Sequence[str]) -> None:
+    """Asigna a cada rubro padre la suma de `campos` de sus hojas."""
+    arbol = ArbolRubros(rubros)
+    totales = arbol.acumular_campos(campos)
+    for rubro in arbol.rubros:
+        if rubro.es_hoja == 0 and rubro.codigo in totales:
+            for campo, valor in zip(campos, totales[rubro.codigo]):
+                setattr(rubro, campo, valor)
+
+
+async def cargar_arbol(db: AsyncSession, tenant_id: str, model) -> ArbolRubros:
+    """Carga el catálogo completo (RubroGasto o RubroIngreso) ordenado por código."""
+    result = await db.execute(
+        select(model).where(model.tenant_id == tenant_id).order_by(model.codigo)
+    )
+    return ArbolRubros(result.scalars().all())
@@ -16,6 +16,7 @@ from app.models.reconocimiento import Reconocimiento
 from app.models.modificaciones import ModificacionPresupuestal, DetalleModificacion
 from app.models.pac import PAC
 from app.models.sifse import MapeoSifseIngreso, MapeoSifseGasto
+from app.services import ejecucion_mensual, version_datos
 
 BACKUP_VERSION = "1.0"
 
@@ -31,7 +32,8 @@ def _row_to_dict(obj, exclude: set | None = None) -> dict:
 
 async def _fetch_all(db: AsyncSession, model, tenant_id: str) -> list[dict]:
     result = await db.execute(select(model).where(model.tenant_id == tenant_id))
-    return [_row_to_dict(r, exclude={"tenant_id"}) for r in result.scalars().all()]
+    # periodo se deriva de fecha al restaurar; no forma parte del formato del backup
+    return [_row_to_dict(r, exclude={"tenant_id", "periodo"}) for r in result.scalars().all()]
 
 
 # ---------------------------------------------------------------------------
@@ -53,7 +55,7 @@ async def exportar(db: AsyncSession, tenant_id: str) -> dict:
     )
     mods_data = []
     for m in result.scalars().all():
-        d = _row_to_dict(m, exclude={"tenant_id"})
+        d = _row_to_dict(m, exclude={"tenant_id", "periodo"})
         result2 = await db.execute(
             select(DetalleModificacion).where(
                 DetalleModificacion.tenant_id == tenant_id,
@@ -141,6 +143,8 @@ async def restaurar(db: AsyncSession, tenant_id: str, data: dict) -> dict:
     codigos_ingresos_bk = {r["codigo"] for r in datos.get("rubros_ingresos", [])}
 
     # --- Borrar en orden inverso de dependencias ---
+    # Los DELETE masivos no pasan por el flush: la versión se incrementa aquí
+    await version_datos.incrementar(db, tenant_id)
     if codigos_gastos_bk:
         await db.execute(
             delete(MapeoSifseGasto).where(
@@ -258,5 +262,9 @@ async def restaurar(db: AsyncSession, tenant_id: str, data: dict) -> dict:
         db.add(MapeoSifseGasto(**row))
     stats["mapeo_sifse_gastos"] = len(datos.get("mapeo_sifse_gastos", []))
 
+    # Acumulado mensual de ejecución a partir de los documentos restaurados
+    await db.flush()
+    await ejecucion_mensual.reconstruir(db, tenant_id)
+
     await db.commit()
     return stats
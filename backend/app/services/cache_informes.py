@@ -0,0 +1,188 @@
+"""
+Caché de resultados de informes por tenant.
+
+La clave combina tenant, informe, parámetros y la versión de datos del
+tenant (services.version_datos): cualquier escritura incrementa la versión
+y las entradas anteriores dejan de usarse (expiran por TTL o LRU).
+
+Backends:
+- CacheMemoria (por defecto): LRU con TTL en el proceso.
+- CacheRedis: cualquier servidor compatible con el protocolo Redis (Redis,
+  Valkey, KeyDB...), para compartir el caché entre workers. Se activa con
+  CACHE_INFORMES_URL=redis://host:6379/0 y requiere el paquete `redis`.
+
+Los valores se guardan serializados (JSON o bytes), así que un resultado
+cacheado nunca comparte objetos con quien lo recibe.
+
+Los archivos (leer_bytes/guardar_bytes, p.ej. el paquete SIA) se guardan
+con CACHE_PAQUETE_SIA_TTL: la versión de datos ya los invalida, el TTL
+solo libera memoria. En memoria van en un LRU propio de
+CACHE_PAQUETE_SIA_MAX entradas para que los informes JSON no los desplacen.
+"""
+
+import json
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.services import version_datos
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis es opcional
+    redis_asyncio = None
+
+
+class CacheMemoria:
+    """LRU con TTL en memoria del proceso."""
+
+    def __init__(self, max_entradas: int = 256, ttl: int = 300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, clave: str) -> bytes | None:
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return None
+        expira, valor = entrada
+        if expira < time.monotonic():
+            del self._datos[clave]
+            return None
+        self._datos.move_to_end(clave)
+        return valor
+
+    async def set(self, clave: str, valor: bytes, ttl: int | None = None) -> None:
+        self._datos[clave] = (time.monotonic() + (ttl or self.ttl), valor)
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+
+    async def limpiar(self) -> None:
+        self._datos.clear()
+
+
+class CacheRedis:
+    """Servidor compatible con Redis; el TTL lo aplica el servidor."""
+
+    def __init__(self, url: str, ttl: int = 300, prefijo: str = "informes:"):
+        if redis_asyncio is None:
+            raise RuntimeError("CACHE_INFORMES_URL requiere el paquete 'redis' (pip install redis)")
+        self.ttl = ttl
+        self.prefijo = prefijo
+        self._cliente = redis_asyncio.from_url(url)
+
+    async def get(self, clave: str) -> bytes | None:
+        return await self._cliente.get(self.prefijo + clave)
+
+    async def set(self, clave: str, valor: bytes, ttl: int | None = None) -> None:
+        await self._cliente.set(self.prefijo + clave, valor, ex=ttl or self.ttl)
+
+    async def limpiar(self) -> None:
+        async for clave in self._cliente.scan_iter(match=self.prefijo + "*"):
+            await self._cliente.delete(clave)
+
+
+def _crear_backend():
+    settings = get_settings()
+    if settings.CACHE_INFORMES_URL:
+        return CacheRedis(settings.CACHE_INFORMES_URL, ttl=settings.CACHE_INFORMES_TTL)
+    return CacheMemoria(max_entradas=settings.CACHE_INFORMES_MAX, ttl=settings.CACHE_INFORMES_TTL)
+
+
+_backend = None
+_backend_archivos = None
+
+# informe -> {"aciertos": n, "fallos": n} (por proceso)
+_metricas: defaultdict[str, dict[str, int]] = defaultdict(lambda: {"aciertos": 0, "fallos": 0})
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = _crear_backend()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Reemplaza el backend (p.ej. para usar uno propio o vaciar el caché)."""
+    global _backend, _backend_archivos
+    _backend = backend
+    _backend_archivos = None
+
+
+def get_backend_archivos():
+    """Backend de leer_bytes/guardar_bytes: el mismo servidor Redis, o un LRU
+    en memoria separado del de los informes JSON."""
+    global _backend_archivos
+    if _backend_archivos is None:
+        backend = get_backend()
+        if isinstance(backend, CacheMemoria):
+            settings = get_settings()
+            backend = CacheMemoria(max_entradas=settings.CACHE_PAQUETE_SIA_MAX, ttl=settings.CACHE_PAQUETE_SIA_TTL)
+        _backend_archivos = backend
+    return _backend_archivos
+
+
+def _clave(tenant_id: str, informe: str, version: int, parametros: dict | None) -> str:
+    params = json.dumps(parametros or {}, sort_keys=True, separators=(",", ":"))
+    return f"{tenant_id}:{informe}:v{version}:{params}"
+
+
+def _registrar(informe: str, acierto: bool) -> None:
+    _metricas[informe]["aciertos" if acierto else "fallos"] += 1
+
+
+async def clave_actual(db: AsyncSession, tenant_id: str, informe: str, parametros: dict | None = None) -> str:
+    """Clave del informe con la versión de datos vigente del tenant."""
+    return _clave(tenant_id, informe, await version_datos.get_version(db, tenant_id), parametros)
+
+
+async def obtener(
+    db: AsyncSession,
+    tenant_id: str,
+    informe: str,
+    parametros: dict | None,
+    calcular: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Resultado JSON del informe desde el caché, o `await calcular()` si no está.
+
+    La versión se lee antes de calcular: si alguien escribe mientras tanto,
+    el resultado queda guardado con la versión anterior y no se reutiliza.
+    """
+    clave = await clave_actual(db, tenant_id, informe, parametros)
+    backend = get_backend()
+    guardado = await backend.get(clave)
+    if guardado is not None:
+        _registrar(informe, True)
+        return json.loads(guardado)
+
+    _registrar(informe, False)
+    resultado = await calcular()
+    await backend.set(clave, json.dumps(resultado, separators=(",", ":")).encode())
+    return resultado
+
+
+async def leer_bytes(informe: str, clave: str) -> bytes | None:
+    """Contenido binario guardado con `clave` (de clave_actual), registrando la métrica."""
+    guardado = await get_backend_archivos().get(clave)
+    _registrar(informe, guardado is not None)
+    return guardado
+
+
+async def guardar_bytes(clave: str, contenido: bytes, ttl: int | None = None) -> None:
+    """Guarda un archivo con `clave`; `ttl` por defecto es CACHE_PAQUETE_SIA_TTL."""
+    await get_backend_archivos().set(clave, contenido, ttl or get_settings().CACHE_PAQUETE_SIA_TTL)
+
+
+def metricas() -> dict:
+    """Aciertos, fallos y tasa de aciertos por informe desde que inició el proceso."""
+    resultado = {}
+    for informe, m in sorted(_metricas.items()):
+        total = m["aciertos"] + m["fallos"]
+        resultado[informe] = {**m, "tasa_aciertos": round(m["aciertos"] / total, 4) if total else 0.0}
+    return {"backend": type(get_backend()).__name__, "informes": resultado}
@@ -8,7 +8,9 @@ from app.models.cdp import CDP
 from app.models.rp import RP
 from app.services import rubros_gastos as rubros_svc
 from app.services import config as config_svc
+from app.services import ejecucion_mensual
 from app.services.conceptos import guardar_concepto
+from app.services import perfiles_carga
 
 
 # ---------------------------------------------------------------------------
@@ -32,6 +34,20 @@ async def saldo_cdp(db: AsyncSession, tenant_id: str, numero_cdp: int) -> Decima
     return Decimal(str(cdp.valor)) - Decimal(str(total_rps))
 
 
+async def saldos_cdps(db: AsyncSession, tenant_id: str, cdps: list[CDP]) -> dict[int, Decimal]:
+    """Saldo de varios CDP (como saldo_cdp) con una sola consulta agrupada."""
+    stmt = (
+        select(RP.cdp_numero, func.sum(RP.valor))
+        .where(RP.tenant_id == tenant_id, RP.estado != "ANULADO")
+        .group_by(RP.cdp_numero)
+    )
+    consumido = dict((await db.execute(stmt)).all()) if cdps else {}
+    return {
+        c.numero: Decimal(str(c.valor)) - Decimal(str(consumido.get(c.numero) or Decimal(0)))
+        for c in cdps
+    }
+
+
 # ---------------------------------------------------------------------------
 # Registrar nuevo CDP
 # ---------------------------------------------------------------------------
@@ -69,6 +85,7 @@ async def registrar(
     )
     db.add(nuevo_cdp)
     await db.flush()
+    await ejecucion_mensual.registrar_movimiento(db, tenant_id, "CDP", codigo_rubro, nuevo_cdp.fecha, valor)
 
     await guardar_concepto(db, tenant_id, codigo_rubro, objeto)
 
@@ -79,17 +96,17 @@ async def registrar(
 # Consultar CDPs
 # ---------------------------------------------------------------------------
 
-async def get_cdps(db: AsyncSession, tenant_id: str, estado: str | None = None) -> list[CDP]:
+async def get_cdps(db: AsyncSession, tenant_id: str, estado: str | None = None, perfil: str | None = None) -> list[CDP]:
     stmt = select(CDP).where(CDP.tenant_id == tenant_id).order_by(CDP.numero.desc())
     if estado is not None:
         stmt = stmt.where(CDP.estado == estado)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(CDP, perfil)))
     return list(result.scalars().all())
 
 
-async def get_cdp(db: AsyncSession, tenant_id: str, numero: int) -> CDP | None:
+async def get_cdp(db: AsyncSession, tenant_id: str, numero: int, perfil: str | None = None) -> CDP | None:
     stmt = select(CDP).where(CDP.tenant_id == tenant_id, CDP.numero == numero)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(CDP, perfil)))
     return result.scalar_one_or_none()
 
 
@@ -134,6 +151,9 @@ async def anular(db: AsyncSession, tenant_id: str, numero: int) -> CDP:
             f"No se puede anular el CDP {numero}: tiene {rps_activos} RP(s) activo(s)"
         )
 
+    if cdp.estado != "ANULADO":
+        await ejecucion_mensual.registrar_movimiento(
+            db, tenant_id, "CDP", cdp.codigo_rubro, cdp.fecha, -cdp.valor)
     cdp.estado = "ANULADO"
     await db.flush()
     return cdp
@@ -212,6 +232,9 @@ async def editar(
                     f"del rubro ({saldo_rubro:,.2f})"
                 )
 
+        if cdp.estado != "ANULADO":
+            await ejecucion_mensual.registrar_movimiento(
+                db, tenant_id, "CDP", cdp.codigo_rubro, cdp.fecha, nuevo_valor - cdp.valor)
         cdp.valor = nuevo_valor
 
     if objeto is not None:
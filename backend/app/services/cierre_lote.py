@@ -0,0 +1,253 @@
+"""
+Cierre de mes por lote para varios tenants.
+
+Un lote guarda en cierres_lote_tenants el mes que debe cerrar cada tenant
+(leído al crear el lote). Se ejecuta en segundo plano con un grupo acotado de
+trabajadores asyncio; cada tenant usa su propia sesión y su propia
+transacción (consolidacion.cierre_mes con `mes_esperado`). El progreso y los
+tiempos quedan en la base:
+
+- un trabajador toma un tenant con UPDATE … WHERE estado='PENDIENTE', así que
+  dos ejecuciones del mismo lote no cierran dos veces el mismo tenant;
+- si el proceso se reinicia, `reanudar_pendientes` (al iniciar la app)
+  devuelve a PENDIENTE los tenants que quedaron EN_CURSO y continúa. Un
+  tenant cuyo mes ya avanzó (el cierre alcanzó a confirmarse) se marca
+  COMPLETADO sin volver a cerrarlo.
+
+Solo un operador de la plataforma (OPERADORES_PLATAFORMA) cierra varios
+tenants; un ADMIN de institución solo lanza lotes de su propio tenant y,
+con `tenant_id`, listar_lotes/estado_lote le muestran solo su tenant.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.cierre_lote import CierreLote, CierreLoteTenant
+from app.models.config import Config
+from app.models.tenant import Tenant
+from app.services import config as config_svc
+from app.services import consolidacion
+
+# Tareas en ejecución (referencia para que no las recoja el GC)
+_tareas: set[asyncio.Task] = set()
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+async def crear_lote(
+    db: AsyncSession,
+    tenant_ids: list[str] | None,
+    solicitado_por: str,
+    concurrencia: int | None = None,
+) -> CierreLote:
+    """Registra un lote con los tenants indicados (todos los ACTIVO si es None)."""
+    stmt = select(Tenant.id).where(Tenant.estado == "ACTIVO")
+    if tenant_ids is not None:
+        stmt = select(Tenant.id).where(Tenant.id.in_(tenant_ids))
+    ids = sorted((await db.execute(stmt)).scalars().all())
+    if tenant_ids is not None:
+        faltantes = sorted(set(tenant_ids) - set(ids))
+        if faltantes:
+            raise ValueError(f"Tenants no encontrados: {', '.join(faltantes)}")
+    if not ids:
+        raise ValueError("No hay tenants para cerrar")
+
+    meses = dict((await db.execute(
+        select(Config.tenant_id, Config.valor).where(Config.clave == "mes_actual", Config.tenant_id.in_(ids))
+    )).all())
+
+    lote = CierreLote(
+        estado="PENDIENTE",
+        concurrencia=concurrencia or get_settings().CIERRE_LOTE_CONCURRENCIA,
+        solicitado_por=solicitado_por,
+        fecha_creacion=_ahora(),
+    )
+    db.add(lote)
+    await db.flush()
+    db.add_all(
+        CierreLoteTenant(lote_id=lote.id, tenant_id=tid, mes=int(meses.get(tid) or "1"), estado="PENDIENTE")
+        for tid in ids
+    )
+    await db.commit()
+    return lote
+
+
+def iniciar(lote_id: int) -> asyncio.Task:
+    """Ejecuta el lote en segundo plano."""
+    tarea = asyncio.create_task(ejecutar_lote(lote_id))
+    _tareas.add(tarea)
+    tarea.add_done_callback(_tareas.discard)
+    return tarea
+
+
+async def ejecutar_lote(lote_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        lote = await db.get(CierreLote, lote_id)
+        if lote is None:
+            return
+        lote.estado = "EN_CURSO"
+        lote.inicio = lote.inicio or _ahora()
+        lote.fin = None
+        concurrencia = lote.concurrencia
+        pendientes = (await db.execute(
+            select(CierreLoteTenant.tenant_id, CierreLoteTenant.mes)
+            .where(CierreLoteTenant.lote_id == lote_id, CierreLoteTenant.estado == "PENDIENTE")
+            .order_by(CierreLoteTenant.tenant_id)
+        )).all()
+        await db.commit()
+
+    cola: asyncio.Queue = asyncio.Queue()
+    for tenant_id, mes in pendientes:
+        cola.put_nowait((tenant_id, mes))
+
+    async def _trabajador():
+        while True:
+            try:
+                tenant_id, mes = cola.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await _cerrar_tenant(lote_id, tenant_id, mes)
+
+    try:
+        await asyncio.gather(*(_trabajador() for _ in range(max(1, min(concurrencia, len(pendientes))))))
+    finally:
+        async with AsyncSessionLocal() as db:
+            estados = set((await db.execute(
+                select(CierreLoteTenant.estado).where(CierreLoteTenant.lote_id == lote_id).distinct()
+            )).scalars())
+            if not estados & {"PENDIENTE", "EN_CURSO"}:
+                await db.execute(
+                    update(CierreLote).where(CierreLote.id == lote_id)
+                    .values(estado="CON_ERRORES" if "ERROR" in estados else "COMPLETADO", fin=_ahora())
+                )
+                await db.commit()
+
+
+async def _tomar(lote_id: int, tenant_id: str) -> bool:
+    """Marca el tenant EN_CURSO si sigue PENDIENTE. Retorna False si otro lo tomó."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(CierreLoteTenant)
+            .where(CierreLoteTenant.lote_id == lote_id, CierreLoteTenant.tenant_id == tenant_id,
+                   CierreLoteTenant.estado == "PENDIENTE")
+            .values(estado="EN_CURSO", inicio=_ahora(), fin=None, duracion_ms=None, error=None)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+async def _cerrar_tenant(lote_id: int, tenant_id: str, mes: int) -> None:
+    if not await _tomar(lote_id, tenant_id):
+        return
+
+    t0 = time.perf_counter()
+    estado, error = "COMPLETADO", None
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.connection(execution_options={"escritura": True})
+            mes_actual = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
+            # mes + 1: el cierre se confirmó pero el proceso se detuvo antes de registrarlo
+            if mes_actual != mes + 1:
+                await consolidacion.cierre_mes(db, tenant_id, mes_esperado=mes)
+    except Exception as e:  # un tenant con error no detiene el lote
+        estado, error = "ERROR", str(e)[:500]
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(CierreLoteTenant)
+            .where(CierreLoteTenant.lote_id == lote_id, CierreLoteTenant.tenant_id == tenant_id)
+            .values(estado=estado, error=error, fin=_ahora(), duracion_ms=round((time.perf_counter() - t0) * 1000))
+        )
+        await db.commit()
+
+
+async def reanudar_pendientes() -> list[int]:
+    """Retoma los lotes que quedaron sin terminar (al iniciar la app)."""
+    async with AsyncSessionLocal() as db:
+        ids = list((await db.execute(
+            select(CierreLote.id).where(CierreLote.estado.in_(["PENDIENTE", "EN_CURSO"])).order_by(CierreLote.id)
+        )).scalars())
+        if ids:
+            await db.execute(
+                update(CierreLoteTenant)
+                .where(CierreLoteTenant.lote_id.in_(ids), CierreLoteTenant.estado == "EN_CURSO")
+                .values(estado="PENDIENTE")
+            )
+            await db.commit()
+    for lote_id in ids:
+        iniciar(lote_id)
+    return ids
+
+
+def _tenant_dict(t: CierreLoteTenant, nombre: str) -> dict:
+    return {
+        "tenant_id": t.tenant_id,
+        "nombre": nombre,
+        "mes": t.mes,
+        "estado": t.estado,
+        "inicio": t.inicio,
+        "fin": t.fin,
+        "duracion_ms": t.duracion_ms,
+        "error": t.error,
+    }
+
+
+def _lote_dict(lote: CierreLote) -> dict:
+    return {
+        "id": lote.id,
+        "estado": lote.estado,
+        "concurrencia": lote.concurrencia,
+        "solicitado_por": lote.solicitado_por,
+        "fecha_creacion": lote.fecha_creacion,
+        "inicio": lote.inicio,
+        "fin": lote.fin,
+    }
+
+
+async def estado_lote(db: AsyncSession, lote_id: int, tenant_id: str | None = None) -> dict:
+    """Estado del lote con el progreso y los tiempos de cada tenant.
+
+    Con `tenant_id` solo se incluye ese tenant (y el lote no existe para
+    quien no participa en él).
+    """
+    lote = await db.get(CierreLote, lote_id)
+    stmt = (
+        select(CierreLoteTenant, Tenant.nombre)
+        .join(Tenant, Tenant.id == CierreLoteTenant.tenant_id)
+        .where(CierreLoteTenant.lote_id == lote_id)
+        .order_by(CierreLoteTenant.tenant_id)
+    )
+    if tenant_id is not None:
+        stmt = stmt.where(CierreLoteTenant.tenant_id == tenant_id)
+    filas = (await db.execute(stmt)).all() if lote is not None else []
+    if lote is None or (tenant_id is not None and not filas):
+        raise ValueError(f"Cierre por lote {lote_id} no encontrado")
+    tenants = [_tenant_dict(t, nombre) for t, nombre in filas]
+    duraciones = [t["duracion_ms"] for t in tenants if t["duracion_ms"] is not None]
+    return {
+        **_lote_dict(lote),
+        "resumen": dict(Counter(t["estado"] for t in tenants)),
+        "duracion_total_ms": sum(duraciones),
+        "duracion_max_ms": max(duraciones, default=0),
+        "tenants": tenants,
+    }
+
+
+async def listar_lotes(db: AsyncSession, limite: int = 20, tenant_id: str | None = None) -> list[dict]:
+    """Últimos lotes; con `tenant_id`, solo los que incluyen ese tenant."""
+    stmt = select(CierreLote).order_by(CierreLote.id.desc()).limit(limite)
+    if tenant_id is not None:
+        stmt = stmt.where(CierreLote.id.in_(
+            select(CierreLoteTenant.lote_id).where(CierreLoteTenant.tenant_id == tenant_id)
+        ))
+    result = await db.execute(stmt)
+    return [_lote_dict(lote) for lote in result.scalars()]
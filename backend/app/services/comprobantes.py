@@ -13,6 +13,7 @@ from app.models.recaudo import Recaudo
 from app.models.rubros import RubroGasto, RubroIngreso
 from app.models.cuentas_bancarias import CuentaBancaria
 from app.services import config as config_svc
+from app.services import perfiles_carga
 
 
 # ─── Número en letras (Español colombiano) ───────────────────────────────────
@@ -137,7 +138,9 @@ def _tercero_dict(t) -> dict | None:
 
 async def comprobante_cdp(db: AsyncSession, tenant_id: str, numero: int) -> dict:
     res = await db.execute(
-        select(CDP).where(CDP.tenant_id == tenant_id, CDP.numero == numero)
+        select(CDP)
+        .where(CDP.tenant_id == tenant_id, CDP.numero == numero)
+        .options(*perfiles_carga.opciones(CDP, "comprobante"))
     )
     cdp = res.scalar_one_or_none()
     if not cdp:
@@ -200,7 +203,9 @@ async def comprobante_cdp(db: AsyncSession, tenant_id: str, numero: int) -> dict
 
 async def comprobante_rp(db: AsyncSession, tenant_id: str, numero: int) -> dict:
     res = await db.execute(
-        select(RP).where(RP.tenant_id == tenant_id, RP.numero == numero)
+        select(RP)
+        .where(RP.tenant_id == tenant_id, RP.numero == numero)
+        .options(*perfiles_carga.opciones(RP, "comprobante"))
     )
     rp = res.scalar_one_or_none()
     if not rp:
@@ -271,7 +276,9 @@ async def comprobante_rp(db: AsyncSession, tenant_id: str, numero: int) -> dict:
 
 async def comprobante_obligacion(db: AsyncSession, tenant_id: str, numero: int) -> dict:
     res = await db.execute(
-        select(Obligacion).where(Obligacion.tenant_id == tenant_id, Obligacion.numero == numero)
+        select(Obligacion)
+        .where(Obligacion.tenant_id == tenant_id, Obligacion.numero == numero)
+        .options(*perfiles_carga.opciones(Obligacion, "comprobante"))
     )
     obl = res.scalar_one_or_none()
     if not obl:
@@ -350,7 +357,9 @@ async def comprobante_obligacion(db: AsyncSession, tenant_id: str, numero: int)
 
 async def comprobante_pago(db: AsyncSession, tenant_id: str, numero: int) -> dict:
     res = await db.execute(
-        select(Pago).where(Pago.tenant_id == tenant_id, Pago.numero == numero)
+        select(Pago)
+        .where(Pago.tenant_id == tenant_id, Pago.numero == numero)
+        .options(*perfiles_carga.opciones(Pago, "comprobante"))
     )
     pago = res.scalar_one_or_none()
     if not pago:
@@ -413,7 +422,9 @@ async def comprobante_pago(db: AsyncSession, tenant_id: str, numero: int) -> dic
 
 async def comprobante_recaudo(db: AsyncSession, tenant_id: str, numero: int) -> dict:
     res = await db.execute(
-        select(Recaudo).where(Recaudo.tenant_id == tenant_id, Recaudo.numero == numero)
+        select(Recaudo)
+        .where(Recaudo.tenant_id == tenant_id, Recaudo.numero == numero)
+        .options(*perfiles_carga.opciones(Recaudo, "comprobante"))
     )
     recaudo = res.scalar_one_or_none()
     if not recaudo:
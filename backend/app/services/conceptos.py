@@ -1,3 +1,4 @@
+from collections import Counter
 from datetime import date
 
 from sqlalchemy import select, and_
@@ -32,6 +33,34 @@ async def guardar_concepto(db: AsyncSession, tenant_id: str, codigo_rubro: str,
     await db.flush()
 
 
+async def guardar_conceptos(db: AsyncSession, tenant_id: str, pares: list[tuple[str, str]]):
+    """guardar_concepto para un lote de (codigo_rubro, concepto) con una sola consulta."""
+    usos = Counter((codigo, concepto) for codigo, concepto in pares if concepto and concepto.strip())
+    if not usos:
+        return
+    hoy = date.today().isoformat()
+    stmt = select(Concepto).where(
+        Concepto.tenant_id == tenant_id,
+        Concepto.codigo_rubro.in_({codigo for codigo, _ in usos}),
+        Concepto.concepto.in_({concepto for _, concepto in usos}),
+    )
+    existentes = {(c.codigo_rubro, c.concepto): c for c in (await db.execute(stmt)).scalars()}
+    for (codigo, concepto), veces in usos.items():
+        existing = existentes.get((codigo, concepto))
+        if existing:
+            existing.veces_usado += veces
+            existing.ultimo_uso = hoy
+        else:
+            db.add(Concepto(
+                tenant_id=tenant_id,
+                codigo_rubro=codigo,
+                concepto=concepto,
+                veces_usado=veces,
+                ultimo_uso=hoy,
+            ))
+    await db.flush()
+
+
 async def get_conceptos(db: AsyncSession, tenant_id: str, codigo_rubro: str) -> list[Concepto]:
     stmt = select(Concepto).where(
         Concepto.tenant_id == tenant_id,
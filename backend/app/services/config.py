@@ -1,5 +1,6 @@
-from sqlalchemy import select
+from sqlalchemy import select, func, cast, Integer, String
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import dialect_insert
 from app.models.config import Config
 
 
@@ -11,6 +12,10 @@ async def get_config(db: AsyncSession, tenant_id: str, clave: str) -> str | None
     return row.valor if row else None
 
 
+async def get_vigencia(db: AsyncSession, tenant_id: str) -> int:
+    return int(await get_config(db, tenant_id, "vigencia") or "2026")
+
+
 async def set_config(db: AsyncSession, tenant_id: str, clave: str, valor: str):
     result = await db.execute(
         select(Config).where(Config.tenant_id == tenant_id, Config.clave == clave)
@@ -23,21 +28,31 @@ async def set_config(db: AsyncSession, tenant_id: str, clave: str, valor: str):
     await db.commit()
 
 
-async def get_consecutivo(db: AsyncSession, tenant_id: str, tipo: str) -> int:
+async def reservar_consecutivos(db: AsyncSession, tenant_id: str, tipo: str, cantidad: int) -> range:
+    """Reserva `cantidad` números consecutivos de `tipo` en una sola sentencia.
+
+    El incremento es un upsert atómico (INSERT ... ON CONFLICT DO UPDATE ...
+    RETURNING) dentro de la transacción del llamador: la fila del contador
+    queda bloqueada hasta su commit, de modo que dos registros concurrentes
+    no pueden obtener el mismo número, y si la transacción se revierte el
+    número vuelve a estar disponible. No hace commit.
+    """
+    if cantidad < 1:
+        raise ValueError("La cantidad de consecutivos debe ser mayor a cero")
     clave = f"consecutivo_{tipo}"
-    result = await db.execute(
-        select(Config).where(Config.tenant_id == tenant_id, Config.clave == clave)
-    )
-    row = result.scalar_one_or_none()
-    if row:
-        actual = int(row.valor or "0")
-        nuevo = actual + 1
-        row.valor = str(nuevo)
-        await db.commit()
-        return nuevo
-    db.add(Config(tenant_id=tenant_id, clave=clave, valor="1"))
-    await db.commit()
-    return 1
+    actual = cast(func.coalesce(func.nullif(Config.valor, ""), "0"), Integer)
+    stmt = dialect_insert(db, Config).values(tenant_id=tenant_id, clave=clave, valor=str(cantidad))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "clave"],
+        set_={"valor": cast(actual + cantidad, String)},
+    ).returning(Config.valor)
+    ultimo = int((await db.execute(stmt)).scalar_one())
+    return range(ultimo - cantidad + 1, ultimo + 1)
+
+
+async def get_consecutivo(db: AsyncSession, tenant_id: str, tipo: str) -> int:
+    """Siguiente número de `tipo`; ver reservar_consecutivos."""
+    return (await reservar_consecutivos(db, tenant_id, tipo, 1))[0]
 
 
 # Alias usado en varios servicios con nombre distinto
@@ -1,131 +1,143 @@
+"""
+Consolidación mensual de gastos (compromisos y pagos) e ingresos (recaudos).
+
+Cada tabla de consolidación se llena con una sola sentencia
+INSERT … SELECT … GROUP BY … ON CONFLICT DO UPDATE sobre las hojas del
+catálogo y la tabla ejecucion_mensual (SQLite y PostgreSQL). El modo de
+simulación calcula los mismos valores y retorna las diferencias con la
+consolidación guardada del mes, sin escribir.
+"""
+
 from datetime import date
-from sqlalchemy import select, func, and_, Integer
+from sqlalchemy import select, func, case, and_, literal, true
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import dialect_insert
 from app.models.rubros import RubroGasto, RubroIngreso
-from app.models.rp import RP
-from app.models.pago import Pago
-from app.models.recaudo import Recaudo
 from app.models.pac import ConsolidacionMensual, ConsolidacionMensualIngresos
+from app.models.ejecucion_mensual import EjecucionMensual
 from app.services import config as config_svc
+from app.services import version_datos
 
+# (tabla de consolidación, catálogo, {columna: documento de ejecucion_mensual})
+_GASTOS = (ConsolidacionMensual, RubroGasto, {"compromisos_mes": "RP", "pagos_mes": "PAGO"})
+_INGRESOS = (ConsolidacionMensualIngresos, RubroIngreso, {"recaudo_mes": "RECAUDO"})
 
-async def consolidar_mes(db: AsyncSession, tenant_id: str) -> tuple[int, int]:
+
+async def _mes_y_vigencia(db: AsyncSession, tenant_id: str) -> tuple[int, int]:
     mes_actual = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
-    vigencia = int(await config_svc.get_config(db, tenant_id, "vigencia") or "2026")
+    return mes_actual, await config_svc.get_vigencia(db, tenant_id)
 
-    hojas = await db.execute(
-        select(RubroGasto).where(RubroGasto.tenant_id == tenant_id, RubroGasto.es_hoja == 1)
-    )
-    rubros = hojas.scalars().all()
-    count = 0
-
-    for rubro in rubros:
-        mes_col = func.cast(func.substr(RP.fecha, 6, 2), Integer)
-        compromisos = await db.execute(
-            select(func.coalesce(func.sum(RP.valor), 0)).where(
-                and_(
-                    RP.tenant_id == tenant_id,
-                    RP.codigo_rubro == rubro.codigo,
-                    RP.estado != "ANULADO",
-                    mes_col == mes_actual,
-                )
-            )
-        )
-        comp_mes = compromisos.scalar()
-
-        mes_col_p = func.cast(func.substr(Pago.fecha, 6, 2), Integer)
-        pagos = await db.execute(
-            select(func.coalesce(func.sum(Pago.valor), 0)).where(
-                and_(
-                    Pago.tenant_id == tenant_id,
-                    Pago.codigo_rubro == rubro.codigo,
-                    Pago.estado != "ANULADO",
-                    mes_col_p == mes_actual,
-                )
-            )
-        )
-        pag_mes = pagos.scalar()
-
-        existing = await db.execute(
-            select(ConsolidacionMensual).where(
-                and_(
-                    ConsolidacionMensual.tenant_id == tenant_id,
-                    ConsolidacionMensual.mes == mes_actual,
-                    ConsolidacionMensual.anio == vigencia,
-                    ConsolidacionMensual.codigo_rubro == rubro.codigo,
-                )
-            )
+
+def _valores_mes(destino: tuple, tenant_id: str, mes: int, anio: int):
+    """SELECT (codigo_rubro, columna...) con el valor del mes de cada hoja del catálogo."""
+    _, rubro_model, columnas = destino
+    em = EjecucionMensual
+    return (
+        select(
+            rubro_model.codigo.label("codigo_rubro"),
+            *(
+                func.coalesce(func.sum(case((em.documento == documento, em.valor), else_=0)), 0).label(columna)
+                for columna, documento in columnas.items()
+            ),
         )
-        row = existing.scalar_one_or_none()
-        if row:
-            row.compromisos_mes = comp_mes
-            row.pagos_mes = pag_mes
-            row.fecha_consolidacion = date.today().isoformat()
-        else:
-            db.add(ConsolidacionMensual(
-                tenant_id=tenant_id, mes=mes_actual, anio=vigencia, codigo_rubro=rubro.codigo,
-                compromisos_mes=comp_mes, pagos_mes=pag_mes,
-                fecha_consolidacion=date.today().isoformat(),
-            ))
-        count += 1
+        .outerjoin(em, and_(
+            em.tenant_id == rubro_model.tenant_id,
+            em.codigo_rubro == rubro_model.codigo,
+            em.anio == anio,
+            em.mes == mes,
+            em.documento.in_(list(columnas.values())),
+        ))
+        .where(rubro_model.tenant_id == tenant_id, rubro_model.es_hoja == 1)
+        .group_by(rubro_model.codigo)
+    )
 
-    await db.commit()
-    return mes_actual, count
 
+async def _consolidar(db: AsyncSession, tenant_id: str, destino: tuple, mes: int, anio: int) -> int:
+    """Inserta o actualiza la consolidación del mes de todas las hojas. Retorna cuántas."""
+    model, _, columnas = destino
+    valores = _valores_mes(destino, tenant_id, mes, anio).subquery()
+    origen = select(
+        literal(tenant_id, model.tenant_id.type).label("tenant_id"),
+        literal(mes, model.mes.type).label("mes"),
+        literal(anio, model.anio.type).label("anio"),
+        valores.c.codigo_rubro,
+        *(valores.c[columna] for columna in columnas),
+        literal(date.today().isoformat(), model.fecha_consolidacion.type).label("fecha_consolidacion"),
+    ).where(true())  # SQLite exige WHERE en INSERT … SELECT … ON CONFLICT
+    nombres = ["tenant_id", "mes", "anio", "codigo_rubro", *columnas, "fecha_consolidacion"]
 
-async def consolidar_mes_ingresos(db: AsyncSession, tenant_id: str) -> tuple[int, int]:
-    mes_actual = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
-    vigencia = int(await config_svc.get_config(db, tenant_id, "vigencia") or "2026")
+    stmt = dialect_insert(db, model).from_select(nombres, origen)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "mes", "anio", "codigo_rubro"],
+        set_={c: stmt.excluded[c] for c in [*columnas, "fecha_consolidacion"]},
+    )
+    result = await db.execute(stmt)
+    # Sentencia masiva: no pasa por el flush de la sesión
+    await version_datos.incrementar(db, tenant_id)
+    return result.rowcount
 
-    hojas = await db.execute(
-        select(RubroIngreso).where(RubroIngreso.tenant_id == tenant_id, RubroIngreso.es_hoja == 1)
+
+async def _diferencias(db: AsyncSession, tenant_id: str, destino: tuple, mes: int, anio: int) -> list[dict]:
+    """Hojas cuya consolidación cambiaría: nuevas o con algún valor distinto."""
+    model, _, columnas = destino
+    valores = _valores_mes(destino, tenant_id, mes, anio).subquery()
+    result = await db.execute(
+        select(valores, *(model.__table__.c[columna].label(f"anterior_{columna}") for columna in columnas),
+               model.id.label("existente"))
+        .outerjoin(model, and_(
+            model.tenant_id == tenant_id,
+            model.mes == mes,
+            model.anio == anio,
+            model.codigo_rubro == valores.c.codigo_rubro,
+        ))
+        .order_by(valores.c.codigo_rubro)
     )
-    rubros = hojas.scalars().all()
-    count = 0
-
-    for rubro in rubros:
-        mes_col = func.cast(func.substr(Recaudo.fecha, 6, 2), Integer)
-        recaudos = await db.execute(
-            select(func.coalesce(func.sum(Recaudo.valor), 0)).where(
-                and_(
-                    Recaudo.tenant_id == tenant_id,
-                    Recaudo.codigo_rubro == rubro.codigo,
-                    Recaudo.estado != "ANULADO",
-                    mes_col == mes_actual,
-                )
-            )
-        )
-        rec_mes = recaudos.scalar()
-
-        existing = await db.execute(
-            select(ConsolidacionMensualIngresos).where(
-                and_(
-                    ConsolidacionMensualIngresos.tenant_id == tenant_id,
-                    ConsolidacionMensualIngresos.mes == mes_actual,
-                    ConsolidacionMensualIngresos.anio == vigencia,
-                    ConsolidacionMensualIngresos.codigo_rubro == rubro.codigo,
-                )
-            )
-        )
-        row = existing.scalar_one_or_none()
-        if row:
-            row.recaudo_mes = rec_mes
-            row.fecha_consolidacion = date.today().isoformat()
-        else:
-            db.add(ConsolidacionMensualIngresos(
-                tenant_id=tenant_id, mes=mes_actual, anio=vigencia, codigo_rubro=rubro.codigo,
-                recaudo_mes=rec_mes,
-                fecha_consolidacion=date.today().isoformat(),
-            ))
-        count += 1
+    cambios = []
+    for fila in result.mappings():
+        nuevo = {columna: fila[columna] for columna in columnas}
+        anterior = {columna: fila[f"anterior_{columna}"] for columna in columnas} if fila["existente"] else None
+        if anterior != nuevo:
+            cambios.append({"codigo_rubro": fila["codigo_rubro"], "anterior": anterior, "nuevo": nuevo})
+    return cambios
+
 
+async def consolidar_mes(db: AsyncSession, tenant_id: str) -> tuple[int, int]:
+    mes_actual, vigencia = await _mes_y_vigencia(db, tenant_id)
+    count = await _consolidar(db, tenant_id, _GASTOS, mes_actual, vigencia)
     await db.commit()
     return mes_actual, count
 
 
-async def cierre_mes(db: AsyncSession, tenant_id: str) -> int:
-    await consolidar_mes(db, tenant_id)
-    await consolidar_mes_ingresos(db, tenant_id)
-    mes_actual = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
+async def consolidar_mes_ingresos(db: AsyncSession, tenant_id: str) -> tuple[int, int]:
+    mes_actual, vigencia = await _mes_y_vigencia(db, tenant_id)
+    count = await _consolidar(db, tenant_id, _INGRESOS, mes_actual, vigencia)
+    await db.commit()
+    return mes_actual, count
+
+
+async def simular_consolidacion(db: AsyncSession, tenant_id: str) -> dict:
+    """Diferencias entre la consolidación guardada del mes actual y la que se
+    guardaría ahora, sin escribir. Cada cambio es
+    {"codigo_rubro", "anterior": {columna: valor} | None, "nuevo": {columna: valor}}.
+    """
+    mes_actual, vigencia = await _mes_y_vigencia(db, tenant_id)
+    return {
+        "mes": mes_actual,
+        "gastos": await _diferencias(db, tenant_id, _GASTOS, mes_actual, vigencia),
+        "ingresos": await _diferencias(db, tenant_id, _INGRESOS, mes_actual, vigencia),
+    }
+
+
+async def cierre_mes(db: AsyncSession, tenant_id: str, mes_esperado: int | None = None) -> int:
+    """Consolida gastos e ingresos del mes actual y avanza mes_actual, en una transacción.
+
+    Con `mes_esperado`, falla si el mes actual del tenant es otro (p.ej. ya
+    se cerró), para no cerrar dos meses al repetir la operación.
+    """
+    mes_actual, vigencia = await _mes_y_vigencia(db, tenant_id)
+    if mes_esperado is not None and mes_actual != mes_esperado:
+        raise ValueError(f"El mes actual es {mes_actual}, no {mes_esperado}")
+    await _consolidar(db, tenant_id, _GASTOS, mes_actual, vigencia)
+    await _consolidar(db, tenant_id, _INGRESOS, mes_actual, vigencia)
     await config_svc.set_config(db, tenant_id, "mes_actual", str(mes_actual + 1))
     return mes_actual
@@ -0,0 +1,120 @@
+"""
+Mantenimiento de la tabla ejecucion_mensual (acumulado por rubro y mes).
+
+Los servicios de CDP, RP, obligación, pago, recaudo y reconocimiento llaman a
+`registrar_movimiento` al registrar, editar el valor o anular un documento.
+`reconstruir` recalcula la tabla desde los documentos y `verificar` reporta
+las diferencias sin modificar nada.
+"""
+
+from sqlalchemy import select, func, delete, insert, literal, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.ejecucion_mensual import EjecucionMensual
+from app.models.periodo import periodo_de_fecha
+from app.models.cdp import CDP
+from app.models.rp import RP
+from app.models.obligacion import Obligacion
+from app.models.pago import Pago
+from app.models.recaudo import Recaudo
+from app.models.reconocimiento import Reconocimiento
+from app.services import version_datos
+
+# documento -> (modelo, estado que excluye el documento de la ejecución)
+DOCUMENTOS = {
+    "CDP": (CDP, "ANULADO"),
+    "RP": (RP, "ANULADO"),
+    "OBLIGACION": (Obligacion, "ANULADA"),
+    "PAGO": (Pago, "ANULADO"),
+    "RECAUDO": (Recaudo, "ANULADO"),
+    "RECONOCIMIENTO": (Reconocimiento, "ANULADO"),
+}
+
+
+async def registrar_movimiento(
+    db: AsyncSession,
+    tenant_id: str,
+    documento: str,
+    codigo_rubro: str,
+    fecha: str,
+    delta: float,
+) -> None:
+    """Suma `delta` al acumulado del mes de `fecha` (YYYY-MM-DD) de forma atómica."""
+    if not delta:
+        return
+    anio, mes = divmod(periodo_de_fecha(fecha), 100)
+    stmt = dialect_insert(db, EjecucionMensual).values(
+        tenant_id=tenant_id,
+        documento=documento,
+        codigo_rubro=codigo_rubro,
+        anio=anio,
+        mes=mes,
+        valor=delta,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "documento", "codigo_rubro", "anio", "mes"],
+        set_={"valor": EjecucionMensual.valor + stmt.excluded.valor},
+    )
+    await db.execute(stmt)
+
+
+def _agrupado_desde_documentos(tenant_id: str, documento: str):
+    model, anulado = DOCUMENTOS[documento]
+    return (
+        select(
+            literal(tenant_id, String),
+            literal(documento, String),
+            model.codigo_rubro,
+            model.periodo // 100,
+            model.periodo % 100,
+            func.sum(model.valor),
+        )
+        .where(model.tenant_id == tenant_id, model.estado != anulado, model.periodo.is_not(None))
+        .group_by(model.codigo_rubro, model.periodo)
+    )
+
+
+async def reconstruir(db: AsyncSession, tenant_id: str) -> int:
+    """Recalcula el acumulado del tenant desde los documentos. No hace commit."""
+    await version_datos.incrementar(db, tenant_id)
+    await db.execute(delete(EjecucionMensual).where(EjecucionMensual.tenant_id == tenant_id))
+    for documento in DOCUMENTOS:
+        await db.execute(
+            insert(EjecucionMensual).from_select(
+                ["tenant_id", "documento", "codigo_rubro", "anio", "mes", "valor"],
+                _agrupado_desde_documentos(tenant_id, documento),
+            )
+        )
+    result = await db.execute(
+        select(func.count()).select_from(EjecucionMensual).where(EjecucionMensual.tenant_id == tenant_id)
+    )
+    return result.scalar()
+
+
+async def verificar(db: AsyncSession, tenant_id: str, tolerancia: float = 0.01) -> list[dict]:
+    """Compara el acumulado guardado con el calculado desde los documentos."""
+    esperado = {}
+    for documento in DOCUMENTOS:
+        result = await db.execute(_agrupado_desde_documentos(tenant_id, documento))
+        for _, doc, codigo, anio, mes, valor in result.all():
+            esperado[(doc, codigo, anio, mes)] = valor or 0
+
+    result = await db.execute(
+        select(
+            EjecucionMensual.documento, EjecucionMensual.codigo_rubro,
+            EjecucionMensual.anio, EjecucionMensual.mes, EjecucionMensual.valor,
+        ).where(EjecucionMensual.tenant_id == tenant_id)
+    )
+    guardado = {(doc, codigo, anio, mes): valor or 0 for doc, codigo, anio, mes, valor in result.all()}
+
+    diferencias = []
+    for clave in sorted(esperado.keys() | guardado.keys()):
+        e, g = esperado.get(clave, 0), guardado.get(clave, 0)
+        if abs(e - g) > tolerancia:
+            doc, codigo, anio, mes = clave
+            diferencias.append({
+                "documento": doc, "codigo_rubro": codigo, "anio": anio, "mes": mes,
+                "esperado": e, "guardado": g,
+            })
+    return diferencias
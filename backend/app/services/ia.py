@@ -10,7 +10,7 @@ from sqlalchemy import select, func, and_, Integer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
-from app.models.rubros import RubroGasto, RubroIngreso
+from app.models.rubros import RubroGasto
 from app.models.obligacion import Obligacion
 from app.models.pago import Pago
 from app.services import informes as informes_svc
@@ -45,15 +45,19 @@ def _get_client():
     return genai.Client(api_key=settings.GEMINI_API_KEY)
 
 
-async def _build_contexto_presupuestal(db: AsyncSession, tenant_id: str) -> str:
-    """Construye un texto con el estado actual del presupuesto para inyectar en el prompt."""
+async def _build_contexto_presupuestal(db: AsyncSession, tenant_id: str, resumen: dict | None = None) -> str:
+    """Construye un texto con el estado actual del presupuesto para inyectar en el prompt.
+
+    `resumen` es el de informes.get_resumen; si no se pasa, se calcula.
+    """
     cfg = await config_svc.get_all_config(db, tenant_id)
     nombre = cfg.get("institucion") or cfg.get("nombre_institucion") or "Institución Educativa"
     nit = cfg.get("nit_institucion") or cfg.get("nit") or "Sin NIT"
     vigencia = cfg.get("vigencia") or "2026"
     mes_actual = int(cfg.get("mes_actual") or "1")
 
-    resumen = await informes_svc.get_resumen(db, tenant_id)
+    if resumen is None:
+        resumen = await informes_svc.get_resumen(db, tenant_id)
 
     # Rubros hoja de gastos con sus % de ejecución
     rubros_res = await db.execute(
@@ -144,6 +148,7 @@ async def chat(
     tenant_id: str,
     mensaje: str,
     historial: list[dict],
+    resumen: dict | None = None,
 ) -> str:
     """Chat con Gemini inyectando contexto presupuestal actual."""
     from google.genai import types
@@ -151,7 +156,7 @@ async def chat(
     client = _get_client()
     settings = get_settings()
 
-    contexto = await _build_contexto_presupuestal(db, tenant_id)
+    contexto = await _build_contexto_presupuestal(db, tenant_id, resumen)
     system_instruction = SYSTEM_PROMPT_BASE + "\n\nCONTEXTO PRESUPUESTAL ACTUAL:\n" + contexto
 
     # Construir historial de conversación
@@ -186,10 +191,11 @@ async def chat(
     return response.text
 
 
-async def generar_alertas(db: AsyncSession, tenant_id: str) -> list[dict]:
+async def generar_alertas(db: AsyncSession, tenant_id: str, resumen: dict | None = None) -> list[dict]:
     """
     Detecta condiciones de alerta en el presupuesto y retorna lista estructurada.
     Lógica Python pura (sin llamada a Gemini para mayor rapidez y precisión).
+    `resumen` es el de informes.get_resumen; si no se pasa, se calcula.
     """
     cfg = await config_svc.get_all_config(db, tenant_id)
     mes_actual = int(cfg.get("mes_actual") or "1")
@@ -275,17 +281,10 @@ async def generar_alertas(db: AsyncSession, tenant_id: str) -> list[dict]:
         })
 
     # 3. Desequilibrio presupuestal (ingresos < gastos)
-    ing_res = await db.execute(
-        select(func.coalesce(func.sum(RubroIngreso.presupuesto_definitivo), 0))
-        .where(RubroIngreso.tenant_id == tenant_id, RubroIngreso.es_hoja == 1)
-    )
-    total_ing = float(ing_res.scalar() or 0)
-
-    gasto_res = await db.execute(
-        select(func.coalesce(func.sum(RubroGasto.apropiacion_definitiva), 0))
-        .where(RubroGasto.tenant_id == tenant_id, RubroGasto.es_hoja == 1)
-    )
-    total_gasto = float(gasto_res.scalar() or 0)
+    if resumen is None:
+        resumen = await informes_svc.get_resumen(db, tenant_id)
+    total_ing = float(resumen["ppto_ingresos"] or 0)
+    total_gasto = float(resumen["apropiacion"] or 0)
 
     diferencia = total_ing - total_gasto
     if diferencia < 0:
@@ -304,14 +303,14 @@ async def generar_alertas(db: AsyncSession, tenant_id: str) -> list[dict]:
     return alertas
 
 
-async def resumen_ejecutivo(db: AsyncSession, tenant_id: str) -> str:
+async def resumen_ejecutivo(db: AsyncSession, tenant_id: str, resumen: dict | None = None) -> str:
     """Genera un resumen ejecutivo narrativo con Gemini."""
     from google.genai import types
 
     client = _get_client()
     settings = get_settings()
 
-    contexto = await _build_contexto_presupuestal(db, tenant_id)
+    contexto = await _build_contexto_presupuestal(db, tenant_id, resumen)
 
     prompt = (
         "Con base en el siguiente contexto presupuestal, redacta un resumen ejecutivo "
@@ -7,6 +7,56 @@ from app.models.conceptos import Concepto
 from app.services import rubros_gastos, rubros_ingresos
 
 
+_SKIP_WORDS = {"total", "codigo", "cuenta", "presupuesto", "desequilibrio"}
+
+
+def _leer_hoja_catalogo(ws, col_valor: int) -> tuple[dict[str, tuple[str, float]], int]:
+    """Lee una hoja del catálogo: ({codigo: (cuenta, valor)}, filas válidas).
+
+    Columnas: B=código, C=cuenta, `col_valor`=apropiación/presupuesto definitivo.
+    Un código repetido conserva la última fila, como hacía db.merge fila a fila.
+    """
+    filas = {}
+    leidas = 0
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if len(row) < 3:
+            continue
+        codigo = str(row[1] or "").strip()
+        if not codigo or any(w in codigo.lower() for w in _SKIP_WORDS):
+            continue
+        cuenta = str(row[2] or "").strip()
+        if not cuenta or any(w in cuenta.lower() for w in _SKIP_WORDS):
+            continue
+        valor = float(row[col_valor] or 0) if len(row) > col_valor and row[col_valor] else 0
+        filas[codigo] = (cuenta, valor)
+        leidas += 1
+    return filas, leidas
+
+
+async def _upsert_catalogo(db: AsyncSession, tenant_id: str, svc, model, filas: dict[str, tuple[str, float]],
+                           campo_inicial: str, campo_definitivo: str) -> float:
+    """Inserta o actualiza {codigo: (cuenta, valor)} sobre el catálogo cargado una sola
+    vez, recalcula hojas y padres en la misma pasada y hace un único commit.
+
+    Retorna la suma de los valores importados que quedaron como hojas.
+    """
+    rubros = await svc.get_rubros(db, tenant_id)
+    por_codigo = {r.codigo: r for r in rubros}
+    for codigo, (cuenta, valor) in filas.items():
+        rubro = por_codigo.get(codigo)
+        if rubro is None:
+            rubro = model(tenant_id=tenant_id, codigo=codigo, **{c: 0 for c in svc._CAMPOS_APROPIACION})
+            db.add(rubro)
+            rubros.append(rubro)
+            por_codigo[codigo] = rubro
+        rubro.cuenta = cuenta
+        setattr(rubro, campo_inicial, valor)
+        setattr(rubro, campo_definitivo, valor)
+
+    await svc.recalcular_catalogo(db, tenant_id, rubros)
+    return sum(valor for codigo, (_, valor) in filas.items() if por_codigo[codigo].es_hoja == 1)
+
+
 async def importar_catalogo_excel(db: AsyncSession, tenant_id: str, file_content: bytes) -> dict:
     """Import budget catalog from Excel file."""
     import openpyxl
@@ -19,67 +69,18 @@ async def importar_catalogo_excel(db: AsyncSession, tenant_id: str, file_content
                 return wb[sheet_name]
         return None
 
-    skip_words = {"total", "codigo", "cuenta", "presupuesto", "desequilibrio"}
-    count_gastos = count_ingresos = 0
-    total_gastos = total_ingresos = 0
-
-    # Import gastos
+    # Primera pasada: leer ambas hojas
     ws_gastos = buscar_hoja("GASTOS")
-    if ws_gastos:
-        for row in ws_gastos.iter_rows(min_row=2):
-            codigo = str(row[1].value or "").strip()
-            if not codigo or any(w in codigo.lower() for w in skip_words):
-                continue
-            cuenta = str(row[2].value or "").strip()
-            if not cuenta or any(w in cuenta.lower() for w in skip_words):
-                continue
-            aprop_def = float(row[8].value or 0) if len(row) > 8 and row[8].value else 0
-
-            all_rubros = await rubros_gastos.get_rubros(db, tenant_id)
-            codigos = {r.codigo for r in all_rubros}
-            has_children = any(c.startswith(codigo + ".") for c in codigos)
-
-            rubro = RubroGasto(
-                tenant_id=tenant_id, codigo=codigo, cuenta=cuenta, es_hoja=0 if has_children else 1,
-                apropiacion_inicial=aprop_def, apropiacion_definitiva=aprop_def,
-            )
-            await db.merge(rubro)
-            count_gastos += 1
-            if not has_children:
-                total_gastos += aprop_def
-
-    # Import ingresos
     ws_ingresos = buscar_hoja("INGRESOS")
-    if ws_ingresos:
-        for row in ws_ingresos.iter_rows(min_row=2):
-            codigo = str(row[1].value or "").strip()
-            if not codigo or any(w in codigo.lower() for w in skip_words):
-                continue
-            cuenta = str(row[2].value or "").strip()
-            if not cuenta or any(w in cuenta.lower() for w in skip_words):
-                continue
-            ppto_def = float(row[6].value or 0) if len(row) > 6 and row[6].value else 0
+    gastos, count_gastos = _leer_hoja_catalogo(ws_gastos, 8) if ws_gastos else ({}, 0)
+    ingresos, count_ingresos = _leer_hoja_catalogo(ws_ingresos, 6) if ws_ingresos else ({}, 0)
+    wb.close()
 
-            all_rubros = await rubros_ingresos.get_rubros(db, tenant_id)
-            codigos = {r.codigo for r in all_rubros}
-            has_children = any(c.startswith(codigo + ".") for c in codigos)
-
-            rubro = RubroIngreso(
-                tenant_id=tenant_id, codigo=codigo, cuenta=cuenta, es_hoja=0 if has_children else 1,
-                presupuesto_inicial=ppto_def, presupuesto_definitivo=ppto_def,
-            )
-            await db.merge(rubro)
-            count_ingresos += 1
-            if not has_children:
-                total_ingresos += ppto_def
-
-    await db.commit()
-
-    # Recalculate leaf flags and propagate values to parent rubros
-    await rubros_gastos._recalcular_hojas(db, tenant_id)
-    await rubros_ingresos._recalcular_hojas(db, tenant_id)
-    await rubros_gastos.sincronizar_padres(db, tenant_id)
-    await rubros_ingresos.sincronizar_padres(db, tenant_id)
+    # Segunda pasada: upsert, hojas y totales de los padres
+    total_gastos = await _upsert_catalogo(
+        db, tenant_id, rubros_gastos, RubroGasto, gastos, "apropiacion_inicial", "apropiacion_definitiva")
+    total_ingresos = await _upsert_catalogo(
+        db, tenant_id, rubros_ingresos, RubroIngreso, ingresos, "presupuesto_inicial", "presupuesto_definitivo")
 
     return {
         "rubros_gastos": count_gastos,
@@ -90,53 +91,37 @@ async def importar_catalogo_excel(db: AsyncSession, tenant_id: str, file_content
     }
 
 
-async def importar_rubros_gastos_csv(db: AsyncSession, tenant_id: str, content: str, separador: str = ";") -> dict:
+def _leer_csv_catalogo(content: str, separador: str) -> tuple[dict[str, tuple[str, float]], int, list[str]]:
+    """Lee código;cuenta;valor: ({codigo: (cuenta, valor)}, filas válidas, errores)."""
     reader = csv.reader(io.StringIO(content), delimiter=separador)
+    filas = {}
     cantidad = 0
     errores = []
     for i, row in enumerate(reader, 1):
         try:
             if len(row) < 3:
                 continue
-            codigo, cuenta, aprop_ini = row[0].strip(), row[1].strip(), float(row[2].strip() or "0")
+            codigo, cuenta, valor = row[0].strip(), row[1].strip(), float(row[2].strip() or "0")
             if not codigo or not cuenta:
                 continue
-            rubro = RubroGasto(
-                tenant_id=tenant_id, codigo=codigo, cuenta=cuenta, es_hoja=1,
-                apropiacion_inicial=aprop_ini, apropiacion_definitiva=aprop_ini,
-            )
-            await db.merge(rubro)
+            filas[codigo] = (cuenta, valor)
             cantidad += 1
         except Exception as e:
             errores.append(f"Fila {i}: {e}")
-    await db.commit()
-    await rubros_gastos._recalcular_hojas(db, tenant_id)
-    await rubros_gastos.sincronizar_padres(db, tenant_id)
+    return filas, cantidad, errores
+
+
+async def importar_rubros_gastos_csv(db: AsyncSession, tenant_id: str, content: str, separador: str = ";") -> dict:
+    filas, cantidad, errores = _leer_csv_catalogo(content, separador)
+    await _upsert_catalogo(
+        db, tenant_id, rubros_gastos, RubroGasto, filas, "apropiacion_inicial", "apropiacion_definitiva")
     return {"cantidad": cantidad, "errores": errores}
 
 
 async def importar_rubros_ingresos_csv(db: AsyncSession, tenant_id: str, content: str, separador: str = ";") -> dict:
-    reader = csv.reader(io.StringIO(content), delimiter=separador)
-    cantidad = 0
-    errores = []
-    for i, row in enumerate(reader, 1):
-        try:
-            if len(row) < 3:
-                continue
-            codigo, cuenta, ppto_ini = row[0].strip(), row[1].strip(), float(row[2].strip() or "0")
-            if not codigo or not cuenta:
-                continue
-            rubro = RubroIngreso(
-                tenant_id=tenant_id, codigo=codigo, cuenta=cuenta, es_hoja=1,
-                presupuesto_inicial=ppto_ini, presupuesto_definitivo=ppto_ini,
-            )
-            await db.merge(rubro)
-            cantidad += 1
-        except Exception as e:
-            errores.append(f"Fila {i}: {e}")
-    await db.commit()
-    await rubros_ingresos._recalcular_hojas(db, tenant_id)
-    await rubros_ingresos.sincronizar_padres(db, tenant_id)
+    filas, cantidad, errores = _leer_csv_catalogo(content, separador)
+    await _upsert_catalogo(
+        db, tenant_id, rubros_ingresos, RubroIngreso, filas, "presupuesto_inicial", "presupuesto_definitivo")
     return {"cantidad": cantidad, "errores": errores}
 
 
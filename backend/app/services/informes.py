@@ -1,87 +1,70 @@
-from sqlalchemy import select, func, and_, Integer
+from sqlalchemy import select, func, case, literal, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+import asyncio
 import csv
 import io
-import zipfile
+import tempfile
+from datetime import date, timedelta
+from collections.abc import Callable
 from app.models.rubros import RubroGasto, RubroIngreso
 from app.models.cdp import CDP
 from app.models.rp import RP
 from app.models.obligacion import Obligacion
 from app.models.pago import Pago
 from app.models.recaudo import Recaudo
-from app.models.reconocimiento import Reconocimiento
+from app.models.terceros import Tercero
 from app.models.cuentas_bancarias import CuentaBancaria
 from app.models.modificaciones import ModificacionPresupuestal, DetalleModificacion
-from app.models.pac import PAC
+from app.models.periodo import rango_periodo
 from app.services import config as config_svc
+from app.services import agregacion, arbol_rubros
+from app.services.matriz_mensual import matriz_pac, matriz_pagos
 
 
 def _nivel(codigo: str) -> int:
     return codigo.count(".") + 1
 
 
-async def _sum_by_rubro_and_period(db, tenant_id, model, campo_valor, codigo_rubro,
-                                    campo_estado, estado_excluir, mes_antes=None, mes_desde=None, mes_hasta=None):
-    """Helper to sum values by rubro optionally filtering by month period."""
-    mes_col = func.cast(func.substr(model.fecha, 6, 2), Integer)
-    conditions = [model.tenant_id == tenant_id, model.codigo_rubro == codigo_rubro]
-    if campo_estado:
-        conditions.append(getattr(model, campo_estado) != estado_excluir)
-    if mes_antes is not None:
-        conditions.append(mes_col < mes_antes)
-    if mes_desde is not None:
-        conditions.append(mes_col >= mes_desde)
-    if mes_hasta is not None:
-        conditions.append(mes_col <= mes_hasta)
-
-    result = await db.execute(
-        select(func.coalesce(func.sum(getattr(model, campo_valor)), 0)).where(and_(*conditions))
-    )
-    return result.scalar()
+async def resumen_rubros(db: AsyncSession, tenant_id: str, codigos: list[str] | None = None,
+                         mes_inicio: int = 1, mes_fin: int = 12) -> dict:
+    """Resumen de varios rubros de gastos (todos si `codigos` es None) con una
+    consulta agrupada por documento y la totalización del árbol en memoria.
+
+    Retorna {"rubros": [resumen, ...], "no_encontrados": [codigo, ...]} en el
+    orden de `codigos` (o del catálogo).
+    """
+    arbol = await arbol_rubros.cargar_arbol(db, tenant_id, RubroGasto)
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
+
+    # Hojas: sus propios documentos. Padres: suma de sus hojas.
+    disp = await agregacion.sumas_anterior_periodo(db, tenant_id, "CDP", vigencia, mes_inicio, mes_fin)
+    comp = await agregacion.sumas_anterior_periodo(db, tenant_id, "RP", vigencia, mes_inicio, mes_fin)
+    obl = await agregacion.sumas_anterior_periodo(db, tenant_id, "OBLIGACION", vigencia, mes_inicio, mes_fin)
+    pago = await agregacion.sumas_anterior_periodo(db, tenant_id, "PAGO", vigencia, mes_inicio, mes_fin)
+    totales = arbol.acumular({
+        h.codigo: (*disp.get(h.codigo, (0, 0)), *comp.get(h.codigo, (0, 0)),
+                   *obl.get(h.codigo, (0, 0)), *pago.get(h.codigo, (0, 0)))
+        for h in arbol.hojas
+    })
+
+    resumenes = []
+    no_encontrados = []
+    for codigo in (codigos if codigos is not None else [r.codigo for r in arbol.rubros]):
+        rubro = arbol.por_codigo.get(codigo)
+        if rubro is None:
+            no_encontrados.append(codigo)
+        else:
+            resumenes.append(_resumen_rubro(rubro, totales.get(codigo, (0,) * 8)))
+    return {"rubros": resumenes, "no_encontrados": no_encontrados}
 
 
-async def resumen_rubro(db: AsyncSession, tenant_id: str, codigo_rubro: str,
-                        mes_inicio: int = 1, mes_fin: int = 12) -> dict:
-    rubro = await db.execute(select(RubroGasto).where(RubroGasto.tenant_id == tenant_id, RubroGasto.codigo == codigo_rubro))
-    rubro = rubro.scalar_one_or_none()
-    if not rubro:
-        raise ValueError(f"Rubro {codigo_rubro} no encontrado")
-
-    # If parent, aggregate children
-    if rubro.es_hoja == 0:
-        children = await db.execute(
-            select(RubroGasto).where(
-                and_(RubroGasto.tenant_id == tenant_id, RubroGasto.codigo.like(f"{codigo_rubro}.%"), RubroGasto.es_hoja == 1)
-            )
-        )
-        codigos = [c.codigo for c in children.scalars().all()]
-    else:
-        codigos = [codigo_rubro]
-
-    totals = {
-        "disp_anteriores": 0, "disp_periodo": 0,
-        "comp_anteriores": 0, "comp_periodo": 0,
-        "obl_anteriores": 0, "obl_periodo": 0,
-        "pago_anteriores": 0, "pago_periodo": 0,
-    }
-
-    for cod in codigos:
-        totals["disp_anteriores"] += await _sum_by_rubro_and_period(
-            db, tenant_id, CDP, "valor", cod, "estado", "ANULADO", mes_antes=mes_inicio)
-        totals["disp_periodo"] += await _sum_by_rubro_and_period(
-            db, tenant_id, CDP, "valor", cod, "estado", "ANULADO", mes_desde=mes_inicio, mes_hasta=mes_fin)
-        totals["comp_anteriores"] += await _sum_by_rubro_and_period(
-            db, tenant_id, RP, "valor", cod, "estado", "ANULADO", mes_antes=mes_inicio)
-        totals["comp_periodo"] += await _sum_by_rubro_and_period(
-            db, tenant_id, RP, "valor", cod, "estado", "ANULADO", mes_desde=mes_inicio, mes_hasta=mes_fin)
-        totals["obl_anteriores"] += await _sum_by_rubro_and_period(
-            db, tenant_id, Obligacion, "valor", cod, "estado", "ANULADA", mes_antes=mes_inicio)
-        totals["obl_periodo"] += await _sum_by_rubro_and_period(
-            db, tenant_id, Obligacion, "valor", cod, "estado", "ANULADA", mes_desde=mes_inicio, mes_hasta=mes_fin)
-        totals["pago_anteriores"] += await _sum_by_rubro_and_period(
-            db, tenant_id, Pago, "valor", cod, "estado", "ANULADO", mes_antes=mes_inicio)
-        totals["pago_periodo"] += await _sum_by_rubro_and_period(
-            db, tenant_id, Pago, "valor", cod, "estado", "ANULADO", mes_desde=mes_inicio, mes_hasta=mes_fin)
+def _resumen_rubro(rubro, vector: tuple) -> dict:
+    totals = dict(zip(
+        ["disp_anteriores", "disp_periodo", "comp_anteriores", "comp_periodo",
+         "obl_anteriores", "obl_periodo", "pago_anteriores", "pago_periodo"],
+        vector,
+    ))
 
     total_disp = totals["disp_anteriores"] + totals["disp_periodo"]
     total_comp = totals["comp_anteriores"] + totals["comp_periodo"]
@@ -116,32 +99,33 @@ async def resumen_rubro(db: AsyncSession, tenant_id: str, codigo_rubro: str,
     }
 
 
+async def resumen_rubro(db: AsyncSession, tenant_id: str, codigo_rubro: str,
+                        mes_inicio: int = 1, mes_fin: int = 12) -> dict:
+    lote = await resumen_rubros(db, tenant_id, [codigo_rubro], mes_inicio, mes_fin)
+    if not lote["rubros"]:
+        raise ValueError(f"Rubro {codigo_rubro} no encontrado")
+    return lote["rubros"][0]
+
+
 async def informe_ejecucion_gastos(db: AsyncSession, tenant_id: str, mes_consulta: int | None = None) -> list[dict]:
     if mes_consulta is None:
         mes_consulta = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
 
-    rubros_result = await db.execute(select(RubroGasto).where(RubroGasto.tenant_id == tenant_id).order_by(RubroGasto.codigo))
-    rubros = rubros_result.scalars().all()
-    filas = []
+    arbol = await arbol_rubros.cargar_arbol(db, tenant_id, RubroGasto)
+    rubros = arbol.rubros
 
-    for r in rubros:
-        if r.es_hoja == 1:
-            codigos = [r.codigo]
-        else:
-            children = await db.execute(
-                select(RubroGasto).where(
-                    and_(RubroGasto.tenant_id == tenant_id, RubroGasto.codigo.like(f"{r.codigo}.%"), RubroGasto.es_hoja == 1)
-                )
-            )
-            codigos = [c.codigo for c in children.scalars().all()]
-
-        comp_ant = comp_mes = pago_ant = pago_mes = 0
-        for cod in codigos:
-            comp_ant += await _sum_by_rubro_and_period(db, tenant_id, RP, "valor", cod, "estado", "ANULADO", mes_antes=mes_consulta)
-            comp_mes += await _sum_by_rubro_and_period(db, tenant_id, RP, "valor", cod, "estado", "ANULADO", mes_desde=mes_consulta, mes_hasta=mes_consulta)
-            pago_ant += await _sum_by_rubro_and_period(db, tenant_id, Pago, "valor", cod, "estado", "ANULADO", mes_antes=mes_consulta)
-            pago_mes += await _sum_by_rubro_and_period(db, tenant_id, Pago, "valor", cod, "estado", "ANULADO", mes_desde=mes_consulta, mes_hasta=mes_consulta)
+    # Una consulta agrupada por tabla; los padres se totalizan en memoria
+    comp = await agregacion.sumas_anterior_periodo(db, tenant_id, "RP", vigencia, mes_consulta)
+    pago = await agregacion.sumas_anterior_periodo(db, tenant_id, "PAGO", vigencia, mes_consulta)
+    totales = arbol.acumular({
+        h.codigo: (*comp.get(h.codigo, (0, 0)), *pago.get(h.codigo, (0, 0)))
+        for h in arbol.hojas
+    })
 
+    filas = []
+    for r in rubros:
+        comp_ant, comp_mes, pago_ant, pago_mes = totales.get(r.codigo, (0, 0, 0, 0))
         comp_acum = comp_ant + comp_mes
         pago_acum = pago_ant + pago_mes
 
@@ -172,30 +156,21 @@ async def informe_ejecucion_gastos(db: AsyncSession, tenant_id: str, mes_consult
 async def informe_ejecucion_ingresos(db: AsyncSession, tenant_id: str, mes_consulta: int | None = None) -> list[dict]:
     if mes_consulta is None:
         mes_consulta = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
 
-    rubros_result = await db.execute(select(RubroIngreso).where(RubroIngreso.tenant_id == tenant_id).order_by(RubroIngreso.codigo))
-    rubros = rubros_result.scalars().all()
-    filas = []
-
-    for r in rubros:
-        if r.es_hoja == 1:
-            codigos = [r.codigo]
-        else:
-            children = await db.execute(
-                select(RubroIngreso).where(
-                    and_(RubroIngreso.tenant_id == tenant_id, RubroIngreso.codigo.like(f"{r.codigo}.%"), RubroIngreso.es_hoja == 1)
-                )
-            )
-            codigos = [c.codigo for c in children.scalars().all()]
+    arbol = await arbol_rubros.cargar_arbol(db, tenant_id, RubroIngreso)
+    rubros = arbol.rubros
 
-        rec_ant = rec_mes = 0
-        recon_ant = recon_mes = 0
-        for cod in codigos:
-            rec_ant   += await _sum_by_rubro_and_period(db, tenant_id, Recaudo,        "valor", cod, "estado", "ANULADO",  mes_antes=mes_consulta)
-            rec_mes   += await _sum_by_rubro_and_period(db, tenant_id, Recaudo,        "valor", cod, "estado", "ANULADO",  mes_desde=mes_consulta, mes_hasta=mes_consulta)
-            recon_ant += await _sum_by_rubro_and_period(db, tenant_id, Reconocimiento, "valor", cod, "estado", "ANULADO",  mes_antes=mes_consulta)
-            recon_mes += await _sum_by_rubro_and_period(db, tenant_id, Reconocimiento, "valor", cod, "estado", "ANULADO",  mes_desde=mes_consulta, mes_hasta=mes_consulta)
+    rec = await agregacion.sumas_anterior_periodo(db, tenant_id, "RECAUDO", vigencia, mes_consulta)
+    recon = await agregacion.sumas_anterior_periodo(db, tenant_id, "RECONOCIMIENTO", vigencia, mes_consulta)
+    totales = arbol.acumular({
+        h.codigo: (*rec.get(h.codigo, (0, 0)), *recon.get(h.codigo, (0, 0)))
+        for h in arbol.hojas
+    })
 
+    filas = []
+    for r in rubros:
+        rec_ant, rec_mes, recon_ant, recon_mes = totales.get(r.codigo, (0, 0, 0, 0))
         rec_acum   = rec_ant   + rec_mes
         recon_acum = recon_ant + recon_mes
 
@@ -220,179 +195,226 @@ async def informe_ejecucion_ingresos(db: AsyncSession, tenant_id: str, mes_consu
     return filas
 
 
-async def generar_tarjeta(db: AsyncSession, tenant_id: str, codigo_rubro: str) -> dict:
+def _movimientos_tarjeta(tenant_id: str, codigo_rubro: str):
+    """CDP, RP, obligaciones y pagos no anulados del rubro como un solo UNION ALL
+    con columnas comunes; `orden` desempata por tipo dentro de una fecha."""
+    cero = literal(0)
+
+    def _documento(model, tipo, orden, anulado, concepto, columna_valor, con_tercero=True):
+        valores = [model.valor if columna_valor == c else cero for c in ("v_cdp", "v_rp", "v_obl", "v_pago")]
+        stmt = select(
+            model.fecha.label("fecha"),
+            literal(tipo).label("tipo"),
+            literal(orden).label("orden"),
+            model.numero.label("numero"),
+            (model.nit_tercero if con_tercero else literal("")).label("nit"),
+            (func.coalesce(Tercero.nombre, "") if con_tercero else literal("")).label("tercero"),
+            concepto.label("concepto"),
+            *[v.label(c) for v, c in zip(valores, ("v_cdp", "v_rp", "v_obl", "v_pago"))],
+        )
+        if con_tercero:
+            stmt = stmt.outerjoin(Tercero, Tercero.nit == model.nit_tercero)
+        return stmt.where(model.tenant_id == tenant_id, model.codigo_rubro == codigo_rubro, model.estado != anulado)
+
+    return union_all(
+        _documento(CDP, "CDP", 0, "ANULADO", CDP.objeto, "v_cdp", con_tercero=False),
+        _documento(RP, "RP", 1, "ANULADO", RP.objeto, "v_rp"),
+        _documento(Obligacion, "OBL", 2, "ANULADA", Obligacion.factura, "v_obl"),
+        _documento(Pago, "PAGO", 3, "ANULADO", Pago.concepto, "v_pago"),
+    ).subquery()
+
+
+async def generar_tarjeta(
+    db: AsyncSession,
+    tenant_id: str,
+    codigo_rubro: str,
+    desde: str | None = None,
+    hasta: str | None = None,
+    pagina: int | None = None,
+    tamano: int = 200,
+) -> dict:
+    """Tarjeta presupuestal del rubro: movimientos ordenados por fecha y tipo
+    con saldos acumulados (funciones de ventana sobre un UNION ALL).
+
+    `desde`/`hasta` (AAAA-MM-DD) limitan los movimientos retornados y `pagina`
+    los pagina; los saldos de cada fila siempre incluyen todos los movimientos
+    anteriores, estén o no en el rango.
+    """
     rubro = await db.execute(select(RubroGasto).where(RubroGasto.tenant_id == tenant_id, RubroGasto.codigo == codigo_rubro))
     rubro = rubro.scalar_one_or_none()
     if not rubro:
         raise ValueError(f"Rubro {codigo_rubro} no encontrado")
 
-    movimientos = []
-
-    cdps = await db.execute(
-        select(CDP).where(and_(CDP.tenant_id == tenant_id, CDP.codigo_rubro == codigo_rubro, CDP.estado != "ANULADO"))
-        .order_by(CDP.fecha)
+    mov = _movimientos_tarjeta(tenant_id, codigo_rubro)
+    acumulado = {"order_by": (mov.c.fecha, mov.c.orden, mov.c.numero), "rows": (None, 0)}
+    acum_cdp = func.sum(mov.c.v_cdp).over(**acumulado)
+    acum_rp = func.sum(mov.c.v_rp).over(**acumulado)
+    acum_obl = func.sum(mov.c.v_obl).over(**acumulado)
+    acum_pago = func.sum(mov.c.v_pago).over(**acumulado)
+    con_saldos = select(
+        mov,
+        (literal(rubro.apropiacion_definitiva) - acum_cdp).label("saldo_disponible"),
+        (acum_cdp - acum_rp).label("saldo_por_comprometer"),
+        (acum_rp - acum_obl).label("saldo_por_obligar"),
+        (acum_obl - acum_pago).label("saldo_por_pagar"),
+    ).subquery()
+
+    stmt = select(con_saldos, func.count().over().label("total")).order_by(
+        con_saldos.c.fecha, con_saldos.c.orden, con_saldos.c.numero,
     )
-    for c in cdps.scalars().all():
-        movimientos.append({
-            "fecha": c.fecha, "tipo": "CDP", "numero": c.numero,
-            "nit": "", "tercero": "", "concepto": c.objeto,
-            "v_cdp": c.valor, "v_rp": 0, "v_obl": 0, "v_pago": 0,
-        })
+    if desde:
+        stmt = stmt.where(con_saldos.c.fecha >= desde)
+    if hasta:
+        stmt = stmt.where(con_saldos.c.fecha <= hasta)
+    if pagina is not None:
+        stmt = stmt.limit(tamano).offset((pagina - 1) * tamano)
 
-    rps = await db.execute(
-        select(RP).where(and_(RP.tenant_id == tenant_id, RP.codigo_rubro == codigo_rubro, RP.estado != "ANULADO"))
-        .order_by(RP.fecha)
-    )
-    for r in rps.scalars().all():
-        tercero = r.tercero
-        movimientos.append({
-            "fecha": r.fecha, "tipo": "RP", "numero": r.numero,
-            "nit": r.nit_tercero, "tercero": tercero.nombre if tercero else "",
-            "concepto": r.objeto,
-            "v_cdp": 0, "v_rp": r.valor, "v_obl": 0, "v_pago": 0,
-        })
-
-    obls = await db.execute(
-        select(Obligacion).where(
-            and_(Obligacion.tenant_id == tenant_id, Obligacion.codigo_rubro == codigo_rubro, Obligacion.estado != "ANULADA")
-        ).order_by(Obligacion.fecha)
-    )
-    for o in obls.scalars().all():
-        tercero = o.tercero
-        movimientos.append({
-            "fecha": o.fecha, "tipo": "OBL", "numero": o.numero,
-            "nit": o.nit_tercero, "tercero": tercero.nombre if tercero else "",
-            "concepto": o.factura,
-            "v_cdp": 0, "v_rp": 0, "v_obl": o.valor, "v_pago": 0,
-        })
-
-    pagos = await db.execute(
-        select(Pago).where(
-            and_(Pago.tenant_id == tenant_id, Pago.codigo_rubro == codigo_rubro, Pago.estado != "ANULADO")
-        ).order_by(Pago.fecha)
-    )
-    for p in pagos.scalars().all():
-        tercero = p.tercero
+    movimientos = []
+    total = 0
+    for fila in (await db.execute(stmt)).mappings():
+        total = fila["total"]
         movimientos.append({
-            "fecha": p.fecha, "tipo": "PAGO", "numero": p.numero,
-            "nit": p.nit_tercero, "tercero": tercero.nombre if tercero else "",
-            "concepto": p.concepto,
-            "v_cdp": 0, "v_rp": 0, "v_obl": 0, "v_pago": p.valor,
+            "fecha": fila["fecha"], "tipo": fila["tipo"], "numero": fila["numero"],
+            "nit": fila["nit"], "tercero": fila["tercero"], "concepto": fila["concepto"],
+            "v_cdp": fila["v_cdp"], "v_rp": fila["v_rp"], "v_obl": fila["v_obl"], "v_pago": fila["v_pago"],
+            "saldo_disponible": fila["saldo_disponible"],
+            "saldo_por_comprometer": fila["saldo_por_comprometer"],
+            "saldo_por_obligar": fila["saldo_por_obligar"],
+            "saldo_por_pagar": fila["saldo_por_pagar"],
         })
 
-    movimientos.sort(key=lambda m: (m["fecha"], ["CDP", "RP", "OBL", "PAGO"].index(m["tipo"])))
-
-    return {
+    resultado = {
         "rubro": {
             "codigo": rubro.codigo, "cuenta": rubro.cuenta,
             "apropiacion_definitiva": rubro.apropiacion_definitiva,
         },
         "movimientos": movimientos,
     }
+    if pagina is not None:
+        if not movimientos and pagina > 1:
+            # Página fuera de rango: el total de la ventana no llega sin filas
+            total = (await db.execute(
+                select(func.count()).select_from(stmt.limit(None).offset(None).subquery())
+            )).scalar()
+        resultado.update({"pagina": pagina, "tamano": tamano, "total": total})
+    return resultado
 
 
-async def informe_cadena_presupuestal(db: AsyncSession, tenant_id: str) -> list[dict]:
-    cdps = await db.execute(
-        select(CDP).where(CDP.tenant_id == tenant_id, CDP.estado != "ANULADO").order_by(CDP.numero)
-    )
-    resultado = []
+async def iter_cadena_presupuestal(db: AsyncSession, tenant_id: str):
+    """Genera la cadena CDP → RP → Obligación → Pago un CDP a la vez.
 
-    for cdp in cdps.scalars().all():
-        rps_data = []
-        rps = await db.execute(
-            select(RP).where(and_(RP.tenant_id == tenant_id, RP.cdp_numero == cdp.numero, RP.estado != "ANULADO"))
-            .order_by(RP.numero)
-        )
-        for rp in rps.scalars().all():
-            obls_data = []
-            obls = await db.execute(
-                select(Obligacion).where(
-                    and_(Obligacion.tenant_id == tenant_id, Obligacion.rp_numero == rp.numero, Obligacion.estado != "ANULADA")
-                ).order_by(Obligacion.numero)
-            )
-            for obl in obls.scalars().all():
-                pagos_data = []
-                pagos = await db.execute(
-                    select(Pago).where(
-                        and_(Pago.tenant_id == tenant_id, Pago.obligacion_numero == obl.numero, Pago.estado != "ANULADO")
-                    ).order_by(Pago.numero)
-                )
-                for pag in pagos.scalars().all():
-                    pagos_data.append({
-                        "numero": pag.numero, "fecha": pag.fecha,
-                        "valor": pag.valor, "concepto": pag.concepto,
-                    })
-                obls_data.append({
-                    "obligacion": {
-                        "numero": obl.numero, "fecha": obl.fecha,
-                        "valor": obl.valor, "factura": obl.factura, "estado": obl.estado,
-                    },
-                    "pagos": pagos_data,
-                })
-            rps_data.append({
-                "rp": {
-                    "numero": rp.numero, "fecha": rp.fecha,
-                    "nit_tercero": rp.nit_tercero, "valor": rp.valor,
-                    "objeto": rp.objeto, "estado": rp.estado,
-                },
-                "obligaciones": obls_data,
-            })
-        resultado.append({
-            "cdp": {
-                "numero": cdp.numero, "fecha": cdp.fecha,
-                "codigo_rubro": cdp.codigo_rubro, "valor": cdp.valor,
-                "objeto": cdp.objeto, "estado": cdp.estado,
+    RPs, obligaciones y pagos se leen con una consulta plana cada uno y se
+    indexan por su documento padre; los CDPs se recorren en streaming.
+    """
+    rps_por_cdp: dict[int, list[dict]] = {}
+    rps_res = await db.execute(
+        select(RP.numero, RP.cdp_numero, RP.fecha, RP.nit_tercero, RP.valor, RP.objeto, RP.estado)
+        .where(RP.tenant_id == tenant_id, RP.estado != "ANULADO")
+        .order_by(RP.numero)
+    )
+    for rp in rps_res.all():
+        rps_por_cdp.setdefault(rp.cdp_numero, []).append({
+            "rp": {
+                "numero": rp.numero, "fecha": rp.fecha,
+                "nit_tercero": rp.nit_tercero, "valor": rp.valor,
+                "objeto": rp.objeto, "estado": rp.estado,
             },
-            "rps": rps_data,
+            "obligaciones": [],
         })
 
-    return resultado
-
-
-async def get_resumen(db: AsyncSession, tenant_id: str) -> dict:
-    # Total apropiacion
-    result = await db.execute(
-        select(func.coalesce(func.sum(RubroGasto.apropiacion_definitiva), 0))
-        .where(RubroGasto.tenant_id == tenant_id, RubroGasto.es_hoja == 1)
+    obls_por_rp: dict[int, list[dict]] = {}
+    obls_res = await db.execute(
+        select(Obligacion.numero, Obligacion.rp_numero, Obligacion.fecha, Obligacion.valor,
+               Obligacion.factura, Obligacion.estado)
+        .where(Obligacion.tenant_id == tenant_id, Obligacion.estado != "ANULADA")
+        .order_by(Obligacion.numero)
     )
-    total_aprop = result.scalar()
+    for obl in obls_res.all():
+        obls_por_rp.setdefault(obl.rp_numero, []).append({
+            "obligacion": {
+                "numero": obl.numero, "fecha": obl.fecha,
+                "valor": obl.valor, "factura": obl.factura, "estado": obl.estado,
+            },
+            "pagos": [],
+        })
 
-    # Total CDPs
-    result = await db.execute(
-        select(func.coalesce(func.sum(CDP.valor), 0)).where(CDP.tenant_id == tenant_id, CDP.estado != "ANULADO")
+    pagos_por_obl: dict[int, list[dict]] = {}
+    pagos_res = await db.execute(
+        select(Pago.numero, Pago.obligacion_numero, Pago.fecha, Pago.valor, Pago.concepto)
+        .where(Pago.tenant_id == tenant_id, Pago.estado != "ANULADO")
+        .order_by(Pago.numero)
     )
-    total_cdp = result.scalar()
+    for pag in pagos_res.all():
+        pagos_por_obl.setdefault(pag.obligacion_numero, []).append({
+            "numero": pag.numero, "fecha": pag.fecha,
+            "valor": pag.valor, "concepto": pag.concepto,
+        })
 
-    # Total comprometido (RP)
-    result = await db.execute(
-        select(func.coalesce(func.sum(RP.valor), 0)).where(RP.tenant_id == tenant_id, RP.estado != "ANULADO")
+    for rps in rps_por_cdp.values():
+        for rp_data in rps:
+            obls = obls_por_rp.get(rp_data["rp"]["numero"], [])
+            for obl_data in obls:
+                obl_data["pagos"] = pagos_por_obl.get(obl_data["obligacion"]["numero"], [])
+            rp_data["obligaciones"] = obls
+
+    cdps = await db.stream(
+        select(CDP.numero, CDP.fecha, CDP.codigo_rubro, CDP.valor, CDP.objeto, CDP.estado)
+        .where(CDP.tenant_id == tenant_id, CDP.estado != "ANULADO")
+        .order_by(CDP.numero)
     )
-    total_comp = result.scalar()
+    async for cdp in cdps:
+        yield {
+            "cdp": {
+                "numero": cdp.numero, "fecha": cdp.fecha,
+                "codigo_rubro": cdp.codigo_rubro, "valor": cdp.valor,
+                "objeto": cdp.objeto, "estado": cdp.estado,
+            },
+            "rps": rps_por_cdp.get(cdp.numero, []),
+        }
 
-    # Total obligado
-    result = await db.execute(
-        select(func.coalesce(func.sum(Obligacion.valor), 0)).where(Obligacion.tenant_id == tenant_id, Obligacion.estado != "ANULADA")
-    )
-    total_obl = result.scalar()
 
-    # Total pagado
-    result = await db.execute(
-        select(func.coalesce(func.sum(Pago.valor), 0)).where(Pago.tenant_id == tenant_id, Pago.estado != "ANULADO")
+async def informe_cadena_presupuestal(db: AsyncSession, tenant_id: str) -> list[dict]:
+    return [item async for item in iter_cadena_presupuestal(db, tenant_id)]
+
+
+def _total(clave: str, columna, *condiciones):
+    return select(
+        literal(clave).label("clave"),
+        func.coalesce(func.sum(columna), 0).label("total"),
+    ).where(*condiciones)
+
+
+async def totales_presupuestales(db: AsyncSession, tenant_id: str) -> dict[str, float]:
+    """Los siete totales del resumen en una sola consulta (UNION ALL de agregados).
+
+    apropiacion y ppto_ingresos suman las hojas del catálogo; los demás, los
+    documentos no anulados.
+    """
+    stmt = union_all(
+        _total("apropiacion", RubroGasto.apropiacion_definitiva,
+               RubroGasto.tenant_id == tenant_id, RubroGasto.es_hoja == 1),
+        _total("cdp", CDP.valor, CDP.tenant_id == tenant_id, CDP.estado != "ANULADO"),
+        _total("comprometido", RP.valor, RP.tenant_id == tenant_id, RP.estado != "ANULADO"),
+        _total("obligado", Obligacion.valor, Obligacion.tenant_id == tenant_id, Obligacion.estado != "ANULADA"),
+        _total("pagado", Pago.valor, Pago.tenant_id == tenant_id, Pago.estado != "ANULADO"),
+        _total("ppto_ingresos", RubroIngreso.presupuesto_definitivo,
+               RubroIngreso.tenant_id == tenant_id, RubroIngreso.es_hoja == 1),
+        _total("recaudado", Recaudo.valor, Recaudo.tenant_id == tenant_id, Recaudo.estado != "ANULADO"),
     )
-    total_pag = result.scalar()
+    return dict((await db.execute(stmt)).all())
 
-    # Total ingresos
-    result = await db.execute(
-        select(func.coalesce(func.sum(RubroIngreso.presupuesto_definitivo), 0))
-        .where(RubroIngreso.tenant_id == tenant_id, RubroIngreso.es_hoja == 1)
-    )
-    total_ing = result.scalar()
 
-    # Total recaudado
-    result = await db.execute(
-        select(func.coalesce(func.sum(Recaudo.valor), 0)).where(Recaudo.tenant_id == tenant_id, Recaudo.estado != "ANULADO")
-    )
-    total_rec = result.scalar()
+async def get_resumen(db: AsyncSession, tenant_id: str) -> dict:
+    """KPIs del tablero en una consulta. Lo reutilizan verificar_equilibrio y
+    los servicios de IA (contexto y alertas) en vez de recalcular los totales."""
+    totales = await totales_presupuestales(db, tenant_id)
+    total_aprop = totales["apropiacion"]
+    total_cdp = totales["cdp"]
+    total_comp = totales["comprometido"]
+    total_obl = totales["obligado"]
+    total_pag = totales["pagado"]
+    total_ing = totales["ppto_ingresos"]
+    total_rec = totales["recaudado"]
 
     def _pct(parte, total):
         return round(float(parte) / float(total) * 100, 1) if total and total > 0 else 0.0
@@ -422,30 +444,22 @@ async def informe_sia_gastos(db: AsyncSession, tenant_id: str, mes_consulta: int
     Incluye Compromisos (RP), Obligaciones y Pagos con desagregación anterior/período/acumulado."""
     if mes_consulta is None:
         mes_consulta = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
 
-    rubros_result = await db.execute(select(RubroGasto).where(RubroGasto.tenant_id == tenant_id).order_by(RubroGasto.codigo))
-    rubros = rubros_result.scalars().all()
-    filas = []
+    arbol = await arbol_rubros.cargar_arbol(db, tenant_id, RubroGasto)
+    rubros = arbol.rubros
 
-    for r in rubros:
-        if r.es_hoja == 1:
-            codigos = [r.codigo]
-        else:
-            children = await db.execute(
-                select(RubroGasto).where(
-                    and_(RubroGasto.tenant_id == tenant_id, RubroGasto.codigo.like(f"{r.codigo}.%"), RubroGasto.es_hoja == 1)
-                )
-            )
-            codigos = [c.codigo for c in children.scalars().all()]
+    comp = await agregacion.sumas_anterior_periodo(db, tenant_id, "RP", vigencia, mes_consulta)
+    obl = await agregacion.sumas_anterior_periodo(db, tenant_id, "OBLIGACION", vigencia, mes_consulta)
+    pago = await agregacion.sumas_anterior_periodo(db, tenant_id, "PAGO", vigencia, mes_consulta)
+    totales = arbol.acumular({
+        h.codigo: (*comp.get(h.codigo, (0, 0)), *obl.get(h.codigo, (0, 0)), *pago.get(h.codigo, (0, 0)))
+        for h in arbol.hojas
+    })
 
-        comp_ant = comp_mes = obl_ant = obl_mes = pago_ant = pago_mes = 0
-        for cod in codigos:
-            comp_ant += await _sum_by_rubro_and_period(db, tenant_id, RP, "valor", cod, "estado", "ANULADO", mes_antes=mes_consulta)
-            comp_mes += await _sum_by_rubro_and_period(db, tenant_id, RP, "valor", cod, "estado", "ANULADO", mes_desde=mes_consulta, mes_hasta=mes_consulta)
-            obl_ant  += await _sum_by_rubro_and_period(db, tenant_id, Obligacion, "valor", cod, "estado", "ANULADA", mes_antes=mes_consulta)
-            obl_mes  += await _sum_by_rubro_and_period(db, tenant_id, Obligacion, "valor", cod, "estado", "ANULADA", mes_desde=mes_consulta, mes_hasta=mes_consulta)
-            pago_ant += await _sum_by_rubro_and_period(db, tenant_id, Pago, "valor", cod, "estado", "ANULADO", mes_antes=mes_consulta)
-            pago_mes += await _sum_by_rubro_and_period(db, tenant_id, Pago, "valor", cod, "estado", "ANULADO", mes_desde=mes_consulta, mes_hasta=mes_consulta)
+    filas = []
+    for r in rubros:
+        comp_ant, comp_mes, obl_ant, obl_mes, pago_ant, pago_mes = totales.get(r.codigo, (0,) * 6)
 
         comp_acum = comp_ant + comp_mes
         obl_acum  = obl_ant  + obl_mes
@@ -471,42 +485,79 @@ async def informe_sia_gastos(db: AsyncSession, tenant_id: str, mes_consulta: int
     return filas
 
 
-async def generar_sia_excel(
-    db: AsyncSession,
-    tenant_id: str,
-    mes_consulta: int | None = None,
-    nombre_institucion: str = "INSTITUCIÓN EDUCATIVA",
-    vigencia: int = 2026,
-) -> bytes:
-    """Genera archivo Excel SIA Contraloría con hojas GASTOS e INGRESOS."""
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from openpyxl.utils import get_column_letter
+# ─── Excel SIA Contraloría ────────────────────────────────────────────────────
+
+_SIA_XLS_COLORES = {
+    "AZUL": "1E3A5F", "AZUL2": "2E4A6F", "GRIS_H": "E8EDF2", "GRIS_F": "F5F7FA",
+    "VERDE": "1A5276", "VERDE2": "2A6286", "GRIS_HI": "E8F4F0",
+}
 
+_SIA_XLS_HDRS_G = [
+    ("CÓDIGO", 12, "left"), ("DENOMINACIÓN", 46, "left"),
+    ("APROP.\nINICIAL", 13, "right"), ("ADICIONES", 13, "right"),
+    ("REDUC-\nCIONES", 13, "right"), ("CRÉDITOS", 13, "right"),
+    ("CONTRA-\nCRÉDITOS", 13, "right"), ("APROP.\nDEFINITIVA", 14, "right"),
+    ("COMP.\nANTERIOR", 13, "right"), ("COMP.\nPERÍODO", 13, "right"),
+    ("COMP.\nACUM.", 14, "right"),
+    ("OBL.\nANTERIOR", 13, "right"), ("OBL.\nPERÍODO", 13, "right"),
+    ("OBL.\nACUM.", 14, "right"),
+    ("PAGOS\nANTERIOR", 13, "right"), ("PAGOS\nPERÍODO", 13, "right"),
+    ("PAGOS\nACUM.", 14, "right"),
+    ("SALDO X\nCOMPROMETER", 15, "right"),
+    ("SALDO X\nOBLIGAR", 14, "right"),
+    ("SALDO X\nPAGAR", 14, "right"),
+]
+
+_SIA_XLS_CAMPOS_G = [
+    "ppto_inicial", "adiciones", "reducciones", "creditos", "contracreditos",
+    "ppto_definitivo",
+    "comp_anterior", "comp_mes", "comp_acumulado",
+    "obl_anterior", "obl_mes", "obl_acumulado",
+    "pago_anterior", "pago_mes", "pago_acumulado",
+    "saldo_x_comprometer", "saldo_x_obligar", "saldo_x_pagar",
+]
+
+_SIA_XLS_HDRS_I = [
+    ("CÓDIGO", 12, "left"), ("DENOMINACIÓN", 46, "left"),
+    ("PPTO.\nINICIAL", 14, "right"), ("ADICIONES", 13, "right"),
+    ("REDUC-\nCIONES", 13, "right"), ("PPTO.\nDEFINITIVO", 14, "right"),
+    ("RECAUDOS\nANTERIOR", 14, "right"), ("RECAUDOS\nPERÍODO", 14, "right"),
+    ("RECAUDOS\nACUM.", 14, "right"), ("SALDO X\nRECAUDAR", 14, "right"),
+]
+
+_SIA_XLS_CAMPOS_I = [
+    "ppto_inicial", "adiciones", "reducciones", "ppto_definitivo",
+    "recaudo_anterior", "recaudo_mes", "recaudo_acumulado", "saldo_por_recaudar",
+]
+
+_SIA_XLS_MESES = ["", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+                  "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+# Por encima de este tamaño el archivo del modo streaming pasa de memoria a disco
+SIA_XLS_SPOOL_MAX = 4 * 1024 * 1024
+
+
+async def _datos_sia_excel(db: AsyncSession, tenant_id: str, mes_consulta: int | None) -> tuple[list, list, str]:
     if mes_consulta is None:
         mes_consulta = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
 
     gastos  = await informe_sia_gastos(db, tenant_id, mes_consulta)
     ingresos = await informe_ejecucion_ingresos(db, tenant_id, mes_consulta)
+    periodo = _SIA_XLS_MESES[mes_consulta] if 1 <= mes_consulta <= 12 else str(mes_consulta)
+    return gastos, ingresos, periodo
+
 
-    MESES = ["", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-             "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
-    periodo = MESES[mes_consulta] if 1 <= mes_consulta <= 12 else str(mes_consulta)
+def _libro_sia_excel(gastos: list, ingresos: list, periodo: str, nombre_institucion: str, vigencia: int) -> bytes:
+    """Libro en modo normal: cada celda recibe sus propios objetos de estilo."""
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
 
-    AZUL   = "1E3A5F"
-    AZUL2  = "2E4A6F"
-    GRIS_H = "E8EDF2"
-    GRIS_F = "F5F7FA"
-    VERDE  = "1A5276"
-    VERDE2 = "2A6286"
-    GRIS_HI = "E8F4F0"
+    AZUL, AZUL2, GRIS_H, GRIS_F, VERDE, VERDE2, GRIS_HI = _SIA_XLS_COLORES.values()
 
     thin = Side(style="thin", color="CCCCCC")
     borde = Border(left=thin, right=thin, top=thin, bottom=thin)
 
-    def _fmt(val: float) -> str:
-        return f"{val:,.0f}" if val else "-"
-
     def _cell(ws, row, col, value, bold=False, fondo=None, align="right", size=8, color=None, italic=False):
         c = ws.cell(row=row, column=col, value=value)
         c.font = Font(bold=bold, size=size, color=color or "000000", italic=italic)
@@ -539,22 +590,7 @@ async def generar_sia_excel(
     ws_g.row_dimensions[2].height = 16
 
     # Fila 3: encabezados
-    HDRS_G = [
-        ("CÓDIGO", 12, "left"), ("DENOMINACIÓN", 46, "left"),
-        ("APROP.\nINICIAL", 13, "right"), ("ADICIONES", 13, "right"),
-        ("REDUC-\nCIONES", 13, "right"), ("CRÉDITOS", 13, "right"),
-        ("CONTRA-\nCRÉDITOS", 13, "right"), ("APROP.\nDEFINITIVA", 14, "right"),
-        ("COMP.\nANTERIOR", 13, "right"), ("COMP.\nPERÍODO", 13, "right"),
-        ("COMP.\nACUM.", 14, "right"),
-        ("OBL.\nANTERIOR", 13, "right"), ("OBL.\nPERÍODO", 13, "right"),
-        ("OBL.\nACUM.", 14, "right"),
-        ("PAGOS\nANTERIOR", 13, "right"), ("PAGOS\nPERÍODO", 13, "right"),
-        ("PAGOS\nACUM.", 14, "right"),
-        ("SALDO X\nCOMPROMETER", 15, "right"),
-        ("SALDO X\nOBLIGAR", 14, "right"),
-        ("SALDO X\nPAGAR", 14, "right"),
-    ]
-    for col, (titulo, ancho, al) in enumerate(HDRS_G, 1):
+    for col, (titulo, ancho, al) in enumerate(_SIA_XLS_HDRS_G, 1):
         _cell(ws_g, 3, col, titulo, bold=True, fondo=GRIS_H, align="center", size=8)
         ws_g.column_dimensions[get_column_letter(col)].width = ancho
     ws_g.row_dimensions[3].height = 36
@@ -569,14 +605,7 @@ async def generar_sia_excel(
         indent = "  " * (r["nivel"] - 1)
         _cell(ws_g, row, 1, r["codigo"], bold=bold_fila, fondo=fondo_fila, align="left", size=8)
         _cell(ws_g, row, 2, indent + r["cuenta"], bold=bold_fila, fondo=fondo_fila, align="left", size=8)
-        for col, key in enumerate([
-            "ppto_inicial", "adiciones", "reducciones", "creditos", "contracreditos",
-            "ppto_definitivo",
-            "comp_anterior", "comp_mes", "comp_acumulado",
-            "obl_anterior", "obl_mes", "obl_acumulado",
-            "pago_anterior", "pago_mes", "pago_acumulado",
-            "saldo_x_comprometer", "saldo_x_obligar", "saldo_x_pagar",
-        ], start=3):
+        for col, key in enumerate(_SIA_XLS_CAMPOS_G, start=3):
             _cell(ws_g, row, col, r[key] or None, bold=bold_fila, fondo=fondo_fila, size=8)
         ws_g.row_dimensions[row].height = 14
 
@@ -595,14 +624,7 @@ async def generar_sia_excel(
           bold=False, fondo=VERDE2, align="center", size=9, color="FFFFFF", italic=True)
     ws_i.row_dimensions[2].height = 16
 
-    HDRS_I = [
-        ("CÓDIGO", 12, "left"), ("DENOMINACIÓN", 46, "left"),
-        ("PPTO.\nINICIAL", 14, "right"), ("ADICIONES", 13, "right"),
-        ("REDUC-\nCIONES", 13, "right"), ("PPTO.\nDEFINITIVO", 14, "right"),
-        ("RECAUDOS\nANTERIOR", 14, "right"), ("RECAUDOS\nPERÍODO", 14, "right"),
-        ("RECAUDOS\nACUM.", 14, "right"), ("SALDO X\nRECAUDAR", 14, "right"),
-    ]
-    for col, (titulo, ancho, al) in enumerate(HDRS_I, 1):
+    for col, (titulo, ancho, al) in enumerate(_SIA_XLS_HDRS_I, 1):
         _cell(ws_i, 3, col, titulo, bold=True, fondo=GRIS_HI, align="center", size=8)
         ws_i.column_dimensions[get_column_letter(col)].width = ancho
     ws_i.row_dimensions[3].height = 36
@@ -616,10 +638,7 @@ async def generar_sia_excel(
 
         _cell(ws_i, row, 1, r["codigo"], bold=bold_fila, fondo=fondo_fila, align="left", size=8)
         _cell(ws_i, row, 2, indent + r["cuenta"], bold=bold_fila, fondo=fondo_fila, align="left", size=8)
-        for col, key in enumerate([
-            "ppto_inicial", "adiciones", "reducciones", "ppto_definitivo",
-            "recaudo_anterior", "recaudo_mes", "recaudo_acumulado", "saldo_por_recaudar",
-        ], start=3):
+        for col, key in enumerate(_SIA_XLS_CAMPOS_I, start=3):
             _cell(ws_i, row, col, r[key] or None, bold=bold_fila, fondo=fondo_fila, size=8)
         ws_i.row_dimensions[row].height = 14
 
@@ -629,16 +648,137 @@ async def generar_sia_excel(
     return buffer.read()
 
 
+async def generar_sia_excel(
+    db: AsyncSession,
+    tenant_id: str,
+    mes_consulta: int | None = None,
+    nombre_institucion: str = "INSTITUCIÓN EDUCATIVA",
+    vigencia: int = 2026,
+) -> bytes:
+    """Genera archivo Excel SIA Contraloría con hojas GASTOS e INGRESOS."""
+    gastos, ingresos, periodo = await _datos_sia_excel(db, tenant_id, mes_consulta)
+    return _libro_sia_excel(gastos, ingresos, periodo, nombre_institucion, vigencia)
+
+
+def _estilos_sia_excel() -> list:
+    """Estilos con nombre del modo streaming: se registran una vez en el libro y
+    cada celda solo guarda el nombre, en vez de su propio Font/Border/Fill."""
+    from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment, Border, Side
+
+    c = _SIA_XLS_COLORES
+    thin = Side(style="thin", color="CCCCCC")
+    borde = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    def _estilo(nombre, bold=False, fondo=None, align="right", size=8, color=None, italic=False, numero=False):
+        estilo = NamedStyle(name=nombre)
+        estilo.font = Font(bold=bold, size=size, color=color or "000000", italic=italic)
+        estilo.border = borde
+        estilo.alignment = Alignment(horizontal=align, vertical="center", wrap_text=True)
+        if fondo:
+            estilo.fill = PatternFill("solid", fgColor=fondo)
+        if numero:
+            estilo.number_format = '#,##0'
+        return estilo
+
+    return [
+        _estilo("sia_titulo_g", bold=True, fondo=c["AZUL"], align="center", size=10, color="FFFFFF"),
+        _estilo("sia_subtitulo_g", fondo=c["AZUL2"], align="center", size=9, color="FFFFFF", italic=True),
+        _estilo("sia_encabezado_g", bold=True, fondo=c["GRIS_H"], align="center"),
+        _estilo("sia_titulo_i", bold=True, fondo=c["VERDE"], align="center", size=10, color="FFFFFF"),
+        _estilo("sia_subtitulo_i", fondo=c["VERDE2"], align="center", size=9, color="FFFFFF", italic=True),
+        _estilo("sia_encabezado_i", bold=True, fondo=c["GRIS_HI"], align="center"),
+        _estilo("sia_texto", align="left"),
+        _estilo("sia_texto_padre", bold=True, fondo=c["GRIS_F"], align="left"),
+        _estilo("sia_valor", numero=True),
+        _estilo("sia_valor_padre", bold=True, fondo=c["GRIS_F"], numero=True),
+    ]
+
+
+def _escribir_sia_excel(
+    archivo, gastos: list, ingresos: list, periodo: str, nombre_institucion: str, vigencia: int,
+) -> None:
+    """Escribe el libro en modo write_only: las filas se serializan al agregarse."""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    for estilo in _estilos_sia_excel():
+        wb.add_named_style(estilo)
+
+    def _fila(ws, valores, estilos):
+        celdas = []
+        for valor, estilo in zip(valores, estilos):
+            celda = WriteOnlyCell(ws, value=valor)
+            celda.style = estilo
+            celdas.append(celda)
+        ws.append(celdas)
+
+    hojas = [
+        ("GASTOS", "g", "V", "GASTOS", _SIA_XLS_HDRS_G, _SIA_XLS_CAMPOS_G, gastos),
+        ("INGRESOS", "i", "L", "INGRESOS", _SIA_XLS_HDRS_I, _SIA_XLS_CAMPOS_I, ingresos),
+    ]
+    for titulo_hoja, sufijo, ultima_col, tipo, encabezados, campos, filas in hojas:
+        ws = wb.create_sheet(titulo_hoja)
+        # Vista, columnas y alturas se escriben antes de la primera fila
+        ws.freeze_panes = "C4"
+        for col, (_, ancho, _) in enumerate(encabezados, 1):
+            ws.column_dimensions[get_column_letter(col)].width = ancho
+        ws.merged_cells.add(f"A1:{ultima_col}1")
+        ws.merged_cells.add(f"A2:{ultima_col}2")
+        ws.row_dimensions[1].height = 22
+        ws.row_dimensions[2].height = 16
+        ws.row_dimensions[3].height = 36
+        ws.sheet_format.defaultRowHeight = 14
+        ws.sheet_format.customHeight = True
+
+        _fila(ws, [
+            f"INFORME SIA CONTRALORÍA — EJECUCIÓN PRESUPUESTAL DE {tipo} — {nombre_institucion} — Vigencia {vigencia}",
+        ], [f"sia_titulo_{sufijo}"])
+        _fila(ws, [f"Período: {periodo} de {vigencia}  |  Valores en pesos colombianos"], [f"sia_subtitulo_{sufijo}"])
+        _fila(ws, [t for t, _, _ in encabezados], [f"sia_encabezado_{sufijo}"] * len(encabezados))
+
+        estilos_hoja = ["sia_texto"] * 2 + ["sia_valor"] * len(campos)
+        estilos_padre = ["sia_texto_padre"] * 2 + ["sia_valor_padre"] * len(campos)
+        for r in filas:
+            indent = "  " * (r["nivel"] - 1)
+            _fila(
+                ws,
+                [r["codigo"], indent + r["cuenta"], *(r[k] or None for k in campos)],
+                estilos_padre if r["es_hoja"] == 0 else estilos_hoja,
+            )
+
+    wb.save(archivo)
+
+
+async def generar_sia_excel_stream(
+    db: AsyncSession,
+    tenant_id: str,
+    mes_consulta: int | None = None,
+    nombre_institucion: str = "INSTITUCIÓN EDUCATIVA",
+    vigencia: int = 2026,
+):
+    """Igual a generar_sia_excel, escrito en modo write_only con estilos con nombre.
+
+    Retorna un SpooledTemporaryFile posicionado al inicio (en memoria hasta
+    SIA_XLS_SPOOL_MAX, luego en disco); quien lo consume debe cerrarlo.
+    """
+    gastos, ingresos, periodo = await _datos_sia_excel(db, tenant_id, mes_consulta)
+    archivo = tempfile.SpooledTemporaryFile(max_size=SIA_XLS_SPOOL_MAX)
+    try:
+        await asyncio.to_thread(_escribir_sia_excel, archivo, gastos, ingresos, periodo, nombre_institucion, vigencia)
+    except BaseException:
+        archivo.close()
+        raise
+    archivo.seek(0)
+    return archivo
+
+
 # ─── Helpers para exportación CSV SIA Contraloría ─────────────────────────────
 
-def _sia_fecha_corte(mes: int, anio: str) -> tuple[str, str]:
-    """Rango enero..mes como strings ISO: (fecha_ini, fecha_fin_exclusiva)."""
-    fecha_ini = f"{anio}-01-01"
-    if mes >= 12:
-        fecha_fin = f"{int(anio) + 1}-01-01"
-    else:
-        fecha_fin = f"{anio}-{mes + 1:02d}-01"
-    return fecha_ini, fecha_fin
+def _sia_fecha_corte(mes: int, anio: str) -> tuple[int, int]:
+    """Rango enero..mes como límites inclusivos de `periodo` (AAAAMM)."""
+    return rango_periodo(int(anio), 1, mes)
 
 
 def _csv_bytes(encabezados: list[str], filas: list[list]) -> bytes:
@@ -658,9 +798,8 @@ _MESES_SIA = {
 
 # ─── F03: Movimiento de Bancos ────────────────────────────────────────────────
 
-async def generar_sia_csv_f03(db: AsyncSession, tenant_id: str, mes: int, anio: str, institucion: str) -> bytes:
-    fecha_ini, fecha_fin = _sia_fecha_corte(mes, anio)
-
+async def _sia_bancos(db: AsyncSession, tenant_id: str, desde: int, hasta: int) -> tuple[list, dict, dict]:
+    """Cuentas activas e ingresos/egresos del corte por cuenta (consultas agrupadas)."""
     cuentas_res = await db.execute(
         select(CuentaBancaria).where(
             CuentaBancaria.tenant_id == tenant_id,
@@ -669,30 +808,28 @@ async def generar_sia_csv_f03(db: AsyncSession, tenant_id: str, mes: int, anio:
     )
     cuentas = cuentas_res.scalars().all()
 
+    ing_res = await db.execute(
+        select(Recaudo.cuenta_bancaria_id, func.sum(Recaudo.valor)).where(
+            Recaudo.tenant_id == tenant_id,
+            Recaudo.estado != "ANULADO",
+            Recaudo.periodo.between(desde, hasta),
+        ).group_by(Recaudo.cuenta_bancaria_id)
+    )
+    eg_res = await db.execute(
+        select(Pago.cuenta_bancaria_id, func.sum(Pago.valor)).where(
+            Pago.tenant_id == tenant_id,
+            Pago.estado != "ANULADO",
+            Pago.periodo.between(desde, hasta),
+        ).group_by(Pago.cuenta_bancaria_id)
+    )
+    return cuentas, dict(ing_res.all()), dict(eg_res.all())
+
+
+def _csv_f03(cuentas: list, ingresos_cuenta: dict, egresos_cuenta: dict, institucion: str) -> bytes:
     filas = []
     for cb in cuentas:
-        ing_res = await db.execute(
-            select(func.coalesce(func.sum(Recaudo.valor), 0)).where(
-                Recaudo.tenant_id == tenant_id,
-                Recaudo.estado != "ANULADO",
-                Recaudo.cuenta_bancaria_id == cb.id,
-                Recaudo.fecha >= fecha_ini,
-                Recaudo.fecha < fecha_fin,
-            )
-        )
-        ingresos = ing_res.scalar() or 0
-
-        eg_res = await db.execute(
-            select(func.coalesce(func.sum(Pago.valor), 0)).where(
-                Pago.tenant_id == tenant_id,
-                Pago.estado != "ANULADO",
-                Pago.cuenta_bancaria_id == cb.id,
-                Pago.fecha >= fecha_ini,
-                Pago.fecha < fecha_fin,
-            )
-        )
-        egresos = eg_res.scalar() or 0
-
+        ingresos = ingresos_cuenta.get(cb.id) or 0
+        egresos = egresos_cuenta.get(cb.id) or 0
         filas.append([
             cb.banco, cb.numero_cuenta, cb.denominacion or institucion,
             "FONDO DE SERVICIOS EDUCATIVOS",
@@ -712,21 +849,26 @@ async def generar_sia_csv_f03(db: AsyncSession, tenant_id: str, mes: int, anio:
     ], filas)
 
 
-# ─── F7B: Formato de Pagos ───────────────────────────────────────────────────
+async def generar_sia_csv_f03(db: AsyncSession, tenant_id: str, mes: int, anio: str, institucion: str) -> bytes:
+    desde, hasta = _sia_fecha_corte(mes, anio)
+    return _csv_f03(*await _sia_bancos(db, tenant_id, desde, hasta), institucion)
 
-async def generar_sia_csv_f7b(db: AsyncSession, tenant_id: str, mes: int, anio: str) -> bytes:
-    fecha_ini, fecha_fin = _sia_fecha_corte(mes, anio)
 
+# ─── F7B: Formato de Pagos ───────────────────────────────────────────────────
+
+async def _sia_pagos(db: AsyncSession, tenant_id: str, desde: int, hasta: int) -> list:
     pagos_res = await db.execute(
         select(Pago).where(
             Pago.tenant_id == tenant_id,
             Pago.estado != "ANULADO",
-            Pago.fecha >= fecha_ini,
-            Pago.fecha < fecha_fin,
-        ).order_by(Pago.fecha, Pago.numero)
+            Pago.periodo.between(desde, hasta),
+        ).options(joinedload(Pago.obligacion), joinedload(Pago.tercero))
+        .order_by(Pago.fecha, Pago.numero)
     )
-    pagos = pagos_res.scalars().all()
+    return pagos_res.scalars().all()
+
 
+def _csv_f7b(pagos: list) -> bytes:
     filas = []
     for p in pagos:
         obl = p.obligacion
@@ -751,26 +893,37 @@ async def generar_sia_csv_f7b(db: AsyncSession, tenant_id: str, mes: int, anio:
     ], filas)
 
 
-# ─── F08A: Modificaciones presupuestales ──────────────────────────────────────
+async def generar_sia_csv_f7b(db: AsyncSession, tenant_id: str, mes: int, anio: str) -> bytes:
+    desde, hasta = _sia_fecha_corte(mes, anio)
+    return _csv_f7b(await _sia_pagos(db, tenant_id, desde, hasta))
 
-async def generar_sia_csv_f08a(db: AsyncSession, tenant_id: str, mes: int, anio: str, tipo_rubro: str) -> bytes:
-    fecha_ini, fecha_fin = _sia_fecha_corte(mes, anio)
 
-    res = await db.execute(
+# ─── F08A: Modificaciones presupuestales ──────────────────────────────────────
+
+async def _sia_modificaciones(
+    db: AsyncSession, tenant_id: str, desde: int, hasta: int, tipo_rubro: str | None = None,
+) -> list[tuple]:
+    """(detalle, modificación) del corte; todos los tipos de rubro si tipo_rubro es None."""
+    stmt = (
         select(DetalleModificacion, ModificacionPresupuestal)
         .join(ModificacionPresupuestal, DetalleModificacion.id_modificacion == ModificacionPresupuestal.id)
         .where(
             ModificacionPresupuestal.tenant_id == tenant_id,
             DetalleModificacion.tenant_id == tenant_id,
             ModificacionPresupuestal.estado == "ACTIVO",
-            ModificacionPresupuestal.fecha >= fecha_ini,
-            ModificacionPresupuestal.fecha < fecha_fin,
-            DetalleModificacion.tipo_rubro == tipo_rubro,
+            ModificacionPresupuestal.periodo.between(desde, hasta),
         ).order_by(ModificacionPresupuestal.fecha, DetalleModificacion.codigo_rubro)
     )
+    if tipo_rubro is not None:
+        stmt = stmt.where(DetalleModificacion.tipo_rubro == tipo_rubro)
+    return (await db.execute(stmt)).all()
 
+
+def _csv_f08a(modificaciones: list[tuple], tipo_rubro: str) -> bytes:
     filas = []
-    for det, mod in res.all():
+    for det, mod in modificaciones:
+        if det.tipo_rubro != tipo_rubro:
+            continue
         campo = det.campo_afectado.lower()
         adicion   = det.valor if "adicion"   in campo else 0
         reduccion = det.valor if "reduccion" in campo else 0
@@ -786,11 +939,15 @@ async def generar_sia_csv_f08a(db: AsyncSession, tenant_id: str, mes: int, anio:
     ], filas)
 
 
-# ─── F09: PAC ────────────────────────────────────────────────────────────────
+async def generar_sia_csv_f08a(db: AsyncSession, tenant_id: str, mes: int, anio: str, tipo_rubro: str) -> bytes:
+    desde, hasta = _sia_fecha_corte(mes, anio)
+    return _csv_f08a(await _sia_modificaciones(db, tenant_id, desde, hasta, tipo_rubro), tipo_rubro)
 
-async def generar_sia_csv_f09(db: AsyncSession, tenant_id: str, mes: int, anio: str) -> bytes:
-    fecha_ini, fecha_fin = _sia_fecha_corte(mes, anio)
 
+# ─── F09: PAC ────────────────────────────────────────────────────────────────
+
+async def _sia_pac(db: AsyncSession, tenant_id: str, mes: int, anio: str) -> tuple[list, list, list]:
+    """Rubros hoja de gastos con su PAC y pagos acumulados a `mes`."""
     rubros_res = await db.execute(
         select(RubroGasto).where(
             RubroGasto.tenant_id == tenant_id,
@@ -799,32 +956,18 @@ async def generar_sia_csv_f09(db: AsyncSession, tenant_id: str, mes: int, anio:
     )
     rubros = rubros_res.scalars().all()
 
-    filas = []
-    for r in rubros:
-        pac_res = await db.execute(
-            select(func.coalesce(func.sum(PAC.valor_programado), 0)).where(
-                PAC.tenant_id == tenant_id,
-                PAC.codigo_rubro == r.codigo,
-                PAC.mes >= 1,
-                PAC.mes <= mes,
-            )
-        )
-        pac_acum = pac_res.scalar() or 0
-
-        pago_res = await db.execute(
-            select(func.coalesce(func.sum(Pago.valor), 0)).where(
-                Pago.tenant_id == tenant_id,
-                Pago.codigo_rubro == r.codigo,
-                Pago.estado != "ANULADO",
-                Pago.fecha >= fecha_ini,
-                Pago.fecha < fecha_fin,
-            )
-        )
-        pago_acum = pago_res.scalar() or 0
+    codigos = [r.codigo for r in rubros]
+    pac_acum = (await matriz_pac(db, tenant_id, codigos)).acumulado(mes)
+    pago_acum = (await matriz_pagos(db, tenant_id, codigos, int(anio))).acumulado(mes)
+    return rubros, pac_acum, pago_acum
+
 
+def _csv_f09(rubros: list, pac_acum: list, pago_acum: list) -> bytes:
+    filas = []
+    for r, pac_r, pago_r in zip(rubros, pac_acum, pago_acum):
         filas.append([
-            r.codigo, r.cuenta, pac_acum, 0,
-            r.adiciones, r.reducciones, 0, pac_acum, pago_acum,
+            r.codigo, r.cuenta, pac_r or 0, 0,
+            r.adiciones, r.reducciones, 0, pac_r or 0, pago_r or 0,
         ])
 
     return _csv_bytes([
@@ -834,38 +977,40 @@ async def generar_sia_csv_f09(db: AsyncSession, tenant_id: str, mes: int, anio:
     ], filas)
 
 
-# ─── F13A: Contratación ──────────────────────────────────────────────────────
+async def generar_sia_csv_f09(db: AsyncSession, tenant_id: str, mes: int, anio: str) -> bytes:
+    return _csv_f09(*await _sia_pac(db, tenant_id, mes, anio))
 
-async def generar_sia_csv_f13a(db: AsyncSession, tenant_id: str, mes: int, anio: str) -> bytes:
-    fecha_ini, fecha_fin = _sia_fecha_corte(mes, anio)
 
+# ─── F13A: Contratación ──────────────────────────────────────────────────────
+
+async def _sia_contratos(db: AsyncSession, tenant_id: str, desde: int, hasta: int) -> tuple[list, dict]:
+    """RPs del corte y total pagado por RP (una consulta agrupada)."""
     rps_res = await db.execute(
         select(RP).where(
             RP.tenant_id == tenant_id,
             RP.estado != "ANULADO",
-            RP.fecha >= fecha_ini,
-            RP.fecha < fecha_fin,
-        ).order_by(RP.numero)
+            RP.periodo.between(desde, hasta),
+        ).options(joinedload(RP.cdp), joinedload(RP.tercero))
+        .order_by(RP.numero)
     )
     rps = rps_res.scalars().all()
 
+    pagos_res = await db.execute(
+        select(Obligacion.rp_numero, func.sum(Pago.valor))
+        .join(Obligacion, Pago.obligacion_numero == Obligacion.numero)
+        .where(
+            Pago.tenant_id == tenant_id,
+            Pago.estado != "ANULADO",
+            Pago.periodo.between(desde, hasta),
+        ).group_by(Obligacion.rp_numero)
+    )
+    return rps, dict(pagos_res.all())
+
+
+def _csv_f13a(rps: list, pagos_rp: dict) -> bytes:
     filas = []
     for rp in rps:
-        pagos_res = await db.execute(
-            select(func.coalesce(func.sum(Pago.valor), 0))
-            .join(Obligacion, and_(
-                Pago.obligacion_numero == Obligacion.numero,
-                Obligacion.rp_numero == rp.numero,
-            ))
-            .where(
-                Pago.tenant_id == tenant_id,
-                Pago.estado != "ANULADO",
-                Pago.fecha >= fecha_ini,
-                Pago.fecha < fecha_fin,
-            )
-        )
-        pagos_total = pagos_res.scalar() or 0
-
+        pagos_total = pagos_rp.get(rp.numero) or 0
         cdp = rp.cdp
         t = rp.tercero
         filas.append([
@@ -895,81 +1040,147 @@ async def generar_sia_csv_f13a(db: AsyncSession, tenant_id: str, mes: int, anio:
     ], filas)
 
 
-# ─── ZIP con todos los formatos ───────────────────────────────────────────────
+async def generar_sia_csv_f13a(db: AsyncSession, tenant_id: str, mes: int, anio: str) -> bytes:
+    desde, hasta = _sia_fecha_corte(mes, anio)
+    return _csv_f13a(*await _sia_contratos(db, tenant_id, desde, hasta))
+
+
+# ─── Paquete con todos los formatos ───────────────────────────────────────────
+
+async def preparar_formatos_sia(
+    db: AsyncSession, tenant_id: str, mes: int, anio: str, institucion: str,
+) -> list[tuple[str, Callable[..., bytes], tuple]]:
+    """Carga una sola vez los datos del corte enero..mes que comparten los 6
+    formatos y retorna [(nombre_archivo, generador, argumentos)].
+
+    `generador(*argumentos)` produce el CSV sin consultar la base, de modo que
+    los formatos se pueden generar en paralelo y fuera de la sesión.
+    """
+    desde, hasta = _sia_fecha_corte(mes, anio)
+    bancos = await _sia_bancos(db, tenant_id, desde, hasta)
+    pagos = await _sia_pagos(db, tenant_id, desde, hasta)
+    modificaciones = await _sia_modificaciones(db, tenant_id, desde, hasta)
+    pac = await _sia_pac(db, tenant_id, mes, anio)
+    contratos = await _sia_contratos(db, tenant_id, desde, hasta)
+
+    m = f"{mes:02d}"
+    return [
+        (f"F03_MovBancos_{anio}_Ene_a_{m}.csv", _csv_f03, (*bancos, institucion)),
+        (f"F7B_Pagos_{anio}_Ene_a_{m}.csv", _csv_f7b, (pagos,)),
+        (f"F08A_Modif_Gastos_{anio}_Ene_a_{m}.csv", _csv_f08a, (modificaciones, "GASTO")),
+        (f"F08A_Modif_Ingresos_{anio}_Ene_a_{m}.csv", _csv_f08a, (modificaciones, "INGRESO")),
+        (f"F09_PAC_{anio}_Ene_a_{m}.csv", _csv_f09, pac),
+        (f"F13A_Contratacion_{anio}_Ene_a_{m}.csv", _csv_f13a, contratos),
+    ]
 
-async def generar_sia_zip(db: AsyncSession, tenant_id: str, mes_consulta: int | None = None) -> tuple[bytes, str, str]:
-    """Genera ZIP con los 6 formatos SIA. Retorna (bytes, anio, nombre_mes)."""
-    if mes_consulta is None:
-        mes_consulta = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
-    anio = await config_svc.get_config(db, tenant_id, "vigencia") or "2026"
-    institucion = await config_svc.get_config(db, tenant_id, "nombre_institucion") or "INSTITUCIÓN"
-    nombre_mes = _MESES_SIA.get(mes_consulta, str(mes_consulta))
-    m = f"{mes_consulta:02d}"
-
-    archivos = {
-        f"F03_MovBancos_{anio}_Ene_a_{m}.csv":
-            await generar_sia_csv_f03(db, tenant_id, mes_consulta, anio, institucion),
-        f"F7B_Pagos_{anio}_Ene_a_{m}.csv":
-            await generar_sia_csv_f7b(db, tenant_id, mes_consulta, anio),
-        f"F08A_Modif_Gastos_{anio}_Ene_a_{m}.csv":
-            await generar_sia_csv_f08a(db, tenant_id, mes_consulta, anio, "GASTO"),
-        f"F08A_Modif_Ingresos_{anio}_Ene_a_{m}.csv":
-            await generar_sia_csv_f08a(db, tenant_id, mes_consulta, anio, "INGRESO"),
-        f"F09_PAC_{anio}_Ene_a_{m}.csv":
-            await generar_sia_csv_f09(db, tenant_id, mes_consulta, anio),
-        f"F13A_Contratacion_{anio}_Ene_a_{m}.csv":
-            await generar_sia_csv_f13a(db, tenant_id, mes_consulta, anio),
-    }
 
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        for nombre, contenido in archivos.items():
-            zf.writestr(nombre, contenido)
-    buf.seek(0)
-    return buf.read(), anio, nombre_mes
+# Tramos de antigüedad de las cuentas por pagar: (etiqueta, días máximos)
+TRAMOS_ANTIGUEDAD = [("0-30", 30), ("31-60", 60), ("61-90", 90), (">90", None)]
 
 
-async def cuentas_por_pagar(db: AsyncSession, tenant_id: str) -> list[dict]:
-    """Obligaciones activas con saldo pendiente de pago."""
-    obls_res = await db.execute(
-        select(Obligacion).where(
+def _pendientes_por_pagar(tenant_id: str, hoy: date):
+    """Obligaciones no anuladas con saldo > 0.01 y su tramo de antigüedad.
+
+    Los pagos se suman una vez por obligación (GROUP BY) y se unen a las
+    obligaciones; el saldo se filtra en SQL. La antigüedad se compara contra
+    fechas ISO límite, igual en SQLite y PostgreSQL.
+    """
+    pagado = (
+        select(Pago.obligacion_numero, func.sum(Pago.valor).label("pagado"))
+        .where(Pago.tenant_id == tenant_id, Pago.estado != "ANULADO")
+        .group_by(Pago.obligacion_numero)
+        .subquery()
+    )
+    total_pagado = func.coalesce(pagado.c.pagado, 0)
+    tramo = case(
+        *[
+            (Obligacion.fecha >= (hoy - timedelta(days=dias)).isoformat(), etiqueta)
+            for etiqueta, dias in TRAMOS_ANTIGUEDAD if dias is not None
+        ],
+        else_=TRAMOS_ANTIGUEDAD[-1][0],
+    )
+    return (
+        select(
+            Obligacion.numero, Obligacion.fecha, Obligacion.codigo_rubro,
+            Obligacion.nit_tercero, Tercero.nombre, Obligacion.factura, Obligacion.valor,
+            pagado.c.pagado, tramo.label("tramo"),
+        )
+        .outerjoin(pagado, pagado.c.obligacion_numero == Obligacion.numero)
+        .outerjoin(Tercero, Tercero.nit == Obligacion.nit_tercero)
+        .where(
             Obligacion.tenant_id == tenant_id,
             Obligacion.estado != "ANULADA",
-        ).order_by(Obligacion.nit_tercero, Obligacion.fecha, Obligacion.numero)
+            Obligacion.valor - total_pagado > 0.01,
+        )
     )
-    obls = obls_res.scalars().all()
 
-    resultado = []
-    for obl in obls:
-        pago_res = await db.execute(
-            select(func.coalesce(func.sum(Pago.valor), 0)).where(
-                Pago.tenant_id == tenant_id,
-                Pago.obligacion_numero == obl.numero,
-                Pago.estado != "ANULADO",
-            )
-        )
-        total_pagado = float(pago_res.scalar() or 0)
-        saldo = obl.valor - total_pagado
-        if saldo > 0.01:
-            t = obl.tercero
-            resultado.append({
-                "obl_numero": obl.numero,
-                "fecha": obl.fecha,
-                "codigo_rubro": obl.codigo_rubro,
-                "nit": obl.nit_tercero,
-                "tercero": t.nombre if t else "",
-                "factura": obl.factura,
-                "valor_obl": obl.valor,
-                "total_pagado": total_pagado,
-                "saldo_por_pagar": saldo,
-            })
-    return resultado
+
+def _fila_por_pagar(fila) -> dict:
+    numero, fecha, codigo_rubro, nit, nombre, factura, valor, pagado, tramo = fila
+    total_pagado = float(pagado or 0)
+    return {
+        "obl_numero": numero,
+        "fecha": fecha,
+        "codigo_rubro": codigo_rubro,
+        "nit": nit,
+        "tercero": nombre or "",
+        "factura": factura,
+        "valor_obl": valor,
+        "total_pagado": total_pagado,
+        "saldo_por_pagar": valor - total_pagado,
+        "antiguedad": tramo,
+    }
+
+
+async def cuentas_por_pagar(db: AsyncSession, tenant_id: str, hoy: date | None = None) -> list[dict]:
+    """Obligaciones activas con saldo pendiente de pago (una consulta)."""
+    stmt = _pendientes_por_pagar(tenant_id, hoy or date.today()).order_by(
+        Obligacion.nit_tercero, Obligacion.fecha, Obligacion.numero,
+    )
+    return [_fila_por_pagar(f) for f in (await db.execute(stmt)).all()]
+
+
+async def cuentas_por_pagar_paginado(
+    db: AsyncSession, tenant_id: str, pagina: int = 1, tamano: int = 100, hoy: date | None = None,
+) -> dict:
+    """Una página de cuentas por pagar más el total y el resumen por antigüedad
+    de todas las pendientes (no solo de la página)."""
+    pendientes = _pendientes_por_pagar(tenant_id, hoy or date.today()).subquery()
+
+    resumen_res = await db.execute(
+        select(
+            pendientes.c.tramo,
+            func.count(),
+            func.sum(pendientes.c.valor - func.coalesce(pendientes.c.pagado, 0)),
+        ).group_by(pendientes.c.tramo)
+    )
+    por_tramo = {tramo: (cantidad, saldo) for tramo, cantidad, saldo in resumen_res.all()}
+    antiguedad = []
+    for etiqueta, _ in TRAMOS_ANTIGUEDAD:
+        cantidad, saldo = por_tramo.get(etiqueta, (0, 0))
+        antiguedad.append({"tramo": etiqueta, "cantidad": cantidad, "saldo": float(saldo or 0)})
+
+    pagina_res = await db.execute(
+        select(pendientes)
+        .order_by(pendientes.c.nit_tercero, pendientes.c.fecha, pendientes.c.numero)
+        .limit(tamano)
+        .offset((pagina - 1) * tamano)
+    )
+    return {
+        "items": [_fila_por_pagar(f) for f in pagina_res.all()],
+        "pagina": pagina,
+        "tamano": tamano,
+        "total": sum(t["cantidad"] for t in antiguedad),
+        "saldo_total": sum(t["saldo"] for t in antiguedad),
+        "antiguedad": antiguedad,
+    }
 
 
 async def pac_vs_ejecutado(db: AsyncSession, tenant_id: str, mes_corte: int | None = None) -> dict:
     """PAC programado vs pagos reales por rubro, acumulado hasta mes_corte."""
     if mes_corte is None:
         mes_corte = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
 
     rubros_res = await db.execute(
         select(RubroGasto).where(
@@ -979,36 +1190,19 @@ async def pac_vs_ejecutado(db: AsyncSession, tenant_id: str, mes_corte: int | No
     )
     rubros = rubros_res.scalars().all()
 
-    resultado = []
-    for r in rubros:
-        pac_total = 0.0
-        pago_total = 0.0
-        meses_data = []
-        for mes in range(1, mes_corte + 1):
-            pac_res = await db.execute(
-                select(func.coalesce(func.sum(PAC.valor_programado), 0)).where(
-                    PAC.tenant_id == tenant_id,
-                    PAC.codigo_rubro == r.codigo,
-                    PAC.mes == mes,
-                )
-            )
-            pac_mes = float(pac_res.scalar() or 0)
-
-            mes_col = func.cast(func.substr(Pago.fecha, 6, 2), Integer)
-            pago_res = await db.execute(
-                select(func.coalesce(func.sum(Pago.valor), 0)).where(
-                    Pago.tenant_id == tenant_id,
-                    Pago.codigo_rubro == r.codigo,
-                    Pago.estado != "ANULADO",
-                    mes_col == mes,
-                )
-            )
-            pago_mes = float(pago_res.scalar() or 0)
-
-            pac_total += pac_mes
-            pago_total += pago_mes
-            meses_data.append({"mes": mes, "pac": pac_mes, "pagado": pago_mes})
+    codigos = [r.codigo for r in rubros]
+    pac = await matriz_pac(db, tenant_id, codigos)
+    pagos = await matriz_pagos(db, tenant_id, codigos, vigencia)
+    pac_totales = pac.acumulado(mes_corte)
+    pago_totales = pagos.acumulado(mes_corte)
 
+    resultado = []
+    for r, pac_total, pago_total in zip(rubros, pac_totales, pago_totales):
+        meses_data = [
+            {"mes": mes, "pac": pac_mes, "pagado": pago_mes}
+            for mes, (pac_mes, pago_mes) in enumerate(
+                zip(pac.fila(r.codigo, mes_corte), pagos.fila(r.codigo, mes_corte)), 1)
+        ]
         pct = round(pago_total / pac_total * 100, 1) if pac_total > 0 else 0.0
         resultado.append({
             "codigo": r.codigo,
@@ -1023,13 +1217,64 @@ async def pac_vs_ejecutado(db: AsyncSession, tenant_id: str, mes_corte: int | No
     return {"mes_corte": mes_corte, "rubros": resultado}
 
 
+def _documentos_tercero(tenant_id: str, desde: int, hasta: int, nit: str | None = None) -> dict:
+    """Consultas de RPs, obligaciones y pagos no anulados del rango de periodos,
+    de un tercero o de todos (ordenadas por NIT). Usan los índices
+    (tenant_id, nit_tercero, periodo)."""
+    consultas = {
+        "rps": select(
+            RP.nit_tercero, RP.numero, RP.fecha, RP.codigo_rubro, RP.valor, RP.objeto, RP.estado,
+        ).where(RP.tenant_id == tenant_id, RP.estado != "ANULADO", RP.periodo.between(desde, hasta)),
+        "obligaciones": select(
+            Obligacion.nit_tercero, Obligacion.numero, Obligacion.fecha, Obligacion.codigo_rubro,
+            Obligacion.rp_numero, Obligacion.valor, Obligacion.factura, Obligacion.estado,
+        ).where(Obligacion.tenant_id == tenant_id, Obligacion.estado != "ANULADA",
+                Obligacion.periodo.between(desde, hasta)),
+        "pagos": select(
+            Pago.nit_tercero, Pago.numero, Pago.fecha, Pago.codigo_rubro, Pago.obligacion_numero,
+            Pago.valor, Pago.concepto, Pago.medio_pago, Pago.no_comprobante,
+        ).where(Pago.tenant_id == tenant_id, Pago.estado != "ANULADO", Pago.periodo.between(desde, hasta)),
+    }
+    for clave, stmt in consultas.items():
+        model = stmt.column_descriptions[0]["entity"]
+        if nit is not None:
+            stmt = stmt.where(model.nit_tercero == nit)
+        consultas[clave] = stmt.order_by(model.nit_tercero, model.fecha, model.numero)
+    return consultas
+
+
+def _informe_tercero(nit: str, nombre: str, mes_inicio: int, mes_fin: int,
+                     rps: list[dict], obls: list[dict], pagos: list[dict]) -> dict:
+    return {
+        "tercero": {"nit": nit, "nombre": nombre},
+        "mes_inicio": mes_inicio,
+        "mes_fin": mes_fin,
+        "rps": rps,
+        "obligaciones": obls,
+        "pagos": pagos,
+        "total_rp": sum(r["valor"] for r in rps),
+        "total_obl": sum(o["valor"] for o in obls),
+        "total_pagos": sum(p["valor"] for p in pagos),
+    }
+
+
+async def _cargar_documentos_tercero(db: AsyncSession, consultas: dict) -> dict[str, dict[str, list[dict]]]:
+    """{"rps"|"obligaciones"|"pagos": {nit: [documento, ...]}} en el orden de la consulta."""
+    por_tipo = {}
+    for clave, stmt in consultas.items():
+        por_nit: dict[str, list[dict]] = {}
+        for fila in (await db.execute(stmt)).mappings():
+            documento = dict(fila)
+            por_nit.setdefault(documento.pop("nit_tercero"), []).append(documento)
+        por_tipo[clave] = por_nit
+    return por_tipo
+
+
 async def informe_tercero(
     db: AsyncSession, tenant_id: str, nit: str,
     mes_inicio: int = 1, mes_fin: int = 12
 ) -> dict:
     """Todos los documentos (RP, Obligaciones, Pagos) de un tercero en un período."""
-    from app.models.terceros import Tercero
-
     tercero_res = await db.execute(
         select(Tercero).where(Tercero.tenant_id == tenant_id, Tercero.nit == nit)
     )
@@ -1037,91 +1282,89 @@ async def informe_tercero(
     if not tercero:
         raise ValueError(f"Tercero {nit} no encontrado")
 
-    from app.models.rp import RP as RPModel
-
-    mes_col_rp = func.cast(func.substr(RPModel.fecha, 6, 2), Integer)
-    rps_res = await db.execute(
-        select(RPModel).where(
-            RPModel.tenant_id == tenant_id,
-            RPModel.nit_tercero == nit,
-            RPModel.estado != "ANULADO",
-            mes_col_rp >= mes_inicio,
-            mes_col_rp <= mes_fin,
-        ).order_by(RPModel.fecha, RPModel.numero)
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
+    desde, hasta = rango_periodo(vigencia, mes_inicio, mes_fin)
+    docs = await _cargar_documentos_tercero(db, _documentos_tercero(tenant_id, desde, hasta, nit))
+    return _informe_tercero(
+        tercero.nit, tercero.nombre, mes_inicio, mes_fin,
+        docs["rps"].get(nit, []), docs["obligaciones"].get(nit, []), docs["pagos"].get(nit, []),
     )
-    rps = [
-        {
-            "numero": r.numero, "fecha": r.fecha,
-            "codigo_rubro": r.codigo_rubro, "valor": r.valor,
-            "objeto": r.objeto, "estado": r.estado,
-        }
-        for r in rps_res.scalars().all()
-    ]
 
-    mes_col_obl = func.cast(func.substr(Obligacion.fecha, 6, 2), Integer)
-    obls_res = await db.execute(
-        select(Obligacion).where(
-            Obligacion.tenant_id == tenant_id,
-            Obligacion.nit_tercero == nit,
-            Obligacion.estado != "ANULADA",
-            mes_col_obl >= mes_inicio,
-            mes_col_obl <= mes_fin,
-        ).order_by(Obligacion.fecha, Obligacion.numero)
-    )
-    obls = [
-        {
-            "numero": o.numero, "fecha": o.fecha,
-            "codigo_rubro": o.codigo_rubro, "rp_numero": o.rp_numero,
-            "valor": o.valor, "factura": o.factura, "estado": o.estado,
-        }
-        for o in obls_res.scalars().all()
-    ]
 
-    mes_col_pago = func.cast(func.substr(Pago.fecha, 6, 2), Integer)
-    pagos_res = await db.execute(
-        select(Pago).where(
-            Pago.tenant_id == tenant_id,
-            Pago.nit_tercero == nit,
-            Pago.estado != "ANULADO",
-            mes_col_pago >= mes_inicio,
-            mes_col_pago <= mes_fin,
-        ).order_by(Pago.fecha, Pago.numero)
-    )
-    pagos = [
-        {
-            "numero": p.numero, "fecha": p.fecha,
-            "codigo_rubro": p.codigo_rubro, "obligacion_numero": p.obligacion_numero,
-            "valor": p.valor, "concepto": p.concepto,
-            "medio_pago": p.medio_pago, "no_comprobante": p.no_comprobante,
-        }
-        for p in pagos_res.scalars().all()
-    ]
+async def _nombres_terceros(db: AsyncSession, tenant_id: str) -> dict[str, str]:
+    result = await db.execute(select(Tercero.nit, Tercero.nombre).where(Tercero.tenant_id == tenant_id))
+    return dict(result.all())
 
-    return {
-        "tercero": {"nit": tercero.nit, "nombre": tercero.nombre},
-        "mes_inicio": mes_inicio,
-        "mes_fin": mes_fin,
-        "rps": rps,
-        "obligaciones": obls,
-        "pagos": pagos,
-        "total_rp": sum(r["valor"] for r in rps),
-        "total_obl": sum(o["valor"] for o in obls),
-        "total_pagos": sum(p["valor"] for p in pagos),
-    }
 
+async def totales_por_tercero(db: AsyncSession, tenant_id: str, mes_inicio: int = 1, mes_fin: int = 12) -> list[dict]:
+    """Total y cantidad de RPs, obligaciones y pagos por tercero en el período
+    (una consulta agrupada por tabla), ordenado por NIT."""
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
+    desde, hasta = rango_periodo(vigencia, mes_inicio, mes_fin)
+    nombres = await _nombres_terceros(db, tenant_id)
 
-async def verificar_equilibrio(db: AsyncSession, tenant_id: str) -> dict:
-    result = await db.execute(
-        select(func.coalesce(func.sum(RubroGasto.apropiacion_definitiva), 0))
-        .where(RubroGasto.tenant_id == tenant_id, RubroGasto.es_hoja == 1)
-    )
-    total_gastos = result.scalar()
+    filas: dict[str, dict] = {}
+    for prefijo, model, anulado in (("rp", RP, "ANULADO"), ("obl", Obligacion, "ANULADA"), ("pagos", Pago, "ANULADO")):
+        result = await db.execute(
+            select(model.nit_tercero, func.count(), func.sum(model.valor))
+            .where(model.tenant_id == tenant_id, model.estado != anulado, model.periodo.between(desde, hasta))
+            .group_by(model.nit_tercero)
+        )
+        for nit, cantidad, total in result.all():
+            fila = filas.setdefault(nit, {
+                "nit": nit, "nombre": nombres.get(nit, ""),
+                "cantidad_rp": 0, "total_rp": 0, "cantidad_obl": 0, "total_obl": 0,
+                "cantidad_pagos": 0, "total_pagos": 0,
+            })
+            fila[f"cantidad_{prefijo}"] = cantidad
+            fila[f"total_{prefijo}"] = total or 0
+    return [filas[nit] for nit in sorted(filas)]
+
+
+async def iter_informe_terceros(db: AsyncSession, tenant_id: str, mes_inicio: int = 1, mes_fin: int = 12):
+    """Genera el informe_tercero de cada tercero con documentos en el período,
+    ordenado por NIT, a partir de tres consultas (no tres por tercero)."""
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
+    desde, hasta = rango_periodo(vigencia, mes_inicio, mes_fin)
+    nombres = await _nombres_terceros(db, tenant_id)
+    docs = await _cargar_documentos_tercero(db, _documentos_tercero(tenant_id, desde, hasta))
+
+    nits = set(docs["rps"]) | set(docs["obligaciones"]) | set(docs["pagos"])
+    for nit in sorted(nits):
+        yield _informe_tercero(
+            nit, nombres.get(nit, ""), mes_inicio, mes_fin,
+            docs["rps"].get(nit, []), docs["obligaciones"].get(nit, []), docs["pagos"].get(nit, []),
+        )
 
-    result = await db.execute(
-        select(func.coalesce(func.sum(RubroIngreso.presupuesto_definitivo), 0))
-        .where(RubroIngreso.tenant_id == tenant_id, RubroIngreso.es_hoja == 1)
-    )
-    total_ingresos = result.scalar()
+
+ENCABEZADOS_TERCEROS_CSV = [
+    "nit", "nombre", "documento", "numero", "fecha", "codigo_rubro",
+    "valor", "documento_origen", "detalle",
+]
+
+
+def filas_csv_tercero(informe: dict) -> list[list]:
+    """Filas de detalle (una por documento) de un informe_tercero para CSV."""
+    nit, nombre = informe["tercero"]["nit"], informe["tercero"]["nombre"]
+    filas = []
+    for r in informe["rps"]:
+        filas.append([nit, nombre, "RP", r["numero"], r["fecha"], r["codigo_rubro"], r["valor"], "", r["objeto"]])
+    for o in informe["obligaciones"]:
+        filas.append([nit, nombre, "OBLIGACION", o["numero"], o["fecha"], o["codigo_rubro"], o["valor"],
+                      o["rp_numero"], o["factura"]])
+    for p in informe["pagos"]:
+        filas.append([nit, nombre, "PAGO", p["numero"], p["fecha"], p["codigo_rubro"], p["valor"],
+                      p["obligacion_numero"], p["concepto"]])
+    return filas
+
+
+async def verificar_equilibrio(db: AsyncSession, tenant_id: str, resumen: dict | None = None) -> dict:
+    """Apropiación de gastos vs presupuesto de ingresos; usa `resumen` (de
+    get_resumen) si el llamador ya lo tiene."""
+    if resumen is None:
+        resumen = await get_resumen(db, tenant_id)
+    total_gastos = resumen["apropiacion"]
+    total_ingresos = resumen["ppto_ingresos"]
 
     return {
         "total_gastos": total_gastos,
@@ -0,0 +1,91 @@
+"""
+Matrices densas rubro × mes (12 columnas) a partir de consultas agrupadas.
+
+Reemplaza las consultas por rubro y por mes de los informes de PAC: una
+consulta GROUP BY rubro, mes llena la matriz y los acumulados se calculan
+por columnas. Usa NumPy si está instalado; si no, listas de Python.
+"""
+
+from collections.abc import Sequence
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pac import PAC
+from app.models.pago import Pago
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+MESES = 12
+
+
+class MatrizMensual:
+    """Valores por rubro (fila) y mes 1..12 (columna)."""
+
+    def __init__(self, codigos: Sequence[str]):
+        self.codigos = list(codigos)
+        self.indice = {c: i for i, c in enumerate(self.codigos)}
+        self.con_datos: set[str] = set()
+        if np is not None:
+            self.valores = np.zeros((len(self.codigos), MESES))
+        else:
+            self.valores = [[0.0] * MESES for _ in self.codigos]
+
+    def sumar(self, codigo: str, mes: int, valor: float) -> None:
+        i = self.indice.get(codigo)
+        if i is None or not 1 <= mes <= MESES:
+            return
+        self.valores[i][mes - 1] += float(valor or 0)
+        self.con_datos.add(codigo)
+
+    def fila(self, codigo: str, hasta_mes: int = MESES) -> list[float]:
+        """Valores de los meses 1..hasta_mes del rubro."""
+        fila = self.valores[self.indice[codigo]][:hasta_mes]
+        return fila.tolist() if np is not None else list(fila)
+
+    def acumulado(self, hasta_mes: int = MESES) -> list[float]:
+        """Total de los meses 1..hasta_mes de cada rubro, en el orden de `codigos`."""
+        if not self.codigos or hasta_mes < 1:
+            return [0.0] * len(self.codigos)
+        if np is not None:
+            return np.cumsum(self.valores[:, :hasta_mes], axis=1)[:, -1].tolist()
+        totales = []
+        for fila in self.valores:
+            total = 0.0
+            for v in fila[:hasta_mes]:
+                total += v
+            totales.append(total)
+        return totales
+
+
+async def matriz_pac(db: AsyncSession, tenant_id: str, codigos: Sequence[str]) -> MatrizMensual:
+    """PAC programado por rubro y mes (una consulta)."""
+    matriz = MatrizMensual(codigos)
+    stmt = (
+        select(PAC.codigo_rubro, PAC.mes, func.sum(PAC.valor_programado))
+        .where(PAC.tenant_id == tenant_id)
+        .group_by(PAC.codigo_rubro, PAC.mes)
+    )
+    for codigo, mes, valor in (await db.execute(stmt)).all():
+        matriz.sumar(codigo, mes, valor)
+    return matriz
+
+
+async def matriz_pagos(db: AsyncSession, tenant_id: str, codigos: Sequence[str], vigencia: int) -> MatrizMensual:
+    """Pagos no anulados de la vigencia por rubro y mes (una consulta)."""
+    matriz = MatrizMensual(codigos)
+    stmt = (
+        select(Pago.codigo_rubro, Pago.periodo, func.sum(Pago.valor))
+        .where(
+            Pago.tenant_id == tenant_id,
+            Pago.estado != "ANULADO",
+            Pago.periodo.between(vigencia * 100 + 1, vigencia * 100 + MESES),
+        )
+        .group_by(Pago.codigo_rubro, Pago.periodo)
+    )
+    for codigo, periodo, valor in (await db.execute(stmt)).all():
+        matriz.sumar(codigo, periodo - vigencia * 100, valor)
+    return matriz
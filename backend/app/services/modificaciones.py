@@ -8,6 +8,7 @@ from app.models.rubros import RubroGasto, RubroIngreso
 from app.services import rubros_gastos
 from app.services import rubros_ingresos
 from app.services import config as config_svc
+from app.services import perfiles_carga
 
 
 # ---------------------------------------------------------------------------
@@ -304,13 +305,13 @@ async def registrar_credito_contracredito(
 # Listar modificaciones
 # ---------------------------------------------------------------------------
 
-async def listar(db: AsyncSession, tenant_id: str) -> list[ModificacionPresupuestal]:
+async def listar(db: AsyncSession, tenant_id: str, perfil: str | None = None) -> list[ModificacionPresupuestal]:
     stmt = select(ModificacionPresupuestal).where(
         ModificacionPresupuestal.tenant_id == tenant_id
     ).order_by(
         ModificacionPresupuestal.id.desc()
     )
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(ModificacionPresupuestal, perfil)))
     return list(result.scalars().all())
 
 
@@ -319,13 +320,13 @@ async def listar(db: AsyncSession, tenant_id: str) -> list[ModificacionPresupues
 # ---------------------------------------------------------------------------
 
 async def get_modificacion(
-    db: AsyncSession, tenant_id: str, id_mod: int
+    db: AsyncSession, tenant_id: str, id_mod: int, perfil: str | None = None
 ) -> ModificacionPresupuestal | None:
     stmt = select(ModificacionPresupuestal).where(
         ModificacionPresupuestal.tenant_id == tenant_id,
         ModificacionPresupuestal.id == id_mod,
     )
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(ModificacionPresupuestal, perfil)))
     return result.scalar_one_or_none()
 
 
@@ -12,7 +12,9 @@ from app.models.pago import Pago
 from app.models.rp import RP
 from app.services import rp as rp_svc
 from app.services import config as config_svc
+from app.services import ejecucion_mensual
 from app.services.conceptos import guardar_concepto
+from app.services import perfiles_carga
 
 
 async def saldo_obligacion(db: AsyncSession, tenant_id: str, numero_obl: int) -> float:
@@ -28,6 +30,17 @@ async def saldo_obligacion(db: AsyncSession, tenant_id: str, numero_obl: int) ->
     return float(obl.valor) - float(total_pagos)
 
 
+async def saldos_obligaciones(db: AsyncSession, tenant_id: str, obligaciones: list[Obligacion]) -> dict[int, float]:
+    """Saldo de varias obligaciones (como saldo_obligacion) con una sola consulta agrupada."""
+    stmt = (
+        select(Pago.obligacion_numero, func.sum(Pago.valor))
+        .where(Pago.tenant_id == tenant_id, Pago.estado != "ANULADO")
+        .group_by(Pago.obligacion_numero)
+    )
+    pagado = dict((await db.execute(stmt)).all()) if obligaciones else {}
+    return {o.numero: float(o.valor) - float(pagado.get(o.numero) or 0.0) for o in obligaciones}
+
+
 async def registrar(
     db: AsyncSession,
     tenant_id: str,
@@ -64,6 +77,7 @@ async def registrar(
         estado="ACTIVO",
     )
     db.add(nueva)
+    await ejecucion_mensual.registrar_movimiento(db, tenant_id, "OBLIGACION", nueva.codigo_rubro, nueva.fecha, valor)
 
     await guardar_concepto(db, tenant_id, rp.codigo_rubro, factura)
     await rp_svc.actualizar_estado(db, tenant_id, rp_numero)
@@ -76,18 +90,19 @@ async def get_obligaciones(
     db: AsyncSession,
     tenant_id: str,
     estado: str | None = None,
+    perfil: str | None = None,
 ) -> list[Obligacion]:
     stmt = select(Obligacion).where(Obligacion.tenant_id == tenant_id)
     if estado is not None:
         stmt = stmt.where(Obligacion.estado == estado)
     stmt = stmt.order_by(Obligacion.numero.desc())
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(Obligacion, perfil)))
     return list(result.scalars().all())
 
 
-async def get_obligacion(db: AsyncSession, tenant_id: str, numero: int) -> Obligacion | None:
+async def get_obligacion(db: AsyncSession, tenant_id: str, numero: int, perfil: str | None = None) -> Obligacion | None:
     stmt = select(Obligacion).where(Obligacion.tenant_id == tenant_id, Obligacion.numero == numero)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(Obligacion, perfil)))
     return result.scalar_one_or_none()
 
 
@@ -104,6 +119,9 @@ async def anular(db: AsyncSession, tenant_id: str, numero: int) -> Obligacion:
     pagos_activos = result.scalar() or 0
     if pagos_activos > 0:
         raise ValueError(f"No se puede anular: la obligacion tiene {pagos_activos} pago(s) activo(s)")
+    if obl.estado != "ANULADA":
+        await ejecucion_mensual.registrar_movimiento(
+            db, tenant_id, "OBLIGACION", obl.codigo_rubro, obl.fecha, -obl.valor)
     obl.estado = "ANULADA"
     await rp_svc.actualizar_estado(db, tenant_id, obl.rp_numero)
     await db.flush()
@@ -154,6 +172,9 @@ async def editar(
             raise ValueError(
                 f"El nuevo valor ({nuevo_valor:,.2f}) supera el saldo disponible del RP ({disponible_rp:,.2f})"
             )
+        if obl.estado != "ANULADA":
+            await ejecucion_mensual.registrar_movimiento(
+                db, tenant_id, "OBLIGACION", obl.codigo_rubro, obl.fecha, nuevo_valor - obl.valor)
         obl.valor = nuevo_valor
         valor_cambio = True
 
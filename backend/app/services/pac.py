@@ -1,9 +1,11 @@
-from sqlalchemy import select, func, and_, Integer
+from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.pac import PAC
 from app.models.pago import Pago
 from app.models.rubros import RubroGasto
+from app.services import config as config_svc
+from app.services.matriz_mensual import matriz_pac
 
 
 async def inicializar_pac(db: AsyncSession, tenant_id: str, codigo_rubro: str) -> list[PAC]:
@@ -70,13 +72,13 @@ async def get_pac_disponible(
     if pac_record is None:
         return 0
 
-    mes_col = func.cast(func.substr(Pago.fecha, 6, 2), Integer)
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
     stmt_pagos = select(func.coalesce(func.sum(Pago.valor), 0)).where(
         and_(
             Pago.tenant_id == tenant_id,
             Pago.codigo_rubro == codigo_rubro,
             Pago.estado == "PAGADO",
-            mes_col == mes,
+            Pago.periodo == vigencia * 100 + mes,
         )
     )
     result_pagos = await db.execute(stmt_pagos)
@@ -148,17 +150,15 @@ async def get_resumen_pac(db: AsyncSession, tenant_id: str) -> list[dict]:
     result = await db.execute(stmt)
     rubros = list(result.scalars().all())
 
-    resumen = []
-    for rubro in rubros:
-        pac_records = await get_pac(db, tenant_id, rubro.codigo)
-
-        meses = {}
-        total_programado = 0
-        for p in pac_records:
-            meses[p.mes] = p.valor_programado
-            total_programado += p.valor_programado
+    matriz = await matriz_pac(db, tenant_id, [r.codigo for r in rubros])
+    totales = matriz.acumulado()
 
-        pac_list = [{"mes": m, "valor_programado": v} for m, v in sorted(meses.items())]
+    resumen = []
+    for rubro, total_programado in zip(rubros, totales):
+        pac_list = (
+            [{"mes": m, "valor_programado": v} for m, v in enumerate(matriz.fila(rubro.codigo), 1)]
+            if rubro.codigo in matriz.con_datos else []
+        )
         resumen.append({
             "codigo": rubro.codigo,
             "cuenta": rubro.cuenta,
@@ -5,14 +5,16 @@ Incluye validacion PAC (Plan Anual de Caja).
 """
 
 from datetime import date
-from sqlalchemy import select, func, and_, cast, Integer
+from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.pago import Pago
 from app.models.obligacion import Obligacion
 from app.services import obligacion as obl_svc
 from app.services import config as config_svc
+from app.services import ejecucion_mensual
 from app.services import pac as pac_svc
+from app.services import perfiles_carga
 
 
 async def registrar(
@@ -66,23 +68,24 @@ async def registrar(
     db.add(nuevo)
 
     await db.flush()
+    await ejecucion_mensual.registrar_movimiento(db, tenant_id, "PAGO", nuevo.codigo_rubro, nuevo.fecha, valor)
     await obl_svc.actualizar_estado(db, tenant_id, obligacion_numero)
 
     return nuevo
 
 
-async def get_pagos(db: AsyncSession, tenant_id: str, estado: str | None = None) -> list[Pago]:
+async def get_pagos(db: AsyncSession, tenant_id: str, estado: str | None = None, perfil: str | None = None) -> list[Pago]:
     stmt = select(Pago).where(Pago.tenant_id == tenant_id)
     if estado:
         stmt = stmt.where(Pago.estado == estado)
     stmt = stmt.order_by(Pago.numero.desc())
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(Pago, perfil)))
     return list(result.scalars().all())
 
 
-async def get_pago(db: AsyncSession, tenant_id: str, numero: int) -> Pago | None:
+async def get_pago(db: AsyncSession, tenant_id: str, numero: int, perfil: str | None = None) -> Pago | None:
     stmt = select(Pago).where(Pago.tenant_id == tenant_id, Pago.numero == numero)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(Pago, perfil)))
     return result.scalar_one_or_none()
 
 
@@ -90,6 +93,9 @@ async def anular(db: AsyncSession, tenant_id: str, numero: int) -> Pago:
     pago = await get_pago(db, tenant_id, numero)
     if pago is None:
         raise ValueError(f"Pago {numero} no encontrado")
+    if pago.estado != "ANULADO":
+        await ejecucion_mensual.registrar_movimiento(
+            db, tenant_id, "PAGO", pago.codigo_rubro, pago.fecha, -pago.valor)
     pago.estado = "ANULADO"
     await obl_svc.actualizar_estado(db, tenant_id, pago.obligacion_numero)
     await db.flush()
@@ -121,6 +127,9 @@ async def editar(
             raise ValueError(
                 f"El nuevo valor ({nuevo_valor:,.2f}) supera el saldo disponible de la obligacion ({disponible:,.2f})"
             )
+        if pago.estado != "ANULADO":
+            await ejecucion_mensual.registrar_movimiento(
+                db, tenant_id, "PAGO", pago.codigo_rubro, pago.fecha, nuevo_valor - pago.valor)
         pago.valor = nuevo_valor
 
     if concepto is not None:
@@ -161,6 +170,7 @@ async def get_pagos_mes_rubro(
     codigo_rubro: str,
     mes: int,
 ) -> float:
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
     stmt = (
         select(func.sum(Pago.valor))
         .where(
@@ -168,7 +178,7 @@ async def get_pagos_mes_rubro(
                 Pago.tenant_id == tenant_id,
                 Pago.codigo_rubro == codigo_rubro,
                 Pago.estado != "ANULADO",
-                cast(func.substr(Pago.fecha, 6, 2), Integer) == mes,
+                Pago.periodo == vigencia * 100 + mes,
             )
         )
     )
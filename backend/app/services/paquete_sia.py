@@ -0,0 +1,122 @@
+"""
+Paquete ZIP con los 6 formatos CSV del SIA Contraloría.
+
+Los datos del corte se cargan una sola vez (informes.preparar_formatos_sia);
+los formatos se generan en paralelo en hilos a partir de esa instantánea y
+se agregan al ZIP (y se envían al cliente) en el orden fijo de los
+formatos, cada uno en cuanto él y los anteriores terminan. Las entradas
+llevan la fecha del mes del corte, así que la misma versión de datos
+produce siempre los mismos bytes.
+El ZIP terminado se guarda en el caché de informes (services.cache_informes)
+por tenant, mes y versión de datos: mientras nadie escriba en el tenant,
+las descargas siguientes lo sirven sin volver a consultar la base.
+"""
+
+import asyncio
+import zipfile
+from collections.abc import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import cache_informes
+from app.services import config as config_svc
+from app.services.informes import _MESES_SIA, preparar_formatos_sia
+
+INFORME = "sia_zip"
+
+
+class _SalidaZip:
+    """Destino de escritura de ZipFile que acumula lo escrito hasta `vaciar`.
+
+    No tiene seek ni tell: ZipFile lo trata como flujo no posicionable y
+    escribe cada entrada con descriptor de datos al final.
+    """
+
+    def __init__(self):
+        self._partes: list[bytes] = []
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+async def _generar(nombre: str, generador, argumentos: tuple) -> tuple[str, bytes]:
+    return nombre, await asyncio.to_thread(generador, *argumentos)
+
+
+def _fecha_entradas(anio: str, mes: int) -> tuple:
+    """Fecha de las entradas del ZIP: el primer día del mes del corte."""
+    try:
+        return (max(int(anio), 1980), min(max(mes, 1), 12), 1, 0, 0, 0)
+    except ValueError:
+        return (1980, 1, 1, 0, 0, 0)
+
+
+async def _iter_zip(formatos: list[tuple], clave: str, fecha: tuple) -> AsyncIterator[bytes]:
+    salida = _SalidaZip()
+    enviado: list[bytes] = []
+    tareas = [
+        asyncio.create_task(_generar(nombre, generador, argumentos))
+        for nombre, generador, argumentos in formatos
+    ]
+    try:
+        with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as zf:
+            for tarea in tareas:
+                nombre, contenido = await tarea
+                info = zipfile.ZipInfo(nombre, date_time=fecha)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o600 << 16  # lo mismo que writestr con un nombre
+                zf.writestr(info, contenido)
+                parte = salida.vaciar()
+                enviado.append(parte)
+                yield parte
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+    parte = salida.vaciar()
+    enviado.append(parte)
+    yield parte
+    # Solo se guarda el paquete que se envió completo
+    await cache_informes.guardar_bytes(clave, b"".join(enviado))
+
+
+async def preparar_zip(
+    db: AsyncSession, tenant_id: str, mes_consulta: int | None = None,
+) -> tuple[AsyncIterator[bytes], str, str]:
+    """Prepara el ZIP del SIA. Retorna (iterador de bytes, anio, nombre_mes).
+
+    Toda la lectura de la base ocurre aquí; el iterador solo genera y
+    comprime, así que puede consumirse después de cerrar la sesión (p.ej.
+    en un StreamingResponse).
+    """
+    if mes_consulta is None:
+        mes_consulta = int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1")
+    # La versión se lee antes que los datos: si alguien escribe mientras se
+    # carga, el paquete queda guardado con la versión anterior y no se reutiliza.
+    clave = await cache_informes.clave_actual(db, tenant_id, INFORME, {"mes": mes_consulta})
+    anio = await config_svc.get_config(db, tenant_id, "vigencia") or "2026"
+    nombre_mes = _MESES_SIA.get(mes_consulta, str(mes_consulta))
+
+    guardado = await cache_informes.leer_bytes(INFORME, clave)
+    if guardado is not None:
+        async def _desde_cache():
+            yield guardado
+        return _desde_cache(), anio, nombre_mes
+
+    institucion = await config_svc.get_config(db, tenant_id, "nombre_institucion") or "INSTITUCIÓN"
+    formatos = await preparar_formatos_sia(db, tenant_id, mes_consulta, anio, institucion)
+    return _iter_zip(formatos, clave, _fecha_entradas(anio, mes_consulta)), anio, nombre_mes
+
+
+async def generar_sia_zip(db: AsyncSession, tenant_id: str, mes_consulta: int | None = None) -> tuple[bytes, str, str]:
+    """Genera ZIP con los 6 formatos SIA. Retorna (bytes, anio, nombre_mes)."""
+    partes, anio, nombre_mes = await preparar_zip(db, tenant_id, mes_consulta)
+    return b"".join([parte async for parte in partes]), anio, nombre_mes
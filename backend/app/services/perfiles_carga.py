@@ -0,0 +1,111 @@
+"""
+Perfiles de carga de relaciones por entidad.
+
+Los modelos no cargan relaciones por sí solos (lazy="raise_on_sql"): cada
+consulta pide las que usa con `opciones(Modelo, perfil)`.
+
+- "lista":       solo la columna que muestran los listados (cuenta del
+                 rubro, nombre del tercero)
+- "detalle":     el rubro / tercero completo del documento individual
+- "comprobante": la cadena presupuestal que imprime services.comprobantes
+"""
+
+from sqlalchemy import select, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.cdp import CDP
+from app.models.rp import RP
+from app.models.obligacion import Obligacion
+from app.models.pago import Pago
+from app.models.recaudo import Recaudo
+from app.models.reconocimiento import Reconocimiento
+from app.models.modificaciones import ModificacionPresupuestal
+from app.models.rubros import RubroGasto, RubroIngreso
+from app.models.terceros import Tercero
+
+# Los listados solo muestran la cuenta del rubro o el nombre del tercero: se
+# trae esa columna en el mismo JOIN (las demás quedan en raiseload)
+_CUENTA = (RubroGasto.cuenta,)
+_CUENTA_INGRESO = (RubroIngreso.cuenta,)
+_NOMBRE = (Tercero.nombre,)
+
+
+def _solo(relacion, columnas: tuple):
+    return joinedload(relacion).load_only(*columnas, raiseload=True)
+
+
+_RECAUDO = (joinedload(Recaudo.rubro),)
+_RECONOCIMIENTO = (joinedload(Reconocimiento.rubro), joinedload(Reconocimiento.tercero))
+_MODIFICACION = (selectinload(ModificacionPresupuestal.detalles),)
+
+PERFILES: dict[type, dict[str, tuple]] = {
+    CDP: {
+        "lista": (_solo(CDP.rubro, _CUENTA),),
+        "detalle": (joinedload(CDP.rubro),),
+        "comprobante": (
+            joinedload(CDP.rubro),
+            selectinload(CDP.rps).joinedload(RP.tercero),
+        ),
+    },
+    RP: {
+        "lista": (_solo(RP.tercero, _NOMBRE),),
+        "detalle": (joinedload(RP.tercero),),
+        "comprobante": (
+            joinedload(RP.tercero),
+            joinedload(RP.cdp),
+            selectinload(RP.obligaciones),
+        ),
+    },
+    Obligacion: {
+        "lista": (_solo(Obligacion.tercero, _NOMBRE),),
+        "detalle": (joinedload(Obligacion.tercero),),
+        "comprobante": (
+            joinedload(Obligacion.tercero),
+            joinedload(Obligacion.rp).joinedload(RP.cdp),
+            selectinload(Obligacion.pagos),
+        ),
+    },
+    Pago: {
+        "lista": (_solo(Pago.tercero, _NOMBRE),),
+        "detalle": (joinedload(Pago.tercero),),
+        "comprobante": (
+            joinedload(Pago.tercero),
+            joinedload(Pago.obligacion).joinedload(Obligacion.rp).joinedload(RP.cdp),
+        ),
+    },
+    Recaudo: {
+        "lista": (_solo(Recaudo.rubro, _CUENTA_INGRESO),),
+        "detalle": _RECAUDO,
+        "comprobante": _RECAUDO,
+    },
+    Reconocimiento: {
+        "lista": (_solo(Reconocimiento.rubro, _CUENTA_INGRESO), _solo(Reconocimiento.tercero, _NOMBRE)),
+        "detalle": _RECONOCIMIENTO,
+        "comprobante": _RECONOCIMIENTO,
+    },
+    # El listado de modificaciones muestra sus detalles: un solo perfil
+    ModificacionPresupuestal: {"lista": _MODIFICACION, "detalle": _MODIFICACION, "comprobante": _MODIFICACION},
+}
+
+
+def opciones(model: type, perfil: str | None) -> tuple:
+    """Opciones de carga del perfil; sin perfil no se carga ninguna relación."""
+    if perfil is None:
+        return ()
+    return PERFILES[model][perfil]
+
+
+async def cargar(db: AsyncSession, obj, perfil: str = "detalle"):
+    """Carga las relaciones del perfil en un objeto ya persistido (p.ej. recién registrado)."""
+    model = type(obj)
+    mapper = inspect(model)
+    pk = mapper.primary_key_from_instance(obj)
+    stmt = (
+        select(model)
+        .where(*[col == valor for col, valor in zip(mapper.primary_key, pk)])
+        .options(*opciones(model, perfil))
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one()
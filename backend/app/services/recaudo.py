@@ -6,6 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.recaudo import Recaudo
 from app.services import rubros_ingresos as rubros_svc
 from app.services import config as config_svc
+from app.services import ejecucion_mensual
+from app.services import perfiles_carga
 
 
 async def registrar(
@@ -39,22 +41,23 @@ async def registrar(
     )
     db.add(nuevo)
     await db.flush()
+    await ejecucion_mensual.registrar_movimiento(db, tenant_id, "RECAUDO", codigo_rubro, nuevo.fecha, valor)
     return nuevo
 
 
 async def get_recaudos(
-    db: AsyncSession, tenant_id: str, estado: str | None = None
+    db: AsyncSession, tenant_id: str, estado: str | None = None, perfil: str | None = None
 ) -> list[Recaudo]:
     stmt = select(Recaudo).where(Recaudo.tenant_id == tenant_id).order_by(Recaudo.numero.desc())
     if estado is not None:
         stmt = stmt.where(Recaudo.estado == estado)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(Recaudo, perfil)))
     return list(result.scalars().all())
 
 
-async def get_recaudo(db: AsyncSession, tenant_id: str, numero: int) -> Recaudo | None:
+async def get_recaudo(db: AsyncSession, tenant_id: str, numero: int, perfil: str | None = None) -> Recaudo | None:
     stmt = select(Recaudo).where(Recaudo.tenant_id == tenant_id, Recaudo.numero == numero)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(Recaudo, perfil)))
     return result.scalar_one_or_none()
 
 
@@ -62,6 +65,9 @@ async def anular(db: AsyncSession, tenant_id: str, numero: int) -> Recaudo:
     recaudo = await get_recaudo(db, tenant_id, numero)
     if recaudo is None:
         raise ValueError(f"Recaudo {numero} no encontrado")
+    if recaudo.estado != "ANULADO":
+        await ejecucion_mensual.registrar_movimiento(
+            db, tenant_id, "RECAUDO", recaudo.codigo_rubro, recaudo.fecha, -recaudo.valor)
     recaudo.estado = "ANULADO"
     await db.flush()
     return recaudo
@@ -85,6 +91,8 @@ async def editar(
     if nuevo_valor is not None:
         if nuevo_valor <= 0:
             raise ValueError("El valor del recaudo debe ser mayor a cero")
+        await ejecucion_mensual.registrar_movimiento(
+            db, tenant_id, "RECAUDO", recaudo.codigo_rubro, recaudo.fecha, nuevo_valor - recaudo.valor)
         recaudo.valor = nuevo_valor
     if concepto is not None:
         recaudo.concepto = concepto
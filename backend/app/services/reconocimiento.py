@@ -6,21 +6,27 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.reconocimiento import Reconocimiento
 from app.services import rubros_ingresos as rubros_svc
 from app.services import config as config_svc
+from app.services import ejecucion_mensual
+from app.services import perfiles_carga
 
 
 async def get_reconocimientos(
-    db: AsyncSession, tenant_id: str, estado: str | None = None
+    db: AsyncSession, tenant_id: str, estado: str | None = None, perfil: str | None = None
 ) -> list[Reconocimiento]:
     stmt = select(Reconocimiento).where(Reconocimiento.tenant_id == tenant_id).order_by(Reconocimiento.numero.desc())
     if estado is not None:
         stmt = stmt.where(Reconocimiento.estado == estado)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(Reconocimiento, perfil)))
     return list(result.scalars().all())
 
 
-async def get_reconocimiento(db: AsyncSession, tenant_id: str, numero: int) -> Reconocimiento | None:
+async def get_reconocimiento(
+    db: AsyncSession, tenant_id: str, numero: int, perfil: str | None = None
+) -> Reconocimiento | None:
     result = await db.execute(
-        select(Reconocimiento).where(Reconocimiento.tenant_id == tenant_id, Reconocimiento.numero == numero)
+        select(Reconocimiento)
+        .where(Reconocimiento.tenant_id == tenant_id, Reconocimiento.numero == numero)
+        .options(*perfiles_carga.opciones(Reconocimiento, perfil))
     )
     return result.scalar_one_or_none()
 
@@ -52,6 +58,8 @@ async def registrar(
     )
     db.add(nuevo)
     await db.flush()
+    await ejecucion_mensual.registrar_movimiento(
+        db, tenant_id, "RECONOCIMIENTO", data.codigo_rubro, nuevo.fecha, data.valor)
     return nuevo
 
 
@@ -63,6 +71,8 @@ async def editar(db: AsyncSession, tenant_id: str, numero: int, data) -> Reconoc
         raise ValueError("No se puede editar un reconocimiento anulado")
 
     if data.valor is not None:
+        await ejecucion_mensual.registrar_movimiento(
+            db, tenant_id, "RECONOCIMIENTO", rec.codigo_rubro, rec.fecha, data.valor - rec.valor)
         rec.valor = data.valor
     if data.tercero_nit is not None:
         rec.tercero_nit = data.tercero_nit
@@ -81,6 +91,8 @@ async def anular(db: AsyncSession, tenant_id: str, numero: int) -> Reconocimient
         raise ValueError(f"Reconocimiento {numero} no encontrado")
     if rec.estado == "ANULADO":
         raise ValueError("El reconocimiento ya esta anulado")
+    await ejecucion_mensual.registrar_movimiento(
+        db, tenant_id, "RECONOCIMIENTO", rec.codigo_rubro, rec.fecha, -rec.valor)
     rec.estado = "ANULADO"
     await db.flush()
     return rec
@@ -0,0 +1,343 @@
+"""
+Registro masivo de documentos (CDP, RP, obligación, pago) en una transacción.
+
+Cada función carga de una vez los documentos padre y lo ya consumido de cada
+uno (una consulta agrupada), valida los elementos del lote en orden contra
+esos saldos —descontando en memoria lo que consumen los elementos anteriores
+del mismo lote—, reserva los consecutivos en bloque e inserta los válidos.
+
+Devuelve {"registrados", "errores", "resultados"}, con un resultado por
+elemento: {"indice", "numero", "error"}. Con `atomico=True` basta un error
+para que no se registre ninguno. No hace commit.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cdp import CDP
+from app.models.rp import RP
+from app.models.obligacion import Obligacion
+from app.models.pago import Pago
+from app.models.pac import PAC
+from app.models.periodo import periodo_de_fecha
+from app.models.rubros import RubroGasto
+from app.models.terceros import Tercero
+from app.services import config as config_svc
+from app.services import ejecucion_mensual
+from app.services.conceptos import guardar_conceptos
+
+LIMITE_LOTE = 1000
+
+
+def _dec(valor) -> Decimal:
+    return Decimal(str(valor or 0))
+
+
+async def _consumido(db: AsyncSession, tenant_id: str, model, columna, anulado: str, claves: set) -> dict:
+    """SUM(valor) de los documentos hijos activos, agrupado por documento padre."""
+    if not claves:
+        return {}
+    stmt = (
+        select(columna, func.sum(model.valor))
+        .where(model.tenant_id == tenant_id, columna.in_(claves), model.estado != anulado)
+        .group_by(columna)
+    )
+    return {clave: _dec(total) for clave, total in (await db.execute(stmt)).all()}
+
+
+async def _por_clave(db: AsyncSession, tenant_id: str, model, columna, claves: set) -> dict:
+    if not claves:
+        return {}
+    stmt = select(model).where(model.tenant_id == tenant_id, columna.in_(claves))
+    return {getattr(obj, columna.key): obj for obj in (await db.execute(stmt)).scalars()}
+
+
+async def _insertar(
+    db: AsyncSession,
+    tenant_id: str,
+    tipo_consecutivo: str,
+    documento: str,
+    resultados: list[dict],
+    validos: list[tuple[int, object]],
+    atomico: bool,
+) -> bool:
+    """Numera en bloque e inserta los documentos válidos. False si el lote no se registra."""
+    if not validos or (atomico and any(r["error"] for r in resultados)):
+        return False
+
+    numeros = await config_svc.reservar_consecutivos(db, tenant_id, tipo_consecutivo, len(validos))
+    por_rubro: dict[str, float] = defaultdict(float)
+    for (indice, doc), numero in zip(validos, numeros):
+        doc.numero = numero
+        resultados[indice]["numero"] = numero
+        por_rubro[doc.codigo_rubro] += doc.valor
+    db.add_all([doc for _, doc in validos])
+    await db.flush()
+
+    fecha = validos[0][1].fecha
+    for codigo_rubro, total in por_rubro.items():
+        await ejecucion_mensual.registrar_movimiento(db, tenant_id, documento, codigo_rubro, fecha, total)
+    return True
+
+
+def _actualizar_estados(padres: dict, saldos: dict, numeros: set, agotado: str):
+    """Igual que actualizar_estado de cada servicio, con los saldos ya calculados."""
+    for numero in numeros:
+        if saldos[numero] <= 0:
+            padres[numero].estado = agotado
+        elif padres[numero].estado == agotado:
+            padres[numero].estado = "ACTIVO"
+
+
+def _resumen(resultados: list[dict]) -> dict:
+    return {
+        "registrados": sum(1 for r in resultados if r["numero"] is not None),
+        "errores": sum(1 for r in resultados if r["error"]),
+        "resultados": resultados,
+    }
+
+
+def _validar_lote(items: list) -> list[dict]:
+    if len(items) > LIMITE_LOTE:
+        raise ValueError(f"El lote supera el máximo de {LIMITE_LOTE} documentos")
+    return [{"indice": i, "numero": None, "error": None} for i in range(len(items))]
+
+
+# ---------------------------------------------------------------------------
+# CDP: saldo del rubro = apropiación definitiva - SUM(CDPs activos)
+# ---------------------------------------------------------------------------
+
+async def registrar_cdps(db: AsyncSession, tenant_id: str, items: list, atomico: bool = False) -> dict:
+    """items: objetos con codigo_rubro, objeto, valor, fuente_sifse, item_sifse (CDPCreate)."""
+    resultados = _validar_lote(items)
+    codigos = {it.codigo_rubro for it in items}
+    rubros = await _por_clave(db, tenant_id, RubroGasto, RubroGasto.codigo, codigos)
+    consumido = await _consumido(db, tenant_id, CDP, CDP.codigo_rubro, "ANULADO", codigos)
+    saldos = {c: _dec(r.apropiacion_definitiva) - consumido.get(c, Decimal(0)) for c, r in rubros.items()}
+
+    fecha = date.today().isoformat()
+    validos = []
+    for i, it in enumerate(items):
+        if it.codigo_rubro not in rubros:
+            resultados[i]["error"] = f"Rubro {it.codigo_rubro} no encontrado"
+        elif it.valor <= 0:
+            resultados[i]["error"] = "El valor del CDP debe ser mayor a cero"
+        elif _dec(it.valor) > saldos[it.codigo_rubro]:
+            resultados[i]["error"] = (
+                f"El valor ({it.valor:,.2f}) supera el saldo disponible del rubro "
+                f"({saldos[it.codigo_rubro]:,.2f})"
+            )
+        else:
+            saldos[it.codigo_rubro] -= _dec(it.valor)
+            validos.append((i, CDP(
+                tenant_id=tenant_id,
+                fecha=fecha,
+                codigo_rubro=it.codigo_rubro,
+                objeto=it.objeto,
+                valor=it.valor,
+                fuente_sifse=it.fuente_sifse,
+                item_sifse=it.item_sifse,
+                estado="ACTIVO",
+            )))
+
+    if await _insertar(db, tenant_id, "CDP", "CDP", resultados, validos, atomico):
+        await guardar_conceptos(db, tenant_id, [(doc.codigo_rubro, doc.objeto) for _, doc in validos])
+    return _resumen(resultados)
+
+
+# ---------------------------------------------------------------------------
+# RP: saldo del CDP = valor - SUM(RPs activos)
+# ---------------------------------------------------------------------------
+
+async def registrar_rps(db: AsyncSession, tenant_id: str, items: list, atomico: bool = False) -> dict:
+    """items: objetos con cdp_numero, nit_tercero, valor, objeto (RPCreate)."""
+    resultados = _validar_lote(items)
+    numeros_cdp = {it.cdp_numero for it in items}
+    cdps = await _por_clave(db, tenant_id, CDP, CDP.numero, numeros_cdp)
+    consumido = await _consumido(db, tenant_id, RP, RP.cdp_numero, "ANULADO", numeros_cdp)
+    saldos = {n: _dec(c.valor) - consumido.get(n, Decimal(0)) for n, c in cdps.items()}
+    terceros = await _por_clave(db, tenant_id, Tercero, Tercero.nit, {it.nit_tercero for it in items})
+
+    fecha = date.today().isoformat()
+    validos = []
+    for i, it in enumerate(items):
+        cdp = cdps.get(it.cdp_numero)
+        if cdp is None:
+            resultados[i]["error"] = f"CDP {it.cdp_numero} no encontrado"
+        elif cdp.estado == "ANULADO":
+            resultados[i]["error"] = f"El CDP {it.cdp_numero} esta anulado"
+        elif it.nit_tercero not in terceros:
+            resultados[i]["error"] = f"Tercero con NIT {it.nit_tercero} no encontrado"
+        elif it.valor <= 0:
+            resultados[i]["error"] = "El valor del RP debe ser mayor a cero"
+        elif _dec(it.valor) > saldos[it.cdp_numero]:
+            resultados[i]["error"] = (
+                f"El valor ({it.valor:,.2f}) supera el saldo del CDP ({saldos[it.cdp_numero]:,.2f})"
+            )
+        else:
+            saldos[it.cdp_numero] -= _dec(it.valor)
+            validos.append((i, RP(
+                tenant_id=tenant_id,
+                fecha=fecha,
+                cdp_numero=it.cdp_numero,
+                codigo_rubro=cdp.codigo_rubro,
+                nit_tercero=it.nit_tercero,
+                objeto=it.objeto,
+                valor=it.valor,
+                fuente_sifse=cdp.fuente_sifse,
+                item_sifse=cdp.item_sifse,
+                estado="ACTIVO",
+            )))
+
+    if await _insertar(db, tenant_id, "RP", "RP", resultados, validos, atomico):
+        _actualizar_estados(cdps, saldos, {doc.cdp_numero for _, doc in validos}, "AGOTADO")
+        await db.flush()
+    return _resumen(resultados)
+
+
+# ---------------------------------------------------------------------------
+# Obligación: saldo del RP = valor - SUM(obligaciones activas)
+# ---------------------------------------------------------------------------
+
+async def registrar_obligaciones(db: AsyncSession, tenant_id: str, items: list, atomico: bool = False) -> dict:
+    """items: objetos con rp_numero, valor, factura (ObligacionCreate)."""
+    resultados = _validar_lote(items)
+    numeros_rp = {it.rp_numero for it in items}
+    rps = await _por_clave(db, tenant_id, RP, RP.numero, numeros_rp)
+    consumido = await _consumido(db, tenant_id, Obligacion, Obligacion.rp_numero, "ANULADA", numeros_rp)
+    saldos = {n: _dec(r.valor) - consumido.get(n, Decimal(0)) for n, r in rps.items()}
+
+    fecha = date.today().isoformat()
+    validos = []
+    for i, it in enumerate(items):
+        rp = rps.get(it.rp_numero)
+        if rp is None:
+            resultados[i]["error"] = f"RP {it.rp_numero} no encontrado"
+        elif rp.estado == "ANULADO":
+            resultados[i]["error"] = f"RP {it.rp_numero} esta ANULADO, no se puede obligar"
+        elif it.valor <= 0:
+            resultados[i]["error"] = "El valor debe ser mayor a cero"
+        elif _dec(it.valor) > saldos[it.rp_numero]:
+            resultados[i]["error"] = (
+                f"El valor ({it.valor:,.2f}) supera el saldo disponible del RP ({saldos[it.rp_numero]:,.2f})"
+            )
+        else:
+            saldos[it.rp_numero] -= _dec(it.valor)
+            validos.append((i, Obligacion(
+                tenant_id=tenant_id,
+                fecha=fecha,
+                rp_numero=it.rp_numero,
+                valor=it.valor,
+                factura=it.factura,
+                codigo_rubro=rp.codigo_rubro,
+                nit_tercero=rp.nit_tercero,
+                fuente_sifse=rp.fuente_sifse,
+                item_sifse=rp.item_sifse,
+                estado="ACTIVO",
+            )))
+
+    if await _insertar(db, tenant_id, "obligacion", "OBLIGACION", resultados, validos, atomico):
+        await guardar_conceptos(db, tenant_id, [(doc.codigo_rubro, doc.factura) for _, doc in validos])
+        _actualizar_estados(rps, saldos, {doc.rp_numero for _, doc in validos}, "AGOTADO")
+        await db.flush()
+    return _resumen(resultados)
+
+
+# ---------------------------------------------------------------------------
+# Pago: saldo de la obligación = valor - SUM(pagos activos), y PAC del mes
+# ---------------------------------------------------------------------------
+
+async def _pac_disponible(db: AsyncSession, tenant_id: str, codigos: set, mes: int) -> dict:
+    """PAC disponible del mes por rubro; None si el rubro no tiene PAC configurado."""
+    if not codigos:
+        return {}
+    stmt = select(PAC.codigo_rubro, PAC.mes, PAC.valor_programado).where(
+        PAC.tenant_id == tenant_id, PAC.codigo_rubro.in_(codigos))
+    programado_total: dict[str, float] = defaultdict(float)
+    programado_mes: dict[str, float] = {}
+    for codigo, pac_mes, valor in (await db.execute(stmt)).all():
+        programado_total[codigo] += valor or 0
+        if pac_mes == mes:
+            programado_mes[codigo] = valor or 0
+
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
+    stmt = (
+        select(Pago.codigo_rubro, func.sum(Pago.valor))
+        .where(
+            Pago.tenant_id == tenant_id,
+            Pago.codigo_rubro.in_(codigos),
+            Pago.estado == "PAGADO",
+            Pago.periodo == vigencia * 100 + mes,
+        )
+        .group_by(Pago.codigo_rubro)
+    )
+    pagado = {codigo: total or 0 for codigo, total in (await db.execute(stmt)).all()}
+
+    return {
+        codigo: (
+            None if not programado_total.get(codigo)
+            else _dec(programado_mes[codigo]) - _dec(pagado.get(codigo, 0)) if codigo in programado_mes
+            else Decimal(0)
+        )
+        for codigo in codigos
+    }
+
+
+async def registrar_pagos(db: AsyncSession, tenant_id: str, items: list, atomico: bool = False) -> dict:
+    """items: objetos con obligacion_numero, valor, concepto, medio_pago,
+    no_comprobante, cuenta_bancaria_id (PagoCreate)."""
+    resultados = _validar_lote(items)
+    numeros_obl = {it.obligacion_numero for it in items}
+    obligaciones = await _por_clave(db, tenant_id, Obligacion, Obligacion.numero, numeros_obl)
+    consumido = await _consumido(db, tenant_id, Pago, Pago.obligacion_numero, "ANULADO", numeros_obl)
+    saldos = {n: _dec(o.valor) - consumido.get(n, Decimal(0)) for n, o in obligaciones.items()}
+    mes_actual = int(await config_svc.get_config(db, tenant_id, "mes_actual"))
+    pac = await _pac_disponible(db, tenant_id, {o.codigo_rubro for o in obligaciones.values()}, mes_actual)
+
+    fecha = date.today().isoformat()
+    # Los pagos del lote consumen el PAC validado solo si caen en ese mes
+    consume_pac = periodo_de_fecha(fecha) == await config_svc.get_vigencia(db, tenant_id) * 100 + mes_actual
+    validos = []
+    for i, it in enumerate(items):
+        obl = obligaciones.get(it.obligacion_numero)
+        if obl is None:
+            resultados[i]["error"] = f"Obligacion {it.obligacion_numero} no encontrada"
+        elif obl.estado == "ANULADA":
+            resultados[i]["error"] = f"Obligacion {it.obligacion_numero} esta ANULADA, no se puede pagar"
+        elif it.valor <= 0:
+            resultados[i]["error"] = "El valor debe ser mayor a cero"
+        elif _dec(it.valor) > saldos[it.obligacion_numero]:
+            resultados[i]["error"] = (
+                f"El valor ({it.valor:,.2f}) supera el saldo disponible de la obligacion "
+                f"({saldos[it.obligacion_numero]:,.2f})"
+            )
+        elif pac[obl.codigo_rubro] is not None and _dec(it.valor) > pac[obl.codigo_rubro]:
+            resultados[i]["error"] = f"Excede PAC disponible: ${pac[obl.codigo_rubro]:,.2f}"
+        else:
+            saldos[it.obligacion_numero] -= _dec(it.valor)
+            if consume_pac and pac[obl.codigo_rubro] is not None:
+                pac[obl.codigo_rubro] -= _dec(it.valor)
+            validos.append((i, Pago(
+                tenant_id=tenant_id,
+                fecha=fecha,
+                obligacion_numero=it.obligacion_numero,
+                valor=it.valor,
+                concepto=it.concepto,
+                medio_pago=it.medio_pago,
+                no_comprobante=it.no_comprobante,
+                cuenta_bancaria_id=it.cuenta_bancaria_id,
+                codigo_rubro=obl.codigo_rubro,
+                nit_tercero=obl.nit_tercero,
+                fuente_sifse=obl.fuente_sifse,
+                item_sifse=obl.item_sifse,
+                estado="PAGADO",
+            )))
+
+    if await _insertar(db, tenant_id, "pago", "PAGO", resultados, validos, atomico):
+        _actualizar_estados(obligaciones, saldos, {doc.obligacion_numero for _, doc in validos}, "PAGADA")
+        await db.flush()
+    return _resumen(resultados)
@@ -10,6 +10,8 @@ from app.models.cdp import CDP
 from app.models.terceros import Tercero
 from app.services import cdp as cdp_svc
 from app.services import config as config_svc
+from app.services import ejecucion_mensual
+from app.services import perfiles_carga
 
 
 async def saldo_rp(db: AsyncSession, tenant_id: str, numero_rp: int) -> Decimal:
@@ -28,6 +30,20 @@ async def saldo_rp(db: AsyncSession, tenant_id: str, numero_rp: int) -> Decimal:
     return Decimal(str(rp.valor)) - Decimal(str(total_obligaciones))
 
 
+async def saldos_rps(db: AsyncSession, tenant_id: str, rps: list[RP]) -> dict[int, Decimal]:
+    """Saldo de varios RP (como saldo_rp) con una sola consulta agrupada."""
+    stmt = (
+        select(Obligacion.rp_numero, func.sum(Obligacion.valor))
+        .where(Obligacion.tenant_id == tenant_id, Obligacion.estado != "ANULADA")
+        .group_by(Obligacion.rp_numero)
+    )
+    consumido = dict((await db.execute(stmt)).all()) if rps else {}
+    return {
+        r.numero: Decimal(str(r.valor)) - Decimal(str(consumido.get(r.numero) or Decimal(0)))
+        for r in rps
+    }
+
+
 async def registrar(
     db: AsyncSession,
     tenant_id: str,
@@ -75,21 +91,22 @@ async def registrar(
     )
     db.add(nuevo_rp)
     await db.flush()
+    await ejecucion_mensual.registrar_movimiento(db, tenant_id, "RP", nuevo_rp.codigo_rubro, nuevo_rp.fecha, valor)
     await cdp_svc.actualizar_estado(db, tenant_id, cdp_numero)
     return nuevo_rp
 
 
-async def get_rps(db: AsyncSession, tenant_id: str, estado: str | None = None) -> list[RP]:
+async def get_rps(db: AsyncSession, tenant_id: str, estado: str | None = None, perfil: str | None = None) -> list[RP]:
     stmt = select(RP).where(RP.tenant_id == tenant_id).order_by(RP.numero.desc())
     if estado is not None:
         stmt = stmt.where(RP.estado == estado)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(RP, perfil)))
     return list(result.scalars().all())
 
 
-async def get_rp(db: AsyncSession, tenant_id: str, numero: int) -> RP | None:
+async def get_rp(db: AsyncSession, tenant_id: str, numero: int, perfil: str | None = None) -> RP | None:
     stmt = select(RP).where(RP.tenant_id == tenant_id, RP.numero == numero)
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*perfiles_carga.opciones(RP, perfil)))
     return result.scalar_one_or_none()
 
 
@@ -116,6 +133,8 @@ async def anular(db: AsyncSession, tenant_id: str, numero: int) -> RP:
         raise ValueError(
             f"No se puede anular el RP {numero}: tiene {obligaciones_activas} obligacion(es) activa(s)"
         )
+    if rp.estado != "ANULADO":
+        await ejecucion_mensual.registrar_movimiento(db, tenant_id, "RP", rp.codigo_rubro, rp.fecha, -rp.valor)
     rp.estado = "ANULADO"
     await db.flush()
     await cdp_svc.actualizar_estado(db, tenant_id, rp.cdp_numero)
@@ -171,6 +190,9 @@ async def editar(
                 raise ValueError(
                     f"El incremento ({diferencia:,.2f}) supera el saldo del CDP ({saldo:,.2f})"
                 )
+        if rp.estado != "ANULADO":
+            await ejecucion_mensual.registrar_movimiento(
+                db, tenant_id, "RP", rp.codigo_rubro, rp.fecha, nuevo_valor - rp.valor)
         rp.valor = nuevo_valor
 
     if objeto is not None:
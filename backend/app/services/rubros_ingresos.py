@@ -2,6 +2,7 @@ from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.rubros import RubroIngreso
 from app.models.recaudo import Recaudo
+from app.services.arbol_rubros import marcar_hojas, totalizar_padres
 
 
 async def get_rubros(db: AsyncSession, tenant_id: str, solo_hojas: bool = False) -> list[RubroIngreso]:
@@ -130,26 +131,25 @@ async def eliminar(db: AsyncSession, tenant_id: str, codigo: str):
 
 
 async def _recalcular_hojas(db: AsyncSession, tenant_id: str):
-    all_rubros = await get_rubros(db, tenant_id)
-    codigos = {r.codigo for r in all_rubros}
-    for rubro in all_rubros:
-        has_children = any(c.startswith(rubro.codigo + ".") for c in codigos if c != rubro.codigo)
-        new_val = 0 if has_children else 1
-        if rubro.es_hoja != new_val:
-            rubro.es_hoja = new_val
+    marcar_hojas(await get_rubros(db, tenant_id))
     await db.commit()
 
 
+_CAMPOS_APROPIACION = ("presupuesto_inicial", "adiciones", "reducciones", "presupuesto_definitivo")
+
+
 async def sincronizar_padres(db: AsyncSession, tenant_id: str):
-    all_rubros = await get_rubros(db, tenant_id)
-    hojas = [r for r in all_rubros if r.es_hoja == 1]
-    padres = [r for r in all_rubros if r.es_hoja == 0]
-
-    for padre in padres:
-        hijos = [h for h in hojas if h.codigo.startswith(padre.codigo + ".")]
-        if hijos:
-            padre.presupuesto_inicial = sum(h.presupuesto_inicial for h in hijos)
-            padre.adiciones = sum(h.adiciones for h in hijos)
-            padre.reducciones = sum(h.reducciones for h in hijos)
-            padre.presupuesto_definitivo = sum(h.presupuesto_definitivo for h in hijos)
+    totalizar_padres(await get_rubros(db, tenant_id), _CAMPOS_APROPIACION)
+    await db.commit()
+
+
+async def recalcular_catalogo(db: AsyncSession, tenant_id: str, rubros: list | None = None):
+    """_recalcular_hojas + sincronizar_padres con una sola carga del catálogo.
+
+    `rubros` permite pasar el catálogo ya cargado (p.ej. durante una importación).
+    """
+    if rubros is None:
+        rubros = await get_rubros(db, tenant_id)
+    marcar_hojas(rubros)
+    totalizar_padres(rubros, _CAMPOS_APROPIACION)
     await db.commit()
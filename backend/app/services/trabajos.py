@@ -0,0 +1,435 @@
+"""
+Trabajos en segundo plano: informes pesados, importaciones, copias de
+seguridad y consolidación fuera del ciclo de la petición HTTP.
+
+La cola es del proceso (tareas asyncio) y el estado vive en la tabla
+trabajos, así que un trabajo se puede consultar, descargar o cancelar desde
+cualquier petición y sobrevive a reinicios:
+
+- Cada trabajo espera un cupo de su tenant (TRABAJOS_MAX_TENANT) y uno
+  global (TRABAJOS_MAX_GLOBAL) y se toma con UPDATE … WHERE
+  estado='PENDIENTE'; dos procesos nunca toman el mismo trabajo.
+- El trabajo tomado guarda el proceso que lo ejecuta (`propietario`) y un
+  `latido` que ese proceso renueva cada TRABAJOS_LATIDO_SEGUNDOS.
+- Se registran inicio, fin y duración de cada ejecución (`estadisticas`).
+- Al iniciar la app, `reanudar_pendientes` vuelve a encolar los pendientes.
+  Los EN_CURSO con el latido vencido (su proceso murió) se repiten si su
+  tipo no escribe datos; los demás se marcan ERROR para no aplicar dos veces
+  una importación. Los EN_CURSO de otros procesos vivos no se tocan.
+
+En SQLite un trabajo de escritura tiene el bloqueo de escritura mientras
+corre y el latido no se puede guardar hasta que termine; con varios procesos
+sobre la misma base conviene PostgreSQL.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.trabajo import Trabajo
+from app.services import backup, consolidacion, importacion, paquete_sia
+from app.services import config as config_svc
+from app.services import informes
+
+FINALES = ("COMPLETADO", "ERROR", "CANCELADO")
+LATIDOS_PERDIDOS = 4  # latidos sin renovar para dar por muerto al propietario
+
+# Identifica a este proceso como propietario de los trabajos que toma
+_PROCESO = str(uuid.uuid4())
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec="milliseconds")
+
+
+def _mes(parametros: dict) -> int | None:
+    return parametros.get("mes")
+
+
+# ─── Tipos de trabajo ─────────────────────────────────────────────────────────
+# Cada tipo retorna {"resultado": JSON} y/o {"artefacto": bytes, "nombre", "media_type"}.
+
+async def _sia_zip(db: AsyncSession, tenant_id: str, parametros: dict, entrada: bytes | None) -> dict:
+    contenido, anio, _ = await paquete_sia.generar_sia_zip(db, tenant_id, mes_consulta=_mes(parametros))
+    mes_str = f"_mes{_mes(parametros)}" if _mes(parametros) else ""
+    return {"artefacto": contenido, "nombre": f"SIA_Contraloria_{anio}{mes_str}.zip", "media_type": "application/zip"}
+
+
+async def _sia_excel(db: AsyncSession, tenant_id: str, parametros: dict, entrada: bytes | None) -> dict:
+    nombre = await config_svc.get_config(db, tenant_id, "nombre_institucion") or "INSTITUCIÓN"
+    vigencia = await config_svc.get_vigencia(db, tenant_id)
+    archivo = await informes.generar_sia_excel_stream(
+        db, tenant_id, mes_consulta=_mes(parametros), nombre_institucion=nombre, vigencia=vigencia,
+    )
+    with archivo:
+        contenido = archivo.read()
+    mes_str = f"_mes{_mes(parametros)}" if _mes(parametros) else ""
+    return {
+        "artefacto": contenido,
+        "nombre": f"SIA_Contraloria{mes_str}.xlsx",
+        "media_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    }
+
+
+async def _backup_exportar(db: AsyncSession, tenant_id: str, parametros: dict, entrada: bytes | None) -> dict:
+    data = await backup.exportar(db, tenant_id)
+    return {
+        "artefacto": json.dumps(data, ensure_ascii=False, indent=2, default=str).encode("utf-8"),
+        "nombre": f"backup_presupuestal_{date.today().isoformat()}.json",
+        "media_type": "application/json",
+    }
+
+
+async def _backup_restaurar(db: AsyncSession, tenant_id: str, parametros: dict, entrada: bytes | None) -> dict:
+    try:
+        data = json.loads(entrada)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Archivo JSON inválido: {e}")
+    stats = await backup.restaurar(db, tenant_id, data)
+    return {"resultado": {"fecha_backup": data.get("fecha_backup"), "registros": stats}}
+
+
+async def _importar_excel(db: AsyncSession, tenant_id: str, parametros: dict, entrada: bytes | None) -> dict:
+    return {"resultado": await importacion.importar_catalogo_excel(db, tenant_id, entrada)}
+
+
+async def _consolidar_mes(db: AsyncSession, tenant_id: str, parametros: dict, entrada: bytes | None) -> dict:
+    mes, gastos = await consolidacion.consolidar_mes(db, tenant_id)
+    _, ingresos = await consolidacion.consolidar_mes_ingresos(db, tenant_id)
+    return {"resultado": {"mes": mes, "rubros_gastos": gastos, "rubros_ingresos": ingresos}}
+
+
+async def _cierre_mes(db: AsyncSession, tenant_id: str, parametros: dict, entrada: bytes | None) -> dict:
+    return {"resultado": {"mes_cerrado": await consolidacion.cierre_mes(db, tenant_id, mes_esperado=parametros.get("mes"))}}
+
+
+# ejecutar: función del tipo; roles: None = cualquier usuario; escritura:
+# modifica datos (sesión de escritura, no se repite tras un reinicio);
+# archivo: requiere archivo de entrada; parametros: claves admitidas.
+TIPOS: dict[str, dict] = {
+    "sia_zip": {"ejecutar": _sia_zip, "roles": None, "escritura": False, "archivo": False, "parametros": ("mes",)},
+    "sia_excel": {"ejecutar": _sia_excel, "roles": None, "escritura": False, "archivo": False, "parametros": ("mes",)},
+    "backup_exportar": {"ejecutar": _backup_exportar, "roles": None, "escritura": False, "archivo": False, "parametros": ()},
+    "backup_restaurar": {"ejecutar": _backup_restaurar, "roles": ("ADMIN", "TESORERO"), "escritura": True,
+                         "archivo": True, "parametros": ()},
+    "importar_excel": {"ejecutar": _importar_excel, "roles": ("ADMIN", "TESORERO"), "escritura": True,
+                       "archivo": True, "parametros": ()},
+    "consolidar_mes": {"ejecutar": _consolidar_mes, "roles": ("ADMIN",), "escritura": True, "archivo": False,
+                       "parametros": ()},
+    "cierre_mes": {"ejecutar": _cierre_mes, "roles": ("ADMIN",), "escritura": True, "archivo": False,
+                   "parametros": ("mes",)},
+}
+
+
+def _verificar_rol(tipo: str, rol: str) -> None:
+    roles = TIPOS[tipo]["roles"]
+    if roles is not None and rol not in roles:
+        raise PermissionError(f"Se requiere rol {' o '.join(roles)} para el trabajo {tipo}.")
+
+
+def validar(tipo: str, rol: str, parametros: dict, entrada: bytes | None) -> None:
+    """Valida tipo, permisos y parámetros. PermissionError o ValueError."""
+    spec = TIPOS.get(tipo)
+    if spec is None:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}. Opciones: {', '.join(TIPOS)}")
+    _verificar_rol(tipo, rol)
+    extra = sorted(set(parametros) - set(spec["parametros"]))
+    if extra:
+        raise ValueError(f"Parámetros no admitidos para {tipo}: {', '.join(extra)}")
+    mes = parametros.get("mes")
+    if mes is not None and (not isinstance(mes, int) or not 1 <= mes <= 12):
+        raise ValueError("mes debe ser un entero entre 1 y 12")
+    if spec["archivo"] and not entrada:
+        raise ValueError(f"El trabajo {tipo} requiere un archivo")
+    if not spec["archivo"] and entrada is not None:
+        raise ValueError(f"El trabajo {tipo} no recibe archivo")
+
+
+# ─── Cola del proceso ─────────────────────────────────────────────────────────
+
+_tareas: dict[str, asyncio.Task] = {}
+_cancelados: set[str] = set()
+_inicios: dict[str, float] = {}
+_limite_global: asyncio.Semaphore | None = None
+_limites_tenant: dict[str, asyncio.Semaphore] = {}
+_latido: asyncio.Task | None = None
+
+
+def _semaforos(tenant_id: str) -> tuple[asyncio.Semaphore, asyncio.Semaphore]:
+    global _limite_global
+    settings = get_settings()
+    if _limite_global is None:
+        _limite_global = asyncio.Semaphore(settings.TRABAJOS_MAX_GLOBAL)
+    if tenant_id not in _limites_tenant:
+        _limites_tenant[tenant_id] = asyncio.Semaphore(settings.TRABAJOS_MAX_TENANT)
+    return _limites_tenant[tenant_id], _limite_global
+
+
+def _encolar(trabajo_id: str, tenant_id: str) -> None:
+    tarea = asyncio.create_task(_ejecutar(trabajo_id, tenant_id))
+    _tareas[trabajo_id] = tarea
+
+
+async def _ejecutar(trabajo_id: str, tenant_id: str) -> None:
+    # Primero el cupo del tenant: un tenant con la cola llena no ocupa cupos globales
+    limite_tenant, limite_global = _semaforos(tenant_id)
+    try:
+        async with limite_tenant, limite_global:
+            if await _tomar(trabajo_id):
+                await _correr(trabajo_id)
+    except asyncio.CancelledError:
+        if trabajo_id not in _cancelados:
+            raise  # apagado del proceso: reanudar_pendientes lo retoma
+        await _finalizar(trabajo_id, {"estado": "CANCELADO"})
+    finally:
+        _tareas.pop(trabajo_id, None)
+        _cancelados.discard(trabajo_id)
+        _inicios.pop(trabajo_id, None)
+
+
+async def _tomar(trabajo_id: str) -> bool:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Trabajo)
+            .where(Trabajo.id == trabajo_id, Trabajo.estado == "PENDIENTE")
+            .values(estado="EN_CURSO", inicio=_ahora(), propietario=_PROCESO, latido=_ahora())
+        )
+        await db.commit()
+    if result.rowcount == 1:
+        _inicios[trabajo_id] = time.perf_counter()
+        _asegurar_latido()
+        return True
+    return False
+
+
+def _asegurar_latido() -> None:
+    global _latido
+    if _latido is None or _latido.done():
+        _latido = asyncio.create_task(_latir())
+
+
+async def _latir() -> None:
+    """Renueva el latido de los trabajos de este proceso mientras haya alguno en curso."""
+    intervalo = get_settings().TRABAJOS_LATIDO_SEGUNDOS
+    while _inicios:
+        await asyncio.sleep(intervalo)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Trabajo)
+                    .where(Trabajo.propietario == _PROCESO, Trabajo.estado == "EN_CURSO")
+                    .values(latido=_ahora())
+                )
+                await db.commit()
+        except Exception:  # p.ej. base bloqueada por un trabajo de escritura: se reintenta en el siguiente
+            pass
+
+
+async def _correr(trabajo_id: str) -> None:
+    valores: dict
+    try:
+        async with AsyncSessionLocal() as db:
+            trabajo = await db.get(Trabajo, trabajo_id)
+            spec = TIPOS[trabajo.tipo]
+            tenant_id, parametros = trabajo.tenant_id, json.loads(trabajo.parametros or "{}")
+            entrada = None
+            if spec["archivo"]:
+                entrada = (await db.execute(select(Trabajo.entrada).where(Trabajo.id == trabajo_id))).scalar_one()
+            if spec["escritura"]:
+                # Misma sesión de escritura que get_db_escritura (BEGIN IMMEDIATE en SQLite)
+                await db.commit()
+                await db.connection(execution_options={"escritura": True})
+            salida = await spec["ejecutar"](db, tenant_id, parametros, entrada)
+        valores = {"estado": "COMPLETADO", "entrada": None}
+        if "resultado" in salida:
+            valores["resultado"] = json.dumps(salida["resultado"], ensure_ascii=False, default=str)
+        if salida.get("artefacto") is not None:
+            valores.update(
+                artefacto=salida["artefacto"],
+                artefacto_nombre=salida["nombre"],
+                artefacto_tipo=salida["media_type"],
+                artefacto_tamano=len(salida["artefacto"]),
+            )
+    except Exception as e:  # el error queda en el trabajo
+        valores = {"estado": "ERROR", "error": str(e)[:2000]}
+    await _finalizar(trabajo_id, valores)
+
+
+async def _finalizar(trabajo_id: str, valores: dict) -> None:
+    # Si otro proceso dio el trabajo por interrumpido (ERROR) pero este seguía
+    # vivo, prevalece el resultado real; si lo volvió a tomar, ya no es de este
+    inicio = _inicios.get(trabajo_id)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Trabajo)
+            .where(
+                Trabajo.id == trabajo_id,
+                Trabajo.propietario == _PROCESO,
+                Trabajo.estado.in_(("EN_CURSO", "ERROR")),
+            )
+            .values(
+                fin=_ahora(),
+                duracion_ms=round((time.perf_counter() - inicio) * 1000) if inicio is not None else None,
+                **valores,
+            )
+        )
+        await db.commit()
+
+
+# ─── API del servicio ─────────────────────────────────────────────────────────
+
+def _trabajo_dict(t: Trabajo) -> dict:
+    return {
+        "id": t.id,
+        "tipo": t.tipo,
+        "estado": t.estado,
+        "parametros": json.loads(t.parametros or "{}"),
+        "solicitado_por": t.solicitado_por,
+        "fecha_creacion": t.fecha_creacion,
+        "inicio": t.inicio,
+        "fin": t.fin,
+        "duracion_ms": t.duracion_ms,
+        "error": t.error,
+        "resultado": json.loads(t.resultado) if t.resultado else None,
+        "artefacto": (
+            {"nombre": t.artefacto_nombre, "media_type": t.artefacto_tipo, "tamano": t.artefacto_tamano}
+            if t.artefacto_nombre else None
+        ),
+    }
+
+
+async def crear(
+    db: AsyncSession, tenant_id: str, tipo: str, parametros: dict,
+    solicitado_por: str, rol: str, entrada: bytes | None = None,
+) -> dict:
+    """Registra el trabajo y lo encola en este proceso."""
+    validar(tipo, rol, parametros, entrada)
+    trabajo = Trabajo(
+        tenant_id=tenant_id,
+        tipo=tipo,
+        parametros=json.dumps(parametros),
+        estado="PENDIENTE",
+        solicitado_por=solicitado_por,
+        fecha_creacion=_ahora(),
+        entrada=entrada,
+    )
+    db.add(trabajo)
+    await db.commit()
+    _encolar(trabajo.id, tenant_id)
+    return _trabajo_dict(trabajo)
+
+
+async def _get(db: AsyncSession, tenant_id: str, trabajo_id: str) -> Trabajo:
+    result = await db.execute(select(Trabajo).where(Trabajo.id == trabajo_id, Trabajo.tenant_id == tenant_id))
+    trabajo = result.scalar_one_or_none()
+    if trabajo is None:
+        raise LookupError(f"Trabajo {trabajo_id} no encontrado")
+    return trabajo
+
+
+async def obtener(db: AsyncSession, tenant_id: str, trabajo_id: str) -> dict:
+    return _trabajo_dict(await _get(db, tenant_id, trabajo_id))
+
+
+async def listar(db: AsyncSession, tenant_id: str, estado: str | None = None, limite: int = 50) -> list[dict]:
+    stmt = select(Trabajo).where(Trabajo.tenant_id == tenant_id)
+    if estado:
+        stmt = stmt.where(Trabajo.estado == estado)
+    result = await db.execute(stmt.order_by(Trabajo.fecha_creacion.desc()).limit(limite))
+    return [_trabajo_dict(t) for t in result.scalars()]
+
+
+async def artefacto(db: AsyncSession, tenant_id: str, trabajo_id: str) -> tuple[bytes, str, str]:
+    """(contenido, nombre, media_type) del archivo generado por el trabajo."""
+    trabajo = await _get(db, tenant_id, trabajo_id)
+    if trabajo.estado != "COMPLETADO":
+        raise ValueError(f"El trabajo está {trabajo.estado}")
+    if not trabajo.artefacto_nombre:
+        raise LookupError("El trabajo no generó archivo")
+    contenido = (await db.execute(select(Trabajo.artefacto).where(Trabajo.id == trabajo_id))).scalar_one()
+    return contenido, trabajo.artefacto_nombre, trabajo.artefacto_tipo
+
+
+async def cancelar(db: AsyncSession, tenant_id: str, trabajo_id: str, rol: str) -> dict:
+    """Cancela un trabajo pendiente, o uno en curso en este proceso. Requiere
+    el mismo rol que enviarlo (PermissionError)."""
+    trabajo = await _get(db, tenant_id, trabajo_id)
+    _verificar_rol(trabajo.tipo, rol)
+    if trabajo.estado in FINALES:
+        raise ValueError(f"El trabajo ya terminó ({trabajo.estado})")
+
+    result = await db.execute(
+        update(Trabajo)
+        .where(Trabajo.id == trabajo_id, Trabajo.estado == "PENDIENTE")
+        .values(estado="CANCELADO", fin=_ahora(), entrada=None)
+    )
+    await db.commit()
+    tarea = _tareas.get(trabajo_id)
+    if result.rowcount == 0:
+        if tarea is None:
+            raise ValueError("El trabajo se está ejecutando en otro proceso")
+        _cancelados.add(trabajo_id)
+    if tarea is not None:
+        tarea.cancel()
+        if result.rowcount == 0:
+            # Esperar a que quede registrado como CANCELADO
+            await asyncio.wait([tarea])
+    db.expire_all()
+    return await obtener(db, tenant_id, trabajo_id)
+
+
+async def estadisticas(db: AsyncSession, tenant_id: str | None = None) -> list[dict]:
+    """Cantidad y duración (promedio / máxima, ms) por tipo y estado, del
+    tenant indicado o de todos (None)."""
+    stmt = (
+        select(Trabajo.tipo, Trabajo.estado, func.count(), func.avg(Trabajo.duracion_ms), func.max(Trabajo.duracion_ms))
+        .group_by(Trabajo.tipo, Trabajo.estado)
+        .order_by(Trabajo.tipo, Trabajo.estado)
+    )
+    if tenant_id is not None:
+        stmt = stmt.where(Trabajo.tenant_id == tenant_id)
+    result = await db.execute(stmt)
+    return [
+        {"tipo": tipo, "estado": estado, "cantidad": cantidad,
+         "duracion_promedio_ms": round(promedio) if promedio is not None else None, "duracion_max_ms": maximo}
+        for tipo, estado, cantidad, promedio, maximo in result.all()
+    ]
+
+
+async def reanudar_pendientes() -> int:
+    """Al iniciar la app: purga los trabajos viejos, resuelve los EN_CURSO
+    cuyo proceso murió y encola los pendientes. Retorna cuántos se encolaron."""
+    settings = get_settings()
+    ahora = datetime.now()
+    limite = (ahora - timedelta(days=settings.TRABAJOS_RETENCION_DIAS)).isoformat(timespec="milliseconds")
+    vencido = (
+        ahora - timedelta(seconds=settings.TRABAJOS_LATIDO_SEGUNDOS * LATIDOS_PERDIDOS)
+    ).isoformat(timespec="milliseconds")
+    huerfano = (Trabajo.estado == "EN_CURSO") & ((Trabajo.latido < vencido) | Trabajo.latido.is_(None))
+    repetibles = [tipo for tipo, spec in TIPOS.items() if not spec["escritura"]]
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Trabajo).where(Trabajo.estado.in_(FINALES), Trabajo.fin < limite))
+        await db.execute(
+            update(Trabajo)
+            .where(huerfano, Trabajo.tipo.in_(repetibles))
+            .values(estado="PENDIENTE", inicio=None, propietario=None, latido=None)
+        )
+        await db.execute(
+            update(Trabajo)
+            .where(huerfano)
+            .values(estado="ERROR", fin=_ahora(), error="Interrumpido por un reinicio del servidor")
+        )
+        pendientes = (await db.execute(
+            select(Trabajo.id, Trabajo.tenant_id).where(Trabajo.estado == "PENDIENTE").order_by(Trabajo.fecha_creacion)
+        )).all()
+        await db.commit()
+    for trabajo_id, tenant_id in pendientes:
+        _encolar(trabajo_id, tenant_id)
+    return len(pendientes)
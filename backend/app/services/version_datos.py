@@ -0,0 +1,94 @@
+"""
+Versión de los datos de cada tenant.
+
+Cualquier transacción que inserta, modifica o borra filas de un tenant
+incrementa su contador en la tabla version_datos, una sola vez por
+transacción. Un listener `after_flush` de la sesión anota los tenants
+modificados, de modo que los servicios de escritura no tienen que
+recordarlo; las sentencias DELETE/UPDATE masivas, que no pasan por el
+flush, llaman a `incrementar`.
+
+El incremento se hace después del commit, en una transacción corta aparte
+(si la transacción se revierte, la versión no cambia). Hacerlo dentro de la
+transacción dejaba bloqueada la fila del tenant hasta el commit y ponía en
+fila todas las escrituras concurrentes del tenant. A cambio, entre el commit
+de los datos y el incremento un caché puede entregar por un instante el
+resultado anterior.
+
+Los cachés de informes guardan cada resultado con la versión leída antes
+de calcularlo y lo descartan en cuanto la versión cambia.
+"""
+
+import logging
+from itertools import chain
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models.version_datos import VersionDatos
+
+# Tablas con tenant_id que no son datos presupuestales
+_EXCLUIDAS = {"users", "version_datos", "cierres_lote_tenants", "trabajos"}
+
+logger = logging.getLogger(__name__)
+
+# Clave en Session.info con los tenants a incrementar al confirmar la transacción
+_INFO = "version_datos"
+_CONFIRMADA = "version_datos_confirmada"
+
+
+async def get_version(db: AsyncSession, tenant_id: str) -> int:
+    result = await db.execute(
+        select(VersionDatos.version).where(VersionDatos.tenant_id == tenant_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+def _sentencia(session, tenant_id: str):
+    stmt = dialect_insert(session, VersionDatos).values(tenant_id=tenant_id, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=["tenant_id"],
+        set_={"version": VersionDatos.version + 1},
+    )
+
+
+async def incrementar(db: AsyncSession, tenant_id: str) -> None:
+    """Anota el tenant para incrementar su versión cuando la transacción
+    actual se confirme."""
+    db.info.setdefault(_INFO, set()).add(tenant_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _anotar_tras_flush(session: Session, flush_context) -> None:
+    pendientes = session.info.setdefault(_INFO, set())
+    modificados = (o for o in session.dirty if session.is_modified(o, include_collections=False))
+    for obj in chain(session.new, modificados, session.deleted):
+        tenant_id = getattr(obj, "tenant_id", None)
+        if tenant_id and obj.__tablename__ not in _EXCLUIDAS:
+            pendientes.add(tenant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _marcar_confirmada(session: Session) -> None:
+    if session.info.get(_INFO):
+        session.info[_CONFIRMADA] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _incrementar_tras_commit(session: Session, transaction) -> None:
+    if transaction.parent is not None:
+        return
+    pendientes = session.info.pop(_INFO, None)
+    if not session.info.pop(_CONFIRMADA, False) or not pendientes:
+        return  # revertida o sin cambios del tenant
+    # La sesión ya devolvió su conexión: con una propia no se agota el pool
+    # aunque muchas sesiones confirmen a la vez
+    try:
+        with session.get_bind().engine.begin() as conn:
+            for tenant_id in sorted(pendientes):
+                conn.execute(_sentencia(session, tenant_id))
+    except Exception:
+        # Los datos ya se confirmaron; el caché vence por TTL
+        logger.exception("No se pudo incrementar la versión de datos de %s", ", ".join(sorted(pendientes)))
@@ -0,0 +1,192 @@
+"""
+Asesor de índices: ejecuta los informes y consultas de saldo de un tenant,
+captura el SQL que emiten y muestra el plan de cada consulta (EXPLAIN QUERY
+PLAN en SQLite, EXPLAIN en PostgreSQL), señalando los recorridos completos
+de tabla. No modifica datos: cada informe corre en una sesión que se
+revierte al terminar.
+Uso:
+    python asesor_indices.py                 # primer tenant
+    python asesor_indices.py --tenant <id>
+    python asesor_indices.py --todas         # muestra también los planes sin recorridos
+Retorna código 1 si encontró recorridos completos.
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+# Agregar el directorio del backend al path para importar los módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import event, select
+
+import app.models  # noqa: F401
+from app.database import AsyncSessionLocal, Base, engine
+from app.models.cdp import CDP
+from app.models.obligacion import Obligacion
+from app.models.rp import RP
+from app.models.rubros import RubroGasto
+from app.models.tenant import Tenant
+from app.models.terceros import Tercero
+from app.services import cdp as cdp_svc
+from app.services import config as config_svc
+from app.services import informes
+from app.services import obligacion as obl_svc
+from app.services import rp as rp_svc
+from app.services import rubros_gastos
+
+TABLAS = set(Base.metadata.tables)
+
+
+async def _muestra(db, tenant_id: str) -> dict:
+    """Valores reales del tenant para parametrizar las consultas."""
+    async def primero(stmt):
+        return (await db.execute(stmt.limit(1))).scalar()
+
+    return {
+        "rubro": await primero(select(RubroGasto.codigo).where(
+            RubroGasto.tenant_id == tenant_id, RubroGasto.es_hoja == 1).order_by(RubroGasto.codigo)),
+        "nit": await primero(select(Tercero.nit).where(Tercero.tenant_id == tenant_id).order_by(Tercero.nit)),
+        "cdp": await primero(select(CDP.numero).where(CDP.tenant_id == tenant_id).order_by(CDP.numero)),
+        "rp": await primero(select(RP.numero).where(RP.tenant_id == tenant_id).order_by(RP.numero)),
+        "obligacion": await primero(select(Obligacion.numero).where(
+            Obligacion.tenant_id == tenant_id).order_by(Obligacion.numero)),
+        "mes": int(await config_svc.get_config(db, tenant_id, "mes_actual") or "1"),
+        "anio": str(await config_svc.get_vigencia(db, tenant_id)),
+    }
+
+
+# nombre -> función (db, tenant_id, muestra); las que requieren un valor de muestra
+# ausente (p.ej. un tenant sin terceros) se omiten.
+CONSULTAS = {
+    "informe_ejecucion_gastos": lambda db, t, m: informes.informe_ejecucion_gastos(db, t, m["mes"]),
+    "informe_ejecucion_ingresos": lambda db, t, m: informes.informe_ejecucion_ingresos(db, t, m["mes"]),
+    "informe_sia_gastos": lambda db, t, m: informes.informe_sia_gastos(db, t, m["mes"]),
+    "resumen_rubro": lambda db, t, m: informes.resumen_rubro(db, t, m["rubro"]),
+    "generar_tarjeta": lambda db, t, m: informes.generar_tarjeta(db, t, m["rubro"]),
+    "informe_cadena_presupuestal": lambda db, t, m: informes.informe_cadena_presupuestal(db, t),
+    "get_resumen": lambda db, t, m: informes.get_resumen(db, t),
+    "cuentas_por_pagar": lambda db, t, m: informes.cuentas_por_pagar(db, t),
+    "pac_vs_ejecutado": lambda db, t, m: informes.pac_vs_ejecutado(db, t, m["mes"]),
+    "informe_tercero": lambda db, t, m: informes.informe_tercero(db, t, m["nit"]),
+    "verificar_equilibrio": lambda db, t, m: informes.verificar_equilibrio(db, t),
+    "sia_csv_f03": lambda db, t, m: informes.generar_sia_csv_f03(db, t, m["mes"], m["anio"], ""),
+    "sia_csv_f7b": lambda db, t, m: informes.generar_sia_csv_f7b(db, t, m["mes"], m["anio"]),
+    "sia_csv_f09": lambda db, t, m: informes.generar_sia_csv_f09(db, t, m["mes"], m["anio"]),
+    "sia_csv_f13a": lambda db, t, m: informes.generar_sia_csv_f13a(db, t, m["mes"], m["anio"]),
+    "saldo_disponible_rubro": lambda db, t, m: rubros_gastos.saldo_disponible_rubro(db, t, m["rubro"]),
+    "saldo_cdp": lambda db, t, m: cdp_svc.saldo_cdp(db, t, m["cdp"]),
+    "saldo_rp": lambda db, t, m: rp_svc.saldo_rp(db, t, m["rp"]),
+    "saldo_obligacion": lambda db, t, m: obl_svc.saldo_obligacion(db, t, m["obligacion"]),
+}
+
+
+class _Captura:
+    """Acumula los SELECT que ejecuta el engine mientras está activa."""
+
+    def __init__(self):
+        self.activa = False
+        self.sentencias: list[tuple[str, object]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.activa and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.sentencias.append((statement, parameters))
+
+
+def _recorridos(dialecto: str, plan: list[str]) -> list[str]:
+    """Tablas recorridas completas según el plan."""
+    tablas = []
+    for linea in plan:
+        if dialecto == "sqlite":
+            m = re.match(r"\s*SCAN (\w+)", linea)
+        else:
+            m = re.search(r"Seq Scan on (\w+)", linea)
+        if m and m.group(1) in TABLAS:
+            tablas.append(m.group(1))
+    return tablas
+
+
+async def _explicar(dialecto: str, sentencia: str, parametros) -> list[str]:
+    prefijo = "EXPLAIN QUERY PLAN " if dialecto == "sqlite" else "EXPLAIN "
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(prefijo + sentencia, parametros)
+        filas = result.all()
+    if dialecto == "sqlite":
+        return [fila[-1] for fila in filas]
+    return [fila[0] for fila in filas]
+
+
+async def main(tenant: str | None, todas: bool) -> int:
+    dialecto = engine.dialect.name
+    if dialecto not in ("sqlite", "postgresql"):
+        print(f"Dialecto no soportado: {dialecto}")
+        return 2
+
+    captura = _Captura()
+    event.listen(engine.sync_engine, "before_cursor_execute", captura)
+
+    async with AsyncSessionLocal() as db:
+        tenant_id = tenant or (await db.execute(select(Tenant.id).order_by(Tenant.id).limit(1))).scalar()
+        if tenant_id is None:
+            print("No hay tenants en la base de datos")
+            return 2
+        muestra = await _muestra(db, tenant_id)
+
+    print(f"Tenant {tenant_id} · {dialecto}")
+    con_recorridos: dict[str, int] = {}
+    vistas: set[str] = set()
+
+    for nombre, consulta in CONSULTAS.items():
+        captura.sentencias = []
+        async with AsyncSessionLocal() as db:
+            captura.activa = True
+            try:
+                await consulta(db, tenant_id, muestra)
+            except Exception as e:
+                print(f"\n— {nombre}: omitido ({e})")
+                continue
+            finally:
+                captura.activa = False
+                await db.rollback()
+
+        nuevas = []
+        for sentencia, parametros in captura.sentencias:
+            if sentencia not in vistas:
+                vistas.add(sentencia)
+                nuevas.append((sentencia, parametros))
+        print(f"\n— {nombre}: {len(captura.sentencias)} consultas, {len(nuevas)} distintas")
+
+        for sentencia, parametros in nuevas:
+            plan = await _explicar(dialecto, sentencia, parametros)
+            tablas = _recorridos(dialecto, plan)
+            for t in tablas:
+                con_recorridos[t] = con_recorridos.get(t, 0) + 1
+            if tablas or todas:
+                marca = "⚠️  recorrido completo: " + ", ".join(tablas) if tablas else "✅"
+                print(f"  {marca}")
+                print("    " + " ".join(sentencia.split())[:200])
+                for linea in plan:
+                    print(f"      {linea}")
+
+    event.remove(engine.sync_engine, "before_cursor_execute", captura)
+    await engine.dispose()
+
+    print("\nResumen")
+    if not con_recorridos:
+        print("  ✅ Ninguna consulta recorre tablas completas")
+        return 0
+    for tabla, n in sorted(con_recorridos.items(), key=lambda x: -x[1]):
+        print(f"  ⚠️  {tabla}: {n} consulta(s)")
+    if dialecto == "postgresql":
+        print("  Nota: con pocas filas el planificador puede preferir Seq Scan; ejecutar ANALYZE antes.")
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant", help="ID del tenant (por defecto, el primero)")
+    parser.add_argument("--todas", action="store_true", help="Muestra también los planes sin recorridos completos")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.tenant, args.todas)))
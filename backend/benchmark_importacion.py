@@ -0,0 +1,106 @@
+"""
+Benchmark de la importación del catálogo desde Excel.
+
+Genera un libro sintético con hojas GASTOS e INGRESOS (jerarquía de códigos
+con puntos, en el formato de la plantilla) y lo importa con
+importar_catalogo_excel en una base SQLite temporal, midiendo tiempo y
+número de sentencias SQL. Importa dos veces: catálogo nuevo y reimportación
+sobre el catálogo existente.
+Uso:
+    python benchmark_importacion.py                # 5000 filas de gastos
+    python benchmark_importacion.py --filas 1500
+"""
+
+import argparse
+import asyncio
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio del backend al path para importar los módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+import openpyxl
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models.tenant import Tenant
+from app.services.importacion import importar_catalogo_excel
+
+TENANT = "benchmark"
+
+
+def _codigos(raiz: str, cantidad: int, ramas: int = 6) -> list[str]:
+    """`cantidad` códigos en orden de recorrido (padre antes que sus hijos)."""
+    codigos = [raiz]
+    pendientes = [raiz]
+    while pendientes and len(codigos) < cantidad:
+        padre = pendientes.pop(0)
+        for i in range(1, ramas + 1):
+            hijo = f"{padre}.{i}"
+            codigos.append(hijo)
+            pendientes.append(hijo)
+            if len(codigos) >= cantidad:
+                break
+    return sorted(codigos, key=lambda c: [int(p) for p in c.split(".")])
+
+
+def generar_libro(filas_gastos: int) -> bytes:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "GASTOS"
+    ws.append(["N°", "CÓDIGO", "CUENTA", "", "", "", "", "", "APROPIACIÓN DEFINITIVA"])
+    for n, codigo in enumerate(_codigos("2", filas_gastos), 1):
+        ws.append([n, codigo, f"Gasto {codigo}", None, None, None, None, None, 1000 + n])
+
+    ws = wb.create_sheet("INGRESOS")
+    ws.append(["N°", "CÓDIGO", "CUENTA", "", "", "", "PRESUPUESTO DEFINITIVO"])
+    for n, codigo in enumerate(_codigos("1", max(filas_gastos // 5, 1)), 1):
+        ws.append([n, codigo, f"Ingreso {codigo}", None, None, None, 5000 + n])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+async def main(filas: int) -> None:
+    contenido = generar_libro(filas)
+    print(f"Libro sintético: {filas} filas de gastos, {max(filas // 5, 1)} de ingresos ({len(contenido) / 1024:.0f} KB)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/benchmark.db")
+        sentencias = [0]
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _contar(*args):
+            sentencias[0] += 1
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with Session() as db:
+            db.add(Tenant(id=TENANT, nombre="Benchmark", nit="0", fecha_creacion="2026-01-01"))
+            await db.commit()
+
+        for etiqueta in ("Catálogo nuevo", "Reimportación"):
+            sentencias[0] = 0
+            inicio = time.perf_counter()
+            async with Session() as db:
+                resultado = await importar_catalogo_excel(db, TENANT, contenido)
+            duracion = time.perf_counter() - inicio
+            print(f"\n{etiqueta}: {duracion:.2f} s, {sentencias[0]} sentencias SQL")
+            print(f"  rubros_gastos={resultado['rubros_gastos']} rubros_ingresos={resultado['rubros_ingresos']}")
+            print(f"  total_gastos={resultado['total_gastos']:,.2f} total_ingresos={resultado['total_ingresos']:,.2f}")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=5000, help="Filas de la hoja GASTOS (por defecto 5000)")
+    args = parser.parse_args()
+    asyncio.run(main(args.filas))
@@ -0,0 +1,73 @@
+"""
+Benchmark de la exportación Excel SIA Contraloría.
+
+Compara el modo normal de openpyxl (generar_sia_excel: objetos de estilo por
+celda) con el modo write_only y estilos con nombre (generar_sia_excel_stream)
+sobre filas sintéticas de gastos e ingresos, sin base de datos. Mide tiempo
+y, en una segunda ejecución, pico de memoria (tracemalloc) de cada modo.
+Uso:
+    python benchmark_sia_excel.py                # 1000 filas por hoja
+    python benchmark_sia_excel.py --filas 5000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio del backend al path para importar los módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.informes import (
+    SIA_XLS_SPOOL_MAX,
+    _SIA_XLS_CAMPOS_G,
+    _SIA_XLS_CAMPOS_I,
+    _escribir_sia_excel,
+    _libro_sia_excel,
+)
+
+
+def _filas(cantidad: int, campos: list[str]) -> list[dict]:
+    filas = []
+    for n in range(cantidad):
+        nivel = 1 + n % 5
+        fila = {"codigo": f"2.{n}", "cuenta": f"Rubro sintético {n}", "nivel": nivel, "es_hoja": int(nivel == 5)}
+        fila.update({c: float((n + 1) * (i + 1) * 1000) if n % 7 else 0 for i, c in enumerate(campos)})
+        filas.append(fila)
+    return filas
+
+
+def _normal(gastos, ingresos) -> int:
+    return len(_libro_sia_excel(gastos, ingresos, "Diciembre", "Benchmark", 2026))
+
+
+def _streaming(gastos, ingresos) -> int:
+    with tempfile.SpooledTemporaryFile(max_size=SIA_XLS_SPOOL_MAX) as archivo:
+        _escribir_sia_excel(archivo, gastos, ingresos, "Diciembre", "Benchmark", 2026)
+        return archivo.tell()
+
+
+def main(filas: int) -> None:
+    gastos = _filas(filas, _SIA_XLS_CAMPOS_G)
+    ingresos = _filas(filas, _SIA_XLS_CAMPOS_I)
+    print(f"Filas sintéticas: {filas} de gastos y {filas} de ingresos")
+
+    for etiqueta, funcion in (("Modo normal", _normal), ("Modo write_only", _streaming)):
+        # tracemalloc hace lenta la ejecución: tiempo y memoria se miden por separado
+        inicio = time.perf_counter()
+        tamano = funcion(gastos, ingresos)
+        duracion = time.perf_counter() - inicio
+        tracemalloc.start()
+        funcion(gastos, ingresos)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\n{etiqueta}: {duracion:.2f} s, pico de memoria {pico / 1024 / 1024:.1f} MB, archivo {tamano / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1000, help="Filas por hoja (por defecto 1000)")
+    args = parser.parse_args()
+    main(args.filas)
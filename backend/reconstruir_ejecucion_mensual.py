@@ -0,0 +1,59 @@
+"""
+Verifica o reconstruye la tabla ejecucion_mensual desde los documentos.
+Uso:
+    python reconstruir_ejecucion_mensual.py              # solo verifica todos los tenants
+    python reconstruir_ejecucion_mensual.py --reconstruir
+    python reconstruir_ejecucion_mensual.py --tenant <id> [--reconstruir]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Agregar el directorio del backend al path para importar los módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, engine
+from app.models.tenant import Tenant
+from app.services import ejecucion_mensual
+
+
+async def main(tenant: str | None, reconstruir: bool) -> int:
+    inconsistentes = 0
+    async with AsyncSessionLocal() as db:
+        if tenant:
+            tenant_ids = [tenant]
+        else:
+            tenant_ids = list((await db.execute(select(Tenant.id).order_by(Tenant.id))).scalars().all())
+
+        for tenant_id in tenant_ids:
+            diferencias = await ejecucion_mensual.verificar(db, tenant_id)
+            if diferencias:
+                inconsistentes += 1
+                print(f"⚠️  {tenant_id}: {len(diferencias)} diferencia(s)")
+                for d in diferencias[:20]:
+                    print(
+                        f"    {d['documento']:<15} {d['codigo_rubro']:<20} {d['anio']}-{d['mes']:02d} "
+                        f"guardado={d['guardado']:,.2f} esperado={d['esperado']:,.2f}"
+                    )
+            else:
+                print(f"✅ {tenant_id}: consistente")
+
+            if reconstruir:
+                filas = await ejecucion_mensual.reconstruir(db, tenant_id)
+                await db.commit()
+                print(f"🔄 {tenant_id}: reconstruido ({filas} filas)")
+
+    await engine.dispose()
+    return 1 if inconsistentes and not reconstruir else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant", help="ID del tenant (por defecto, todos)")
+    parser.add_argument("--reconstruir", action="store_true", help="Reescribe el acumulado desde los documentos")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.tenant, args.reconstruir)))
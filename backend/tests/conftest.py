@@ -0,0 +1,156 @@
+"""
+Fixtures de las pruebas del backend.
+
+La app lee DATABASE_URL al importarse, así que aquí se apunta a una base
+SQLite temporal antes de importar nada de `app`. `bd` deja la base vacía y
+con los datos de `sembrar` antes de cada prueba.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+_DIR = tempfile.mkdtemp(prefix="presupuesto-pruebas-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DIR}/pruebas.db"
+os.environ["ENVIRONMENT"] = "development"  # autenticación con X-Dev-Email
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.auth import principales  # noqa: E402
+from app.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.models.cdp import CDP  # noqa: E402
+from app.models.config import Config  # noqa: E402
+from app.models.cuentas_bancarias import CuentaBancaria  # noqa: E402
+from app.models.modificaciones import DetalleModificacion, ModificacionPresupuestal  # noqa: E402
+from app.models.obligacion import Obligacion  # noqa: E402
+from app.models.pac import PAC  # noqa: E402
+from app.models.pago import Pago  # noqa: E402
+from app.models.recaudo import Recaudo  # noqa: E402
+from app.models.reconocimiento import Reconocimiento  # noqa: E402
+from app.models.rp import RP  # noqa: E402
+from app.models.rubros import RubroGasto, RubroIngreso  # noqa: E402
+from app.models.tenant import Tenant, User  # noqa: E402
+from app.models.terceros import Tercero  # noqa: E402
+from app.services import cache_informes  # noqa: E402
+
+engine.echo = False
+
+TENANT = "00000000-0000-0000-0000-000000000001"
+EMAIL_ADMIN = "admin@pruebas"
+
+RUBROS_GASTOS = ["2", "2.1", "2.1.1", "2.1.2", "2.1.2.1", "2.1.2.2", "2.2", "2.2.1", "2.2.2", "2.3"]
+RUBROS_INGRESOS = ["1", "1.1", "1.1.1", "1.1.2", "1.2"]
+NITS = ["100", "200", "300"]
+
+
+def _hojas(codigos: list[str]) -> list[str]:
+    return [c for c in codigos if not any(o.startswith(c + ".") for o in codigos)]
+
+
+async def sembrar(n_cdps: int = 60, semilla: int = 1) -> None:
+    """Un tenant con rubros, terceros, PAC, modificaciones y la cadena
+    CDP → RP → obligación → pago."""
+    rnd = random.Random(semilla)
+    hojas = _hojas(RUBROS_GASTOS)
+    hojas_ingresos = _hojas(RUBROS_INGRESOS)
+
+    def fecha() -> str:
+        return f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+
+    async with AsyncSessionLocal() as db:
+        db.add(Tenant(id=TENANT, nombre="Institución de Pruebas", nit="1", estado="ACTIVO", fecha_creacion="2026-01-01"))
+        db.add(User(tenant_id=TENANT, email=EMAIL_ADMIN, nombre="Admin", rol="ADMIN", activo=True, fecha_creacion="2026-01-01"))
+        for clave, valor in {"mes_actual": "5", "vigencia": "2026", "nombre_institucion": "IE"}.items():
+            db.add(Config(tenant_id=TENANT, clave=clave, valor=valor))
+        for c in RUBROS_GASTOS:
+            valor = rnd.randint(1, 100) * 1000.0 if c in hojas else 0
+            db.add(RubroGasto(tenant_id=TENANT, codigo=c, cuenta="R" + c, es_hoja=1 if c in hojas else 0,
+                              apropiacion_inicial=valor, adiciones=0, reducciones=0, creditos=0, contracreditos=0,
+                              apropiacion_definitiva=valor))
+        for c in RUBROS_INGRESOS:
+            db.add(RubroIngreso(tenant_id=TENANT, codigo=c, cuenta="I" + c, es_hoja=1 if c in hojas_ingresos else 0,
+                                presupuesto_inicial=5000.0, adiciones=0, reducciones=0, presupuesto_definitivo=5000.0))
+        for nit in NITS:
+            db.add(Tercero(tenant_id=TENANT, nit=nit, nombre="T" + nit, banco="B", no_cuenta="1"))
+        db.add(CuentaBancaria(tenant_id=TENANT, id=1, banco="BANCO", tipo_cuenta="A", numero_cuenta="1", estado="ACTIVA"))
+        for c in hojas:
+            for mes in range(1, 13):
+                db.add(PAC(tenant_id=TENANT, codigo_rubro=c, mes=mes, valor_programado=float(rnd.randint(0, 50))))
+
+        n = {"rp": 0, "obligacion": 0, "pago": 0}
+        for numero in range(1, n_cdps + 1):
+            rubro = rnd.choice(hojas)
+            db.add(CDP(tenant_id=TENANT, numero=numero, fecha=fecha(), codigo_rubro=rubro, objeto="o",
+                       valor=1000.0, estado=rnd.choice(["ACTIVO", "ACTIVO", "ANULADO"])))
+            for _ in range(rnd.randint(1, 2)):
+                n["rp"] += 1
+                nit = rnd.choice(NITS)
+                db.add(RP(tenant_id=TENANT, numero=n["rp"], fecha=fecha(), cdp_numero=numero, codigo_rubro=rubro,
+                          nit_tercero=nit, valor=float(rnd.randint(1, 400)), objeto="x", estado="ACTIVO"))
+                rp_numero = n["rp"]
+                for _ in range(rnd.randint(1, 2)):
+                    n["obligacion"] += 1
+                    db.add(Obligacion(tenant_id=TENANT, numero=n["obligacion"], fecha=fecha(), rp_numero=rp_numero,
+                                      codigo_rubro=rubro, nit_tercero=nit, valor=float(rnd.randint(1, 150)),
+                                      factura="f", estado="ACTIVO"))
+                    n["pago"] += 1
+                    db.add(Pago(tenant_id=TENANT, numero=n["pago"], fecha=fecha(), obligacion_numero=n["obligacion"],
+                                codigo_rubro=rubro, nit_tercero=nit, valor=float(rnd.randint(1, 60)),
+                                concepto="p", cuenta_bancaria_id=1, estado="PAGADO"))
+        for numero in range(1, 21):
+            db.add(Recaudo(tenant_id=TENANT, numero=numero, fecha=fecha(), codigo_rubro=rnd.choice(hojas_ingresos),
+                           valor=float(rnd.randint(1, 100)), cuenta_bancaria_id=1, estado="ACTIVO"))
+            db.add(Reconocimiento(tenant_id=TENANT, numero=numero, fecha=fecha(), codigo_rubro=rnd.choice(hojas_ingresos),
+                                  valor=float(rnd.randint(1, 100)), estado="ACTIVO"))
+        for id_mod in range(1, 4):
+            rubro = rnd.choice(hojas)
+            db.add(ModificacionPresupuestal(tenant_id=TENANT, id=id_mod, fecha=fecha(), tipo="ADICION",
+                                            numero_acto=f"A-{id_mod}", valor=100.0))
+            db.add(DetalleModificacion(tenant_id=TENANT, id_modificacion=id_mod, codigo_rubro=rubro,
+                                       tipo_rubro="GASTO", campo_afectado="adiciones", valor=100.0))
+            db.add(DetalleModificacion(tenant_id=TENANT, id_modificacion=id_mod, codigo_rubro="1.2",
+                                       tipo_rubro="INGRESO", campo_afectado="adiciones", valor=100.0))
+        await db.commit()
+
+
+async def _reiniciar(n_cdps: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await sembrar(n_cdps)
+    await engine.dispose()  # la conexión no debe quedar atada al loop de esta función
+
+
+@pytest.fixture
+def bd(request):
+    """Base recién sembrada. `@pytest.mark.parametrize("bd", [n], indirect=True)`
+    cambia la cantidad de CDPs."""
+    asyncio.run(_reiniciar(getattr(request, "param", 60)))
+    principales.limpiar()
+    cache_informes.set_backend(cache_informes.CacheMemoria())
+    yield
+    principales.limpiar()
+
+
+class ContadorConsultas:
+    """Cuenta las sentencias SQL que ejecuta el engine de la app."""
+
+    def __init__(self):
+        self.n = 0
+
+    def _contar(self, *args, **kwargs):
+        self.n += 1
+
+    def __enter__(self):
+        self.n = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._contar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._contar)
@@ -0,0 +1,170 @@
+"""
+ClavesJWKS contra un JWKS local (httpx.MockTransport) y un reloj controlado.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.auth import clerk_auth
+from app.auth.clerk_auth import ClavesJWKS
+
+TTL, MARGEN, INTERVALO = 600, 120, 30
+
+
+def _jwk(kid: str) -> dict:
+    privada = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return {**json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(privada.public_key())), "kid": kid}
+
+
+JWK_1, JWK_2 = _jwk("k1"), _jwk("k2")
+
+
+class ServidorJWKS:
+    """JWKS de prueba: cuenta las descargas; `liberar` las deja responder y
+    `fallar` hace que respondan 503."""
+
+    def __init__(self, claves: list[dict]):
+        self.claves = claves
+        self.fallar = False
+        self.descargas = 0
+        self.liberar = asyncio.Event()
+        self.liberar.set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.descargas += 1
+        await self.liberar.wait()
+        if self.fallar:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"keys": self.claves})
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self) -> float:
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    # Solo el reloj del módulo: el del loop de asyncio sigue siendo el real
+    monkeypatch.setattr(clerk_auth, "time", SimpleNamespace(monotonic=reloj.monotonic))
+    return reloj
+
+
+def _gestor(servidor: ServidorJWKS) -> ClavesJWKS:
+    return ClavesJWKS(url="http://jwks.local/.well-known/jwks.json", ttl=TTL, margen=MARGEN,
+                      intervalo_minimo=INTERVALO, transport=httpx.MockTransport(servidor))
+
+
+async def _soltar_tareas():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_una_sola_descarga_con_llamadas_concurrentes(reloj):
+    async def escenario():
+        servidor = ServidorJWKS([JWK_1])
+        servidor.liberar.clear()
+        gestor = _gestor(servidor)
+        pendientes = [asyncio.create_task(gestor.clave("k1")) for _ in range(50)]
+        await _soltar_tareas()
+        servidor.liberar.set()
+        claves = await asyncio.gather(*pendientes)
+        return servidor.descargas, claves
+
+    descargas, claves = asyncio.run(escenario())
+    assert descargas == 1
+    assert all(c is not None for c in claves)
+
+
+def test_refresca_en_segundo_plano_dentro_del_margen(reloj):
+    async def escenario():
+        servidor = ServidorJWKS([JWK_1])
+        gestor = _gestor(servidor)
+        primera = await gestor.clave("k1")
+
+        reloj.ahora += TTL - MARGEN + 1
+        servidor.liberar.clear()  # la descarga de fondo queda esperando
+        # Se responde con las claves actuales sin esperar la descarga
+        claves = await asyncio.wait_for(asyncio.gather(*(gestor.clave("k1") for _ in range(20))), 1)
+        en_curso = servidor.descargas
+        servidor.liberar.set()
+        await _soltar_tareas()
+        await gestor._en_vuelo
+        return primera, claves, en_curso, gestor
+
+    primera, claves, en_curso, gestor = asyncio.run(escenario())
+    assert all(c is primera for c in claves)
+    assert en_curso == 2  # la inicial y una sola de fondo
+    assert gestor.descargas == 2
+    assert gestor._obtenido == reloj.ahora
+    assert gestor.ultimo_error is None
+
+
+def test_conserva_las_claves_si_la_descarga_falla(reloj):
+    async def escenario():
+        servidor = ServidorJWKS([JWK_1])
+        gestor = _gestor(servidor)
+        primera = await gestor.clave("k1")
+
+        servidor.fallar = True
+        reloj.ahora += TTL + 1  # ya vencidas
+        obsoleta = await gestor.clave("k1")
+        await _soltar_tareas()
+        descargas_tras_fallo = servidor.descargas
+        # Antes de intervalo_minimo no se reintenta
+        await gestor.clave("k1")
+        await _soltar_tareas()
+        return primera, obsoleta, descargas_tras_fallo, servidor.descargas, gestor.ultimo_error
+
+    primera, obsoleta, tras_fallo, final, error = asyncio.run(escenario())
+    assert obsoleta is primera
+    assert tras_fallo == 2
+    assert final == 2
+    assert "503" in error
+
+
+def test_sin_claves_y_sin_servidor_rechaza(reloj):
+    async def escenario():
+        servidor = ServidorJWKS([JWK_1])
+        servidor.fallar = True
+        await _gestor(servidor).clave("k1")
+
+    with pytest.raises(ValueError, match="No se pudieron obtener las claves"):
+        asyncio.run(escenario())
+
+
+def test_kid_desconocido_descarga_limitada_por_intervalo(reloj):
+    async def escenario():
+        servidor = ServidorJWKS([JWK_1])
+        gestor = _gestor(servidor)
+        await gestor.clave("k1")
+
+        reloj.ahora += INTERVALO
+        desconocidas = await asyncio.gather(*(gestor.clave("inventado") for _ in range(20)))
+        tras_primera = servidor.descargas
+        reloj.ahora += INTERVALO / 2
+        await gestor.clave("inventado")
+        antes_del_intervalo = servidor.descargas
+
+        # Clerk rotó las claves: el kid nuevo se descarga a demanda
+        servidor.claves = [JWK_1, JWK_2]
+        reloj.ahora += INTERVALO / 2
+        nueva = await gestor.clave("k2")
+        return desconocidas, tras_primera, antes_del_intervalo, nueva, servidor.descargas
+
+    desconocidas, tras_primera, antes_del_intervalo, nueva, final = asyncio.run(escenario())
+    assert desconocidas == [None] * 20
+    assert tras_primera == 2
+    assert antes_del_intervalo == 2
+    assert nueva is not None
+    assert final == 3
@@ -0,0 +1,84 @@
+"""
+Consecutivos bajo concurrencia: cientos de registros simultáneos, cada uno
+en su sesión de get_db_escritura, no repiten ni saltan números.
+"""
+
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, engine, get_db_escritura
+from app.models.cdp import CDP
+from app.models.config import Config
+from app.schemas.cdp import CDPCreate
+from app.services import cdp as cdp_svc
+from app.services import config as config_svc
+from app.services import registro_masivo
+from conftest import TENANT
+
+REGISTROS = 200
+LOTES = 20
+POR_LOTE = 5
+REVERTIDAS = 20
+
+
+async def _en_sesion(trabajo, confirmar: bool = True):
+    gen = get_db_escritura()
+    db = await gen.__anext__()
+    try:
+        resultado = await trabajo(db)
+        if confirmar:
+            await db.commit()
+        else:
+            await db.rollback()
+        return resultado
+    finally:
+        await gen.aclose()
+
+
+async def _registrar(db, i):
+    return [(await cdp_svc.registrar(db, TENANT, "2.3", f"individual {i}", 1.0)).numero]
+
+
+async def _registrar_lote(db, i):
+    items = [CDPCreate(codigo_rubro="2.3", objeto=f"lote {i}-{j}", valor=1.0) for j in range(POR_LOTE)]
+    resultado = await registro_masivo.registrar_cdps(db, TENANT, items, atomico=True)
+    return [r["numero"] for r in resultado["resultados"]]
+
+
+async def _reservar_y_revertir(db, i):
+    await config_svc.reservar_consecutivos(db, TENANT, "CDP", 3)
+    return []
+
+
+async def _escenario() -> tuple[int, list[int], int, list[int]]:
+    async with AsyncSessionLocal() as db:
+        inicial = (await db.execute(select(func.max(CDP.numero)).where(CDP.tenant_id == TENANT))).scalar()
+        db.add(Config(tenant_id=TENANT, clave="consecutivo_CDP", valor=str(inicial)))
+        await db.commit()
+
+    trabajos = (
+        [_en_sesion(lambda db, i=i: _registrar(db, i)) for i in range(REGISTROS)]
+        + [_en_sesion(lambda db, i=i: _registrar_lote(db, i)) for i in range(LOTES)]
+        + [_en_sesion(lambda db, i=i: _reservar_y_revertir(db, i), confirmar=False) for i in range(REVERTIDAS)]
+    )
+    numeros = [n for lista in await asyncio.gather(*trabajos) for n in lista]
+
+    async with AsyncSessionLocal() as db:
+        final = int(await config_svc.get_config(db, TENANT, "consecutivo_CDP"))
+        guardados = list((await db.execute(
+            select(CDP.numero).where(CDP.tenant_id == TENANT, CDP.numero > inicial).order_by(CDP.numero)
+        )).scalars())
+    await engine.dispose()
+    return inicial, numeros, final, guardados
+
+
+def test_consecutivos_concurrentes_sin_repetir_ni_saltar(bd):
+    inicial, numeros, final, guardados = asyncio.run(_escenario())
+
+    total = REGISTROS + LOTES * POR_LOTE
+    esperados = list(range(inicial + 1, inicial + total + 1))
+    assert len(numeros) == total
+    assert sorted(numeros) == esperados  # únicos y contiguos: las reservas revertidas no dejan huecos
+    assert guardados == esperados
+    assert final == inicial + total
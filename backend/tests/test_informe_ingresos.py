@@ -0,0 +1,122 @@
+"""
+Informe de ejecución de ingresos (services.informes).
+
+Compara, para cada mes, el informe actual (ejecucion_mensual + árbol de
+rubros) con una implementación rubro por rubro sobre los documentos, como
+la anterior. Antes de comparar se anulan y editan recaudos y
+reconocimientos con los servicios, para cubrir el mantenimiento de
+ejecucion_mensual, y se agregan documentos de otra vigencia.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import Integer, func, select
+
+from app.database import AsyncSessionLocal, engine
+from app.models.config import Config
+from app.models.recaudo import Recaudo
+from app.models.reconocimiento import Reconocimiento
+from app.models.rubros import RubroIngreso
+from app.schemas.reconocimiento import ReconocimientoCreate
+from app.services import config as config_svc
+from app.services import ejecucion_mensual, informes
+from app.services import recaudo as recaudo_svc
+from app.services import reconocimiento as reconocimiento_svc
+from conftest import TENANT
+
+
+async def _suma(db, model, codigos: list[str], vigencia: int, mes_desde: int, mes_hasta: int) -> float:
+    mes = func.cast(func.substr(model.fecha, 6, 2), Integer)
+    total = 0
+    for codigo in codigos:
+        total += (await db.execute(
+            select(func.coalesce(func.sum(model.valor), 0)).where(
+                model.tenant_id == TENANT,
+                model.codigo_rubro == codigo,
+                model.estado != "ANULADO",
+                func.substr(model.fecha, 1, 4) == str(vigencia),
+                mes.between(mes_desde, mes_hasta),
+            )
+        )).scalar()
+    return total
+
+
+async def informe_ejecucion_ingresos_por_rubro(db, mes_consulta: int, vigencia: int) -> list[dict]:
+    """Referencia: cuatro sumas por hoja de cada rubro, directo de los documentos."""
+    rubros = (await db.execute(
+        select(RubroIngreso).where(RubroIngreso.tenant_id == TENANT).order_by(RubroIngreso.codigo)
+    )).scalars().all()
+    filas = []
+    for r in rubros:
+        codigos = [r.codigo] if r.es_hoja == 1 else [
+            h.codigo for h in rubros if h.es_hoja == 1 and h.codigo.startswith(r.codigo + ".")
+        ]
+        rec_ant = await _suma(db, Recaudo, codigos, vigencia, 1, mes_consulta - 1)
+        rec_mes = await _suma(db, Recaudo, codigos, vigencia, mes_consulta, mes_consulta)
+        recon_ant = await _suma(db, Reconocimiento, codigos, vigencia, 1, mes_consulta - 1)
+        recon_mes = await _suma(db, Reconocimiento, codigos, vigencia, mes_consulta, mes_consulta)
+        filas.append({
+            "codigo": r.codigo,
+            "cuenta": r.cuenta,
+            "es_hoja": r.es_hoja,
+            "nivel": len(r.codigo.split(".")),
+            "ppto_inicial": r.presupuesto_inicial,
+            "adiciones": r.adiciones,
+            "reducciones": r.reducciones,
+            "ppto_definitivo": r.presupuesto_definitivo,
+            "recon_anterior": recon_ant,
+            "recon_mes": recon_mes,
+            "recon_acumulado": recon_ant + recon_mes,
+            "recaudo_anterior": rec_ant,
+            "recaudo_mes": rec_mes,
+            "recaudo_acumulado": rec_ant + rec_mes,
+            "saldo_por_recaudar": r.presupuesto_definitivo - (rec_ant + rec_mes),
+        })
+    return filas
+
+
+async def _preparar() -> None:
+    async with AsyncSessionLocal() as db:
+        # Documentos de la vigencia anterior: no cuentan en ningún mes
+        for numero, codigo in ((101, "1.1.1"), (102, "1.2")):
+            db.add(Recaudo(tenant_id=TENANT, numero=numero, fecha="2025-03-10", codigo_rubro=codigo,
+                           valor=777.0, cuenta_bancaria_id=1, estado="ACTIVO"))
+            db.add(Reconocimiento(tenant_id=TENANT, numero=numero, fecha="2025-03-10", codigo_rubro=codigo,
+                                  valor=555.0, estado="ACTIVO"))
+        for tipo in ("recaudo", "reconocimiento"):
+            db.add(Config(tenant_id=TENANT, clave=f"consecutivo_{tipo}", valor="102"))
+        await db.flush()
+        await ejecucion_mensual.reconstruir(db, TENANT)
+        await db.commit()
+
+        for numero in (1, 4, 9, 16):
+            await recaudo_svc.anular(db, TENANT, numero)
+            await reconocimiento_svc.anular(db, TENANT, numero + 1)
+        await recaudo_svc.editar(db, TENANT, 2, nuevo_valor=321.0)
+        await recaudo_svc.registrar(db, TENANT, "1.1.2", 50.0, "nuevo", "C-1", 1)
+        await reconocimiento_svc.registrar(db, TENANT, ReconocimientoCreate(codigo_rubro="1.2", valor=70.0))
+        await db.commit()
+
+
+async def _comparar() -> list[tuple[int, list[dict], list[dict]]]:
+    await _preparar()
+    resultados = []
+    async with AsyncSessionLocal() as db:
+        vigencia = await config_svc.get_vigencia(db, TENANT)
+        for mes in range(1, 13):
+            resultados.append((
+                mes,
+                await informes.informe_ejecucion_ingresos(db, TENANT, mes),
+                await informe_ejecucion_ingresos_por_rubro(db, mes, vigencia),
+            ))
+    await engine.dispose()
+    return resultados
+
+
+def test_informe_igual_a_referencia_por_rubro(bd):
+    for mes, actual, referencia in asyncio.run(_comparar()):
+        assert [f["codigo"] for f in actual] == [f["codigo"] for f in referencia], mes
+        for fila, esperada in zip(actual, referencia):
+            assert fila == {k: pytest.approx(v) if isinstance(v, float) else v for k, v in esperada.items()}, (
+                mes, fila["codigo"])
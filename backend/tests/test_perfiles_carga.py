@@ -0,0 +1,54 @@
+"""
+Cantidad de consultas por endpoint de listado y de detalle.
+
+Las relaciones son lazy="raise_on_sql" y cada consulta pide las suyas con
+services.perfiles_carga. Si un endpoint vuelve a cargar relaciones fila por
+fila, su cantidad de consultas deja de coincidir y la prueba falla.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from conftest import EMAIL_ADMIN, ContadorConsultas
+
+# Consultas fijas por endpoint, sin importar cuántos documentos haya. Los
+# listados con saldo lo calculan para todas las filas con una consulta agrupada.
+FIJAS = {
+    "/api/cdp": 2,
+    "/api/rp": 2,
+    "/api/obligaciones": 2,
+    "/api/cdp/5": 3,
+    "/api/rp/3": 3,
+    "/api/obligaciones/2": 3,
+    "/api/pagos": 1,
+    "/api/pagos/1": 1,
+    "/api/recaudos": 1,
+    "/api/recaudos/1": 1,
+    "/api/reconocimientos": 1,
+    "/api/reconocimientos/1": 1,
+    "/api/modificaciones": 2,
+    "/api/modificaciones/2": 2,
+    "/api/comprobantes/cdp/5": 4,
+    "/api/comprobantes/rp/3": 5,
+    "/api/comprobantes/obligacion/2": 5,
+    "/api/comprobantes/pago/1": 4,
+    "/api/comprobantes/recaudo/1": 3,
+}
+
+
+@pytest.fixture
+def cliente(bd):
+    with TestClient(app, headers={"X-Dev-Email": EMAIL_ADMIN}) as c:
+        c.get("/api/auth/me")  # deja el usuario en el caché de principales
+        yield c
+
+
+@pytest.mark.parametrize("bd", [20, 60], indirect=True)
+@pytest.mark.parametrize("url", sorted(FIJAS))
+def test_consultas_fijas(cliente, url):
+    with ContadorConsultas() as consultas:
+        r = cliente.get(url)
+    assert r.status_code == 200, r.text
+    assert consultas.n == FIJAS[url]
+
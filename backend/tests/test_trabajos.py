@@ -0,0 +1,100 @@
+"""
+Recuperación de trabajos al reiniciar: solo se retoman los EN_CURSO cuyo
+proceso dejó de renovar el latido, y el propietario vivo conserva su
+resultado.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.models.trabajo import Trabajo
+from app.services import trabajos
+from conftest import TENANT
+
+
+def _hace(segundos: float) -> str:
+    return (datetime.now() - timedelta(seconds=segundos)).isoformat(timespec="milliseconds")
+
+
+async def _crear(tipo: str, estado: str, propietario: str | None = None, latido: str | None = None) -> str:
+    async with AsyncSessionLocal() as db:
+        trabajo = Trabajo(tenant_id=TENANT, tipo=tipo, estado=estado, fecha_creacion=_hace(600),
+                          inicio=_hace(600) if estado == "EN_CURSO" else None, propietario=propietario, latido=latido)
+        db.add(trabajo)
+        await db.commit()
+        return trabajo.id
+
+
+async def _estados(*ids: str) -> list[str]:
+    async with AsyncSessionLocal() as db:
+        filas = dict((await db.execute(select(Trabajo.id, Trabajo.estado).where(Trabajo.id.in_(ids)))).all())
+    return [filas[i] for i in ids]
+
+
+def test_reanudar_solo_huerfanos(bd, monkeypatch):
+    encolados = []
+    monkeypatch.setattr(trabajos, "_encolar", lambda trabajo_id, tenant_id: encolados.append(trabajo_id))
+    vencido = _hace(get_settings().TRABAJOS_LATIDO_SEGUNDOS * (trabajos.LATIDOS_PERDIDOS + 1))
+
+    async def escenario():
+        ids = [
+            await _crear("sia_zip", "EN_CURSO", "vivo", _hace(1)),
+            await _crear("importar_excel", "EN_CURSO", "vivo", _hace(1)),
+            await _crear("sia_zip", "EN_CURSO", "muerto", vencido),
+            await _crear("importar_excel", "EN_CURSO", "muerto", vencido),
+            await _crear("sia_excel", "EN_CURSO"),  # anterior al latido
+            await _crear("sia_zip", "PENDIENTE"),
+        ]
+        await trabajos.reanudar_pendientes()
+        estados = await _estados(*ids)
+        await engine.dispose()
+        return ids, estados
+
+    ids, estados = asyncio.run(escenario())
+    assert estados == ["EN_CURSO", "EN_CURSO", "PENDIENTE", "ERROR", "PENDIENTE", "PENDIENTE"]
+    assert encolados == [ids[2], ids[4], ids[5]]
+
+
+def test_propietario_vivo_conserva_resultado(bd):
+    async def escenario():
+        propio = await _crear("importar_excel", "PENDIENTE")
+        ajeno = await _crear("importar_excel", "PENDIENTE")
+        for trabajo_id in (propio, ajeno):
+            assert await trabajos._tomar(trabajo_id)
+        async with AsyncSessionLocal() as db:
+            # Otro proceso lo dio por interrumpido / lo volvió a tomar
+            await db.execute(update(Trabajo).where(Trabajo.id == propio).values(estado="ERROR", error="Interrumpido"))
+            await db.execute(update(Trabajo).where(Trabajo.id == ajeno).values(propietario="otro"))
+            await db.commit()
+        for trabajo_id in (propio, ajeno):
+            await trabajos._finalizar(trabajo_id, {"estado": "COMPLETADO"})
+            trabajos._inicios.pop(trabajo_id, None)
+        estados = await _estados(propio, ajeno)
+        await engine.dispose()
+        return estados
+
+    assert asyncio.run(escenario()) == ["COMPLETADO", "EN_CURSO"]
+
+
+def test_latido_se_renueva(bd, monkeypatch):
+    monkeypatch.setattr(get_settings(), "TRABAJOS_LATIDO_SEGUNDOS", 0.05)
+
+    async def escenario():
+        trabajo_id = await _crear("sia_zip", "PENDIENTE")
+        assert await trabajos._tomar(trabajo_id)
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Trabajo).where(Trabajo.id == trabajo_id).values(latido=_hace(3600)))
+            await db.commit()
+        await asyncio.sleep(0.3)
+        trabajos._inicios.pop(trabajo_id)
+        await trabajos._latido
+        async with AsyncSessionLocal() as db:
+            latido = (await db.execute(select(Trabajo.latido).where(Trabajo.id == trabajo_id))).scalar_one()
+        await engine.dispose()
+        return latido
+
+    assert asyncio.run(escenario()) > _hace(5)
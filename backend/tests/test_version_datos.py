@@ -0,0 +1,60 @@
+"""
+Versión de datos por tenant: aumenta una vez por transacción confirmada,
+después del commit, y no cambia si la transacción se revierte.
+"""
+
+import asyncio
+
+from sqlalchemy import event, update
+
+from app.database import AsyncSessionLocal, engine
+from app.models.recaudo import Recaudo
+from app.services import version_datos
+from conftest import TENANT
+
+
+async def _version() -> int:
+    async with AsyncSessionLocal() as db:
+        return await version_datos.get_version(db, TENANT)
+
+
+def test_incrementa_tras_commit(bd):
+    sentencias = []
+
+    def _registrar(conn, cursor, statement, *args):
+        if "version_datos" in statement and not statement.lstrip().upper().startswith("SELECT"):
+            sentencias.append(statement)
+
+    async def escenario():
+        versiones = [await _version()]
+        async with AsyncSessionLocal() as db:
+            for recaudo in (await db.get(Recaudo, 1), await db.get(Recaudo, 2)):
+                recaudo.concepto = "editado"
+                await db.flush()
+            # Dentro de la transacción la fila de la versión no se toca (no queda bloqueada)
+            assert sentencias == []
+            versiones.append(await _version())
+            await db.commit()
+        assert len(sentencias) == 1
+        versiones.append(await _version())
+
+        async with AsyncSessionLocal() as db:
+            (await db.get(Recaudo, 3)).concepto = "revertido"
+            await db.flush()
+            await db.rollback()
+        versiones.append(await _version())
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Recaudo).where(Recaudo.tenant_id == TENANT).values(concepto="masivo"))
+            await version_datos.incrementar(db, TENANT)
+            await db.commit()
+        versiones.append(await _version())
+        await engine.dispose()
+        return versiones
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _registrar)
+    try:
+        inicial, *resto = asyncio.run(escenario())
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _registrar)
+    assert resto == [inicial, inicial + 1, inicial + 1, inicial + 2]
@@ -2905,8 +2905,24 @@ def resumen_rubro_ingreso(codigo_rubro, mes_inicio=1, mes_fin=12):
     }
 
 
+def _acumular_por_prefijo(valores):
+    """{codigo: (v1, v2, ...)} -> {codigo: totales} donde cada codigo suma
+    sus propios valores y los de todos los codigos que empiezan por "codigo."
+    (lo mismo que el filtro codigo_rubro = ? OR codigo_rubro LIKE 'codigo.%')."""
+    totales = {}
+    for codigo, vector in valores.items():
+        partes = codigo.split(".")
+        for i in range(1, len(partes) + 1):
+            prefijo = ".".join(partes[:i])
+            actual = totales.get(prefijo)
+            totales[prefijo] = vector if actual is None else tuple(a + b for a, b in zip(actual, vector))
+    return totales
+
+
 def informe_ejecucion_ingresos(mes_consulta=None):
-    """Ejecucion presupuestal de ingresos - formato catalogo."""
+    """Ejecucion presupuestal de ingresos - formato catalogo.
+    Una consulta agrupada sobre recaudo (anterior / mes por rubro) y la
+    totalizacion de los padres en memoria."""
     if mes_consulta is None:
         mes_consulta = int(get_config("mes_actual") or 1)
 
@@ -2921,46 +2937,37 @@ def informe_ejecucion_ingresos(mes_consulta=None):
     else:
         fecha_fin_mes = f"{anio}-{mes_consulta+1:02d}-01"
 
+    recaudos = {
+        row["codigo_rubro"]: (row["anterior"], row["mes"])
+        for row in conn.execute(
+            "SELECT codigo_rubro, "
+            "COALESCE(SUM(CASE WHEN fecha < ? THEN valor ELSE 0 END),0) as anterior, "
+            "COALESCE(SUM(CASE WHEN fecha >= ? THEN valor ELSE 0 END),0) as mes "
+            "FROM recaudo WHERE estado<>'ANULADO' AND fecha < ? GROUP BY codigo_rubro",
+            (fecha_ini_mes, fecha_ini_mes, fecha_fin_mes)
+        ).fetchall()
+    }
+    conn.close()
+
+    recaudos_acum = _acumular_por_prefijo(recaudos)
+    ppto_acum = _acumular_por_prefijo({
+        r["codigo"]: (r["presupuesto_inicial"], r["adiciones"], r["reducciones"], r["presupuesto_definitivo"])
+        for r in rubros if r["es_hoja"] == 1
+    })
+
     for r in rubros:
         codigo = r["codigo"]
         es_hoja = r["es_hoja"]
 
-        if es_hoja:
-            filtro = "codigo_rubro = ?"
-            params = [codigo]
-        else:
-            filtro = "(codigo_rubro = ? OR codigo_rubro LIKE ?)"
-            params = [codigo, codigo + ".%"]
-
         if es_hoja:
             ppto_ini = r["presupuesto_inicial"]
             adiciones = r["adiciones"]
             reducciones = r["reducciones"]
             ppto_def = r["presupuesto_definitivo"]
+            rec_ant, rec_mes = recaudos.get(codigo, (0, 0))
         else:
-            rs = conn.execute(
-                "SELECT COALESCE(SUM(presupuesto_inicial),0) as pi, "
-                "COALESCE(SUM(adiciones),0) as ad, COALESCE(SUM(reducciones),0) as re, "
-                "COALESCE(SUM(presupuesto_definitivo),0) as pd "
-                "FROM rubros_ingresos WHERE es_hoja=1 AND codigo LIKE ?",
-                (codigo + ".%",)
-            ).fetchone()
-            ppto_ini = rs["pi"]
-            adiciones = rs["ad"]
-            reducciones = rs["re"]
-            ppto_def = rs["pd"]
-
-        # Recaudos anteriores al mes
-        rec_ant = conn.execute(
-            f"SELECT COALESCE(SUM(valor),0) as t FROM recaudo WHERE {filtro} AND estado<>'ANULADO' AND fecha < ?",
-            params + [fecha_ini_mes]
-        ).fetchone()["t"]
-
-        # Recaudos del mes
-        rec_mes = conn.execute(
-            f"SELECT COALESCE(SUM(valor),0) as t FROM recaudo WHERE {filtro} AND estado<>'ANULADO' AND fecha >= ? AND fecha < ?",
-            params + [fecha_ini_mes, fecha_fin_mes]
-        ).fetchone()["t"]
+            ppto_ini, adiciones, reducciones, ppto_def = ppto_acum.get(codigo, (0, 0, 0, 0))
+            rec_ant, rec_mes = recaudos_acum.get(codigo, (0, 0))
 
         rec_acum = rec_ant + rec_mes
         saldo_recaudar = ppto_def - rec_acum
@@ -2980,7 +2987,6 @@ def informe_ejecucion_ingresos(mes_consulta=None):
             "saldo_por_recaudar": saldo_recaudar,
         })
 
-    conn.close()
     return resultado
 
 
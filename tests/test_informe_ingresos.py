@@ -0,0 +1,135 @@
+"""
+Informe de ejecución de ingresos (database.py, versión de escritorio).
+
+Compara fila por fila el informe actual (una consulta agrupada de recaudos)
+con la implementación anterior, que consultaba los recaudos rubro por
+rubro; esa versión se conserva aquí como referencia.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import database  # noqa: E402
+
+CODIGOS = ["1", "1.1", "1.1.1", "1.1.2", "1.1.2.1", "1.1.2.2", "1.2", "1.2.1", "1.3", "10", "10.1", "2"]
+
+
+def informe_ejecucion_ingresos_por_rubro(mes_consulta):
+    """Implementación anterior: dos consultas de recaudo por rubro."""
+    conn = database.get_connection()
+    anio = database.get_config("vigencia") or "2026"
+    rubros = database.get_rubros_ingresos(solo_hojas=False)
+    resultado = []
+
+    fecha_ini_mes = f"{anio}-{mes_consulta:02d}-01"
+    if mes_consulta >= 12:
+        fecha_fin_mes = f"{int(anio)+1}-01-01"
+    else:
+        fecha_fin_mes = f"{anio}-{mes_consulta+1:02d}-01"
+
+    for r in rubros:
+        codigo = r["codigo"]
+        es_hoja = r["es_hoja"]
+
+        if es_hoja:
+            filtro = "codigo_rubro = ?"
+            params = [codigo]
+        else:
+            filtro = "(codigo_rubro = ? OR codigo_rubro LIKE ?)"
+            params = [codigo, codigo + ".%"]
+
+        if es_hoja:
+            ppto_ini = r["presupuesto_inicial"]
+            adiciones = r["adiciones"]
+            reducciones = r["reducciones"]
+            ppto_def = r["presupuesto_definitivo"]
+        else:
+            rs = conn.execute(
+                "SELECT COALESCE(SUM(presupuesto_inicial),0) as pi, "
+                "COALESCE(SUM(adiciones),0) as ad, COALESCE(SUM(reducciones),0) as re, "
+                "COALESCE(SUM(presupuesto_definitivo),0) as pd "
+                "FROM rubros_ingresos WHERE es_hoja=1 AND codigo LIKE ?",
+                (codigo + ".%",)
+            ).fetchone()
+            ppto_ini = rs["pi"]
+            adiciones = rs["ad"]
+            reducciones = rs["re"]
+            ppto_def = rs["pd"]
+
+        rec_ant = conn.execute(
+            f"SELECT COALESCE(SUM(valor),0) as t FROM recaudo WHERE {filtro} AND estado<>'ANULADO' AND fecha < ?",
+            params + [fecha_ini_mes]
+        ).fetchone()["t"]
+
+        rec_mes = conn.execute(
+            f"SELECT COALESCE(SUM(valor),0) as t FROM recaudo WHERE {filtro} AND estado<>'ANULADO' AND fecha >= ? AND fecha < ?",
+            params + [fecha_ini_mes, fecha_fin_mes]
+        ).fetchone()["t"]
+
+        rec_acum = rec_ant + rec_mes
+        resultado.append({
+            "codigo": codigo,
+            "cuenta": r["cuenta"],
+            "es_hoja": es_hoja,
+            "nivel": codigo.count(".") + 1,
+            "ppto_inicial": ppto_ini,
+            "adiciones": adiciones,
+            "reducciones": reducciones,
+            "ppto_definitivo": ppto_def,
+            "recaudo_anterior": rec_ant,
+            "recaudo_mes": rec_mes,
+            "recaudo_acumulado": rec_acum,
+            "saldo_por_recaudar": ppto_def - rec_acum,
+        })
+
+    conn.close()
+    return resultado
+
+
+@pytest.fixture(scope="module")
+def base_escritorio(tmp_path_factory):
+    """Catálogo de ingresos con prefijos que se confunden ("1" y "10"),
+    recaudos anulados, de otras vigencias y de un rubro que no existe."""
+    ruta = tmp_path_factory.mktemp("escritorio") / "presupuesto.db"
+    original = database.DB_PATH
+    database.DB_PATH = str(ruta)
+    database.init_db()
+    rnd = random.Random(7)
+    hojas = [c for c in CODIGOS if not any(o.startswith(c + ".") for o in CODIGOS)]
+
+    conn = database.get_connection()
+    conn.execute("PRAGMA foreign_keys=OFF")
+    conn.execute("DELETE FROM rubros_ingresos")
+    for c in CODIGOS:
+        valor = rnd.randint(1, 900) * 1.25 if c in hojas else 0
+        conn.execute(
+            "INSERT INTO rubros_ingresos (codigo, cuenta, es_hoja, presupuesto_inicial, adiciones, reducciones, "
+            "presupuesto_definitivo) VALUES (?,?,?,?,?,?,?)",
+            (c, "C" + c, 1 if c in hojas else 0, valor, rnd.randint(0, 9), rnd.randint(0, 5), valor + 3),
+        )
+    for numero in range(1, 801):
+        anio = rnd.choice([2025, 2026, 2026, 2026, 2027])
+        conn.execute(
+            "INSERT INTO recaudo (numero, fecha, codigo_rubro, valor, estado) VALUES (?,?,?,?,?)",
+            (numero, f"{anio}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}", rnd.choice(CODIGOS + ["1.1.9"]),
+             rnd.randint(1, 400) * 0.5, rnd.choice(["ACTIVO"] * 5 + ["ANULADO"])),
+        )
+    conn.commit()
+    conn.close()
+    database.set_config("vigencia", "2026")
+    yield
+    database.DB_PATH = original
+
+
+@pytest.mark.parametrize("mes", range(1, 13))
+def test_igual_a_la_consulta_por_rubro(base_escritorio, mes):
+    actual = database.informe_ejecucion_ingresos(mes)
+    esperado = informe_ejecucion_ingresos_por_rubro(mes)
+    assert [f["codigo"] for f in actual] == [f["codigo"] for f in esperado]
+    for fila, fila_esperada in zip(actual, esperado):
+        assert fila == fila_esperada